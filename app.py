@@ -1,8 +1,82 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import Depends, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+import numpy as np
+import orjson
+import asyncio
+import gzip
+import hashlib
 import math
-
-app = FastAPI()
+import multiprocessing
+import os
+import tempfile
+from urllib.parse import urlencode
+
+from cache import TTLCache
+from svgdraw import Affine, Drawing, RecordingDrawing
+import cutlist
+import dxf
+import inverse
+import jobs
+import metrics
+import pdfsheet
+import projects
+import reqlog
+import roofgraph
+import roofplanes
+import shmcache
+import takeoff
+import timber
+
+# sprzątanie przy zamknięciu (pule procesów itp.)
+shutdown_hooks = []
+
+@asynccontextmanager
+async def lifespan(app):
+    warm_up()
+    yield
+    for hook in reversed(shutdown_hooks):
+        hook()
+
+app = FastAPI(lifespan=lifespan)
+# HTML/SVG/JSON/CSV dobrze się kompresują; brotli zostawiamy reverse proxy
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# metryki /metrics + profil na żądanie (nagłówek X-Profile: <DACH_PROFILE_TOKEN>)
+profiler = metrics.SamplingProfiler()
+app.add_middleware(metrics.MetricsMiddleware, profiler=profiler,
+                   profile_token=os.environ.get("DACH_PROFILE_TOKEN"))
+
+# dziennik zapytań /api/calc i /view (JSONL) do odtwarzania ruchu: bench/replay.py
+# Włączany przez DACH_REQUEST_LOG=<ścieżka>; "{pid}" w ścieżce = plik per worker.
+REQUEST_LOG_PATH = os.environ.get("DACH_REQUEST_LOG", "")
+REQUEST_LOG_MAX_MB = float(os.environ.get("DACH_REQUEST_LOG_MAX_MB", "50"))
+REQUEST_LOG_BACKUPS = int(os.environ.get("DACH_REQUEST_LOG_BACKUPS", "5"))
+
+_request_log = None
+
+def request_log():
+    global _request_log
+    if _request_log is None and REQUEST_LOG_PATH:
+        _request_log = reqlog.RequestLog(REQUEST_LOG_PATH, int(REQUEST_LOG_MAX_MB * 1024 * 1024),
+                                         REQUEST_LOG_BACKUPS)
+        shutdown_hooks.append(_request_log.close)
+    return _request_log
+
+app.add_middleware(reqlog.RequestLogMiddleware, get_log=request_log)
+
+STAGE_SECONDS = metrics.Histogram(
+    "dach_stage_seconds", "Czas etapów liczenia/renderu (tylko przy braku w cache)", ("stage",))
+
+class FastJSONResponse(JSONResponse):
+    # orjson: kilkanaście razy szybszy od json.dumps przy tysiącach floatów
+    def render(self, content):
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
 
 def clamp(v, a, b):
     return max(a, min(b, v))
@@ -34,6 +108,9 @@ def calc_roof_cm(
     purlin_s_from_outer_wallplate_cm: float, # opcjonalnie: odległość po krokwi
     purlin_top_above_wallplate_cm: float,    # wysokość GÓRY płatwi nad górą murłaty (gdy s=0)
 ):
+    # te same formuły co węzły roofgraph.py (tam: przeliczenia przyrostowe dla
+    # /ws/live), tu wprost - to najczęstsza ścieżka; zgodność bit w bit
+    # pilnuje tests/test_roofgraph.py
     ang = math.radians(angle_deg)
     half_span_cm = span_cm / 2.0
 
@@ -125,10 +202,516 @@ def calc_roof_cm(
         "purlin": purlin,
     }
 
+# -------------------------
+# Batch: ta sama matematyka co calc_roof_cm, wektorowo (numpy)
+# Wyniki mają być bit w bit takie same jak ze ścieżki skalarnej.
+# -------------------------
+CALC_FIELDS = (
+    "span_cm", "angle_deg", "eave_out_cm",
+    "rafter_h_cm", "wallplate_w_cm", "wallplate_h_cm",
+    "bearing_cm",
+    "purlin_enabled", "purlin_section_h_cm",
+    "purlin_s_from_outer_wallplate_cm", "purlin_top_above_wallplate_cm",
+)
+
+# te same wartości domyślne co w /api/calc
+CALC_DEFAULTS = {
+    "span_cm": 1000.0,
+    "angle_deg": 35.0,
+    "eave_out_cm": 50.0,
+    "rafter_h_cm": 20.0,
+    "wallplate_w_cm": 14.0,
+    "wallplate_h_cm": 14.0,
+    "bearing_cm": 4.0,
+    "purlin_enabled": 0.0,
+    "purlin_section_h_cm": 20.0,
+    "purlin_s_from_outer_wallplate_cm": 0.0,
+    "purlin_top_above_wallplate_cm": 0.0,
+}
+
+BATCH_MAX_ROOFS = 100_000
+
+CALC_RESULT_FIELDS = (
+    "polowa_rozpietosci_cm",
+    "wysokosc_kalenicy_nad_gora_murlaty_cm",
+    "dlugosc_krokwi_po_osi_bez_okapu_cm",
+    "dlugosc_krokwi_po_osi_z_okapem_cm",
+    "kat_plumb_kalenica_deg",
+    "kat_seat_murlata_deg",
+    "murlata_siodlo_w_dol_cm",
+    "murlata_siodlo_poziomo_cm",
+    "murlata_siodlo_po_krokwi_cm",
+)
+
+PURLIN_FIELDS = (
+    "x_cm", "s_cm", "y_top_cm", "y_bottom_cm", "bottom_from_bottom_wallplate_cm",
+    "purlin_section_h_cm", "notch_depth_cm", "notch_horiz_cm", "notch_along_rafter_cm",
+)
+
+# -------------------------
+# Typowany wynik: krotki floatów zamiast zagnieżdżonych dictów
+# Kolejność pól = CALC_FIELDS / CALC_RESULT_FIELDS / PURLIN_FIELDS.
+# Kodowania (dict w starym kształcie, JSON, JSON zwarty) liczone leniwie
+# raz na obiekt - w cache trzymamy RoofResult, więc trafienie w cache
+# to gotowe bajty bez ponownej serializacji.
+# -------------------------
+class RoofResult:
+    __slots__ = ("input", "results", "purlin_mode", "purlin", "_dict", "_json", "_compact")
+
+    def __init__(self, input, results, purlin_mode=None, purlin=None):
+        self.input = input              # krotka jak CALC_FIELDS (purlin_enabled: bool)
+        self.results = results          # krotka jak CALC_RESULT_FIELDS
+        self.purlin_mode = purlin_mode  # None = bez płatwi
+        self.purlin = purlin            # krotka jak PURLIN_FIELDS albo None
+        self._dict = self._json = self._compact = None
+
+    @classmethod
+    def from_dict(cls, data):
+        p = data["purlin"]
+        return cls(
+            tuple(data["input"][k] for k in CALC_FIELDS),
+            tuple(data["results"][k] for k in CALC_RESULT_FIELDS),
+            p["mode"] if p else None,
+            tuple(p[k] for k in PURLIN_FIELDS) if p else None,
+        )
+
+    @classmethod
+    def from_json(cls, raw):
+        """Z bajtów json() (np. z cache wspólnego) - bez ponownej serializacji."""
+        r = cls.from_dict(orjson.loads(raw))
+        r._json = raw
+        return r
+
+    def as_dict(self):
+        """Stary kształt (jak calc_roof_cm). Wspólny obiekt - nie modyfikować."""
+        if self._dict is None:
+            purlin = None
+            if self.purlin is not None:
+                purlin = {"mode": self.purlin_mode, **dict(zip(PURLIN_FIELDS, self.purlin))}
+            self._dict = {
+                "input": dict(zip(CALC_FIELDS, self.input)),
+                "results": dict(zip(CALC_RESULT_FIELDS, self.results)),
+                "purlin": purlin,
+            }
+        return self._dict
+
+    def as_compact(self):
+        """Listy wartości bez nazw; nazwy pól: GET /api/calc/fields."""
+        purlin = None if self.purlin is None else [self.purlin_mode, *self.purlin]
+        return {"input": list(self.input), "results": list(self.results), "purlin": purlin}
+
+    def json(self):
+        if self._json is None:
+            self._json = orjson.dumps(self.as_dict())
+        return self._json
+
+    def compact_json(self):
+        if self._compact is None:
+            self._compact = orjson.dumps(self.as_compact())
+        return self._compact
+
+def calc_fields():
+    return {"input": list(CALC_FIELDS), "results": list(CALC_RESULT_FIELDS),
+            "purlin": ["mode", *PURLIN_FIELDS]}
+
+def _trig_exact(angle_deg):
+    # np.tan potrafi różnić się od math.tan na ostatnim bicie, więc tan/cos/sin
+    # liczymy przez math tylko dla unikalnych kątów i rozkładamy na całą tablicę
+    uniq, inv = np.unique(angle_deg, return_inverse=True)
+    ang = [math.radians(a) for a in uniq.tolist()]
+    tan = np.array([math.tan(a) for a in ang], dtype=np.float64)[inv]
+    cos = np.array([math.cos(a) for a in ang], dtype=np.float64)[inv]
+    sin = np.array([math.sin(a) for a in ang], dtype=np.float64)[inv]
+    return tan, cos, sin
+
+def _safe_div(a, b):
+    # odpowiednik "a / b if b != 0 else 0.0"
+    return np.divide(a, b, out=np.zeros_like(a), where=b != 0)
+
+def _vclamp(v, a, b):
+    return np.maximum(a, np.minimum(b, v))
+
+def calc_roof_cm_batch(cols):
+    """Wektorowa wersja calc_roof_cm; cols: nazwa pola -> tablica float64 (długość n)."""
+    span_cm = cols["span_cm"]
+    angle_deg = cols["angle_deg"]
+    eave_out_cm = cols["eave_out_cm"]
+    rafter_h_cm = cols["rafter_h_cm"]
+    wallplate_w_cm = cols["wallplate_w_cm"]
+    wallplate_h_cm = cols["wallplate_h_cm"]
+    bearing_cm = cols["bearing_cm"]
+    purlin_section_h_cm = cols["purlin_section_h_cm"]
+    purlin_s = cols["purlin_s_from_outer_wallplate_cm"]
+    purlin_top = cols["purlin_top_above_wallplate_cm"]
+
+    tan, cos, sin = _trig_exact(angle_deg)
+    half_span_cm = span_cm / 2.0
+
+    ridge_height_cm = half_span_cm * tan
+    rafter_len_no_eave_cm = half_span_cm / cos
+    rafter_len_with_eave_cm = (half_span_cm + eave_out_cm) / cos
+
+    # siodło na murłacie
+    murlata_depth_cm = _vclamp(bearing_cm, 0, 0.33 * rafter_h_cm)
+    murlata_seat_horiz_cm = _safe_div(murlata_depth_cm, tan)
+    murlata_seat_along_rafter_cm = _safe_div(murlata_depth_cm, sin)
+    murlata_seat_horiz_cm = np.minimum(murlata_seat_horiz_cm, wallplate_w_cm)
+
+    # płatew: oba tryby liczone dla wszystkich, wybór maską
+    by_rafter = purlin_s > 0
+    s_k = _vclamp(purlin_s, 0, rafter_len_no_eave_cm)
+    y_top_h = _vclamp(purlin_top, 0, ridge_height_cm)
+    x_h = _safe_div(y_top_h, tan)
+
+    x = np.where(by_rafter, cos * s_k, x_h)
+    s = np.where(by_rafter, s_k, _safe_div(x_h, cos))
+    y_top = np.where(by_rafter, sin * s_k, y_top_h)
+    y_bottom = y_top - purlin_section_h_cm
+
+    return {
+        "input": cols,
+        "results": {
+            "polowa_rozpietosci_cm": half_span_cm,
+            "wysokosc_kalenicy_nad_gora_murlaty_cm": ridge_height_cm,
+            "dlugosc_krokwi_po_osi_bez_okapu_cm": rafter_len_no_eave_cm,
+            "dlugosc_krokwi_po_osi_z_okapem_cm": rafter_len_with_eave_cm,
+            "kat_plumb_kalenica_deg": angle_deg,
+            "kat_seat_murlata_deg": 90.0 - angle_deg,
+
+            "murlata_siodlo_w_dol_cm": murlata_depth_cm,
+            "murlata_siodlo_poziomo_cm": murlata_seat_horiz_cm,
+            "murlata_siodlo_po_krokwi_cm": murlata_seat_along_rafter_cm,
+        },
+        "purlin": {
+            "enabled": cols["purlin_enabled"] != 0,
+            "by_rafter": by_rafter,
+            "x_cm": x,
+            "s_cm": s,
+            "y_top_cm": y_top,
+            "y_bottom_cm": y_bottom,
+            "bottom_from_bottom_wallplate_cm": wallplate_h_cm + y_bottom,
+            "purlin_section_h_cm": purlin_section_h_cm,
+            # siodełko pod płatew: ta sama głębokość, bez przycięcia do murłaty
+            "notch_depth_cm": murlata_depth_cm,
+            "notch_horiz_cm": _safe_div(murlata_depth_cm, tan),
+            "notch_along_rafter_cm": murlata_seat_along_rafter_cm,
+        },
+    }
+
+def batch_columns(roofs=None, columns=None):
+    """Wejście batcha (lista wierszy albo kolumny) -> kolumny float64 z domyślnymi."""
+    if (roofs is None) == (columns is None):
+        raise HTTPException(422, "podaj dokładnie jedno z: roofs, columns")
+
+    if roofs is not None:
+        n = len(roofs)
+        for r in roofs:
+            unknown = set(r) - set(CALC_FIELDS)
+            if unknown:
+                raise HTTPException(422, f"nieznane pola: {sorted(unknown)}")
+        raw = {k: [r.get(k, CALC_DEFAULTS[k]) for r in roofs] for k in CALC_FIELDS}
+    else:
+        unknown = set(columns) - set(CALC_FIELDS)
+        if unknown:
+            raise HTTPException(422, f"nieznane pola: {sorted(unknown)}")
+        lengths = {len(v) for v in columns.values() if isinstance(v, list)}
+        if len(lengths) > 1:
+            raise HTTPException(422, "kolumny mają różne długości")
+        n = lengths.pop() if lengths else 1
+        raw = {k: columns.get(k, CALC_DEFAULTS[k]) for k in CALC_FIELDS}
+
+    if n > BATCH_MAX_ROOFS:
+        raise HTTPException(413, f"maksymalnie {BATCH_MAX_ROOFS} dachów na zapytanie")
+
+    # skalar w kolumnach = ta sama wartość dla wszystkich dachów
+    return {k: np.broadcast_to(np.asarray(v, dtype=np.float64), (n,)) for k, v in raw.items()}
+
+def batch_to_rows(out):
+    """Wyniki batcha w tym samym kształcie co calc_roof_cm (lista dictów)."""
+    inp = {k: v.tolist() for k, v in out["input"].items()}
+    res = {k: v.tolist() for k, v in out["results"].items()}
+    pur = {k: out["purlin"][k].tolist() for k in PURLIN_FIELDS}
+    enabled = out["purlin"]["enabled"].tolist()
+    by_rafter = out["purlin"]["by_rafter"].tolist()
+
+    rows = []
+    for i in range(len(enabled)):
+        row_in = {k: inp[k][i] for k in CALC_FIELDS}
+        row_in["purlin_enabled"] = enabled[i]
+        purlin = None
+        if enabled[i]:
+            purlin = {"mode": "po_krokwi" if by_rafter[i] else "po_wysokosci_gory"}
+            purlin.update((k, pur[k][i]) for k in PURLIN_FIELDS)
+        rows.append({
+            "input": row_in,
+            "results": {k: v[i] for k, v in res.items()},
+            "purlin": purlin,
+        })
+    return rows
+
+def batch_to_columns(out):
+    """Wyniki batcha kolumnowo: każde pole to lista; płatew None gdy wyłączona."""
+    enabled = out["purlin"]["enabled"]
+    mode = np.where(out["purlin"]["by_rafter"], "po_krokwi", "po_wysokosci_gory")
+    purlin = {"mode": np.where(enabled, mode, None).tolist()}
+    for k in PURLIN_FIELDS:
+        purlin[k] = np.where(enabled, out["purlin"][k], None).tolist()
+
+    inp = {k: v.tolist() for k, v in out["input"].items()}
+    inp["purlin_enabled"] = enabled.tolist()
+    return {
+        "n": int(enabled.shape[0]),
+        "input": inp,
+        "results": {k: v.tolist() for k, v in out["results"].items()},
+        "purlin": purlin,
+    }
+
+def batch_to_compact(out):
+    """Wyniki batcha jako wiersze wartości (jak RoofResult.as_compact) + nazwy pól raz.
+
+    Macierze budujemy w numpy, więc nie ma dictów na dach.
+    """
+    enabled = out["purlin"]["enabled"]
+    n = int(enabled.shape[0])
+    input_rows = np.column_stack([out["input"][k] for k in CALC_FIELDS]).tolist()
+    res = np.column_stack([out["results"][k] for k in CALC_RESULT_FIELDS])
+    pe = CALC_FIELDS.index("purlin_enabled")
+    for row, e in zip(input_rows, enabled.tolist()):
+        row[pe] = e
+    purlin = [None] * n
+    idx = np.flatnonzero(enabled)
+    if idx.size:
+        vals = np.column_stack([out["purlin"][k][idx] for k in PURLIN_FIELDS]).tolist()
+        modes = np.where(out["purlin"]["by_rafter"][idx], "po_krokwi", "po_wysokosci_gory").tolist()
+        for i, m, v in zip(idx.tolist(), modes, vals):
+            purlin[i] = [m, *v]
+    return {"n": n, "fields": calc_fields(), "input": input_rows, "results": res.tolist(), "purlin": purlin}
+
+# -------------------------
+# Sweep: siatka kartezjańska parametrów, liczona leniwie w porcjach
+# -------------------------
+SWEEP_AXES = ("angle_deg", "span_cm", "eave_out_cm", "purlin_top_above_wallplate_cm")
+SWEEP_MAX_POINTS = 10_000_000
+SWEEP_CHUNK = 20_000
+
+SWEEP_PURLIN_FIELDS = (
+    "x_cm", "s_cm", "y_top_cm", "y_bottom_cm", "bottom_from_bottom_wallplate_cm",
+    "notch_depth_cm", "notch_horiz_cm", "notch_along_rafter_cm",
+)
+
+def sweep_axis_len(start, stop, step):
+    """Liczba wartości osi start..stop włącznie co step (bez budowania tablicy)."""
+    if not (math.isfinite(start) and math.isfinite(stop) and math.isfinite(step)):
+        raise HTTPException(422, "zakres: start, stop i step muszą być skończone")
+    if step <= 0 or stop < start:
+        raise HTTPException(422, "zakres: wymagane step > 0 i stop >= start")
+    # limit sprawdzany na float: (stop - start) / step może wyjść inf albo > 2^63
+    steps = (stop - start) / step + 1e-9
+    if not steps < SWEEP_MAX_POINTS:
+        raise HTTPException(413, f"maksymalnie {SWEEP_MAX_POINTS} punktów siatki")
+    return math.floor(steps) + 1
+
+def sweep_axis(start, step, n):
+    """Wartości osi: n punktów od start co step (n z sweep_axis_len)."""
+    return start + step * np.arange(n, dtype=np.float64)
+
+def sweep_header(purlin_enabled):
+    cols = list(CALC_FIELDS) + list(CALC_RESULT_FIELDS)
+    if purlin_enabled:
+        cols += ["purlin_" + k for k in SWEEP_PURLIN_FIELDS]
+    return cols
+
+def sweep_chunks(axes, base, max_ridge_height_cm=None, max_rafter_len_cm=None, chunk=SWEEP_CHUNK,
+                 progress=None):
+    """Generator porcji (kolumny, n) dla siatki axes x base, już po filtrach.
+
+    axes: nazwa osi -> tablica wartości; base: wartości stałe (pozostałe pola).
+    Indeksy siatki są dekodowane porcjami (unravel_index), więc cała siatka
+    nigdy nie leży w pamięci.
+    """
+    names = list(axes)
+    shape = tuple(len(axes[k]) for k in names)
+    total = math.prod(shape)
+    purlin_enabled = base["purlin_enabled"] != 0
+
+    for lo in range(0, total, chunk):
+        idx = np.arange(lo, min(lo + chunk, total))
+        n = len(idx)
+        cols = {k: np.full(n, base[k], dtype=np.float64) for k in CALC_FIELDS if k not in axes}
+        for k, ix in zip(names, np.unravel_index(idx, shape)):
+            cols[k] = axes[k][ix]
+        out = calc_roof_cm_batch(cols)
+        res = out["results"]
+
+        keep = np.ones(n, dtype=bool)
+        if max_ridge_height_cm is not None:
+            keep &= res["wysokosc_kalenicy_nad_gora_murlaty_cm"] <= max_ridge_height_cm
+        if max_rafter_len_cm is not None:
+            keep &= res["dlugosc_krokwi_po_osi_z_okapem_cm"] <= max_rafter_len_cm
+        if progress is not None:
+            progress((lo + n) / total)
+        if not keep.any():
+            continue
+
+        flat = {k: cols[k][keep] for k in CALC_FIELDS}
+        flat.update((k, res[k][keep]) for k in CALC_RESULT_FIELDS)
+        if purlin_enabled:
+            flat.update(("purlin_" + k, out["purlin"][k][keep]) for k in SWEEP_PURLIN_FIELDS)
+        yield flat, int(keep.sum())
+
+def sweep_ndjson(chunks):
+    for flat, n in chunks:
+        keys = list(flat)
+        vals = [flat[k].tolist() for k in keys]
+        yield b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in zip(*vals))
+
+def sweep_csv(chunks, header):
+    yield (",".join(header) + "\n").encode()
+    for flat, n in chunks:
+        vals = [flat[k].tolist() for k in header]
+        yield "".join(",".join(map(repr, row)) + "\n" for row in zip(*vals)).encode()
+
+# -------------------------
+# Cache wyników i renderów + ETag
+# Klucz: wejście znormalizowane (floaty zaokrąglone do CACHE_DECIMALS);
+# liczymy zawsze z wartości klucza, więc cache jest spójny.
+# -------------------------
+CACHE_DECIMALS = 4
+CACHE_VERSION = "4"          # podbić przy zmianie wzorów/szablonów -> nowe ETagi
+CACHE_CONTROL = "public, max-age=3600"
+
+result_cache = TTLCache(maxsize=4096, ttl_s=3600.0, name="result")
+render_cache = TTLCache(maxsize=1024, ttl_s=3600.0, name="render")
+
+# drugi poziom: cache wspólny dla workerów (shmcache.py, plik mmap);
+# DACH_SHARED_CACHE=<ścieżka> (serve.py ustawia domyślną), puste = wyłączony
+SHARED_CACHE_PATH = os.environ.get("DACH_SHARED_CACHE", "")
+SHARED_CACHE_SLOTS = int(os.environ.get("DACH_SHARED_CACHE_SLOTS", "2048"))
+SHARED_CACHE_SLOT_KB = int(os.environ.get("DACH_SHARED_CACHE_SLOT_KB", "64"))
+
+_shared_cache = None
+
+def shared_cache():
+    global _shared_cache
+    if _shared_cache is None and SHARED_CACHE_PATH:
+        _shared_cache = shmcache.SharedCache(
+            SHARED_CACHE_PATH, SHARED_CACHE_SLOTS, SHARED_CACHE_SLOT_KB * 1024, ttl_s=3600.0,
+            namespace=CACHE_VERSION)
+        shutdown_hooks.append(_shared_cache.close)
+    return _shared_cache
+
+def shared_get(cache, key, decode=None):
+    shared = shared_cache()
+    raw = shared.get((cache.name, key)) if shared is not None else None
+    if raw is None:
+        return None
+    return decode(raw) if decode else raw
+
+def shared_set(cache, key, value, encode=None):
+    shared = shared_cache()
+    if shared is not None:
+        shared.set((cache.name, key), encode(value) if encode else value)
+
+def cached(cache, key, compute, encode=None, decode=None):
+    """Cache procesu -> cache wspólny (bajty: encode/decode) -> compute.
+
+    Policzone w jednym workerze trafia do wspólnego, więc pozostałe go nie liczą.
+    """
+    def fill():
+        value = shared_get(cache, key, decode)
+        if value is None:
+            value = compute()
+            shared_set(cache, key, value, encode)
+        return value
+
+    return cache.get_or_compute(key, fill)
+
+def roof_key(*values):
+    """Znormalizowany klucz wejścia (kolejność jak CALC_FIELDS)."""
+    # + 0.0 zamienia -0.0 na 0.0
+    return tuple(round(float(v), CACHE_DECIMALS) + 0.0 for v in values)
+
+def calc_result(key):
+    def compute():
+        args = dict(zip(CALC_FIELDS, key))
+        args["purlin_enabled"] = bool(args["purlin_enabled"])
+        with STAGE_SECONDS.time("calc_roof_cm"):
+            return RoofResult.from_dict(calc_roof_cm(**args))
+    return cached(result_cache, key, compute, RoofResult.json, RoofResult.from_json)
+
+def calc_cached(key):
+    return calc_result(key).as_dict()
+
+def etag_for(kind, key):
+    h = hashlib.sha256(f"{CACHE_VERSION}:{kind}:{key!r}".encode()).hexdigest()[:32]
+    return f'"{h}"'
+
+def cache_headers(etag):
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def roof_query(
+    span_cm: float = 1000,
+    angle_deg: float = 35,
+    eave_out_cm: float = 50,
+
+    rafter_h_cm: float = 20,
+    wallplate_w_cm: float = 14,
+    wallplate_h_cm: float = 14,
+
+    bearing_cm: float = 4,
+
+    purlin_enabled: int = 0,
+    purlin_section_h_cm: float = 20,
+    purlin_s_from_outer_wallplate_cm: float = 0,
+    purlin_top_above_wallplate_cm: float = 0,
+):
+    """Zależność FastAPI: te same parametry co /api/calc -> klucz roof_key."""
+    values = locals()
+    bad = [k for k, v in values.items() if not math.isfinite(v)]
+    if bad:
+        # NaN != NaN: każdy taki klucz byłby nowym wpisem w cache
+        raise HTTPException(422, f"wartości muszą być skończone: {', '.join(bad)}")
+    return roof_key(
+        span_cm, angle_deg, eave_out_cm,
+        rafter_h_cm, wallplate_w_cm, wallplate_h_cm,
+        bearing_cm,
+        bool(purlin_enabled),
+        purlin_section_h_cm,
+        purlin_s_from_outer_wallplate_cm,
+        purlin_top_above_wallplate_cm,
+    )
+
+def batch_keys(cols):
+    """Kolumny batch_columns -> klucze roof_key (do cache wyników); bez NaN/inf."""
+    for k in CALC_FIELDS:
+        if not np.isfinite(cols[k]).all():
+            raise HTTPException(422, f"{k}: wartości muszą być skończone")
+    return [roof_key(*row) for row in zip(*(cols[k].tolist() for k in CALC_FIELDS))]
+
+def roof_params(key):
+    params = dict(zip(CALC_FIELDS, key))
+    params["purlin_enabled"] = int(params["purlin_enabled"])
+    return params
+
+def roof_query_string(key):
+    return urlencode(roof_params(key))
+
+def log_roof(request, key):
+    # RequestLogMiddleware zapisze to po wysłaniu odpowiedzi (razem z czasem)
+    if REQUEST_LOG_PATH:
+        request.state.roof_params = roof_params(key)
+
+def not_modified(request, etag):
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    tags = [t.strip() for t in inm.split(",")]
+    return "*" in tags or etag in tags or ("W/" + etag) in tags
+
 # -------------------------
 # SVG 1: przekrój dachu + płatew (schemat)
 # -------------------------
-def svg_roof_main(data):
+def svg_roof_main(data, drawing_cls=Drawing):
     inp = data["input"]
     res = data["results"]
     p = data["purlin"]
@@ -157,38 +740,25 @@ def svg_roof_main(data):
     max_y = max(rise, 1)
     s = min((W - 2 * pad) / max_x, (H - 2 * pad) / max_y)
 
-    def tx(x): return pad + (x + eave) * s
-    def ty(y): return H - pad - y * s
+    d = drawing_cls(W, H, Affine.y_up(s, pad + eave * s, H - pad))
+    tx, ty = d.tx, d.ty
 
     thick_px = clamp((rafter_h * s) * 0.20, 6, 18)
 
-    def line(p1, p2, stroke="#111", width=3, dash=None):
-        ds = f' stroke-dasharray="{dash}"' if dash else ""
-        return f'<line x1="{tx(p1[0])}" y1="{ty(p1[1])}" x2="{tx(p2[0])}" y2="{ty(p2[1])}" stroke="{stroke}" stroke-width="{width}"{ds} />'
-
-    def text(x, y, t, size=14, color="#111", anchor="start"):
-        return f'<text x="{x}" y="{y}" font-size="{size}" fill="{color}" font-family="Arial" text-anchor="{anchor}">{t}</text>'
-
-    def poly(points, stroke="#111", width=2, fill="none"):
-        pts = " ".join([f"{tx(x)},{ty(y)}" for x, y in points])
-        return f'<polyline points="{pts}" fill="{fill}" stroke="{stroke}" stroke-width="{width}" />'
-
-    svg = [f'<svg width="{W}" height="{H}" xmlns="http://www.w3.org/2000/svg">']
-    svg.append('<rect width="100%" height="100%" fill="#ffffff"/>')
-    svg.append(text(20, 30, "Rysunek 1: przekrój dachu (cm)", 18))
-    svg.append(text(20, 54, f"Rozpiętość: {fmt_cm(span)} | kąt: {fmt_deg(angle)} | okap: {fmt_cm(eave)}", 13, "#444"))
+    d.text(20, 30, "Rysunek 1: przekrój dachu (cm)", 18)
+    d.text(20, 54, f"Rozpiętość: {fmt_cm(span)} | kąt: {fmt_deg(angle)} | okap: {fmt_cm(eave)}", 13, "#444")
 
     # murłaty (realna wys. z pola)
     left_wp = [(0, -wallplate_h), (wallplate_w, -wallplate_h), (wallplate_w, 0), (0, 0), (0, -wallplate_h)]
     right_wp = [(span - wallplate_w, -wallplate_h), (span, -wallplate_h), (span, 0), (span - wallplate_w, 0), (span - wallplate_w, -wallplate_h)]
-    svg.append(poly(left_wp, stroke="#777", width=2))
-    svg.append(poly(right_wp, stroke="#777", width=2))
-    svg.append(text(tx(wallplate_w/2), ty(-wallplate_h-2), "murłata", 12, "#777", anchor="middle"))
+    d.polyline(left_wp, stroke="#777", width=2)
+    d.polyline(right_wp, stroke="#777", width=2)
+    d.text(tx(wallplate_w/2), ty(-wallplate_h-2), "murłata", 12, "#777", anchor="middle")
 
     # krokwie
-    svg.append(line(left_eave, ridge, stroke="#111", width=thick_px))
-    svg.append(line(ridge, right_eave, stroke="#111", width=thick_px))
-    svg.append(line(left_outer, right_outer, stroke="#444", width=2))
+    d.line(left_eave, ridge, stroke="#111", width=thick_px)
+    d.line(ridge, right_eave, stroke="#111", width=thick_px)
+    d.line(left_outer, right_outer, stroke="#444", width=2)
 
     # płatew (góra)
     if p:
@@ -196,17 +766,16 @@ def svg_roof_main(data):
         x = p["x_cm"]
         p1 = (x, y)
         p2 = (span - x, y)
-        svg.append(line(p1, p2, stroke="#0b6", width=5))
-        svg.append(text(tx(p1[0]), ty(p1[1]) - 10, "góra płatwi", 12, "#0b6"))
-        svg.append(line((p1[0], 0), (p1[0], p1[1]), stroke="#0b6", width=3, dash="3,6"))
+        d.line(p1, p2, stroke="#0b6", width=5)
+        d.text(tx(p1[0]), ty(p1[1]) - 10, "góra płatwi", 12, "#0b6")
+        d.line((p1[0], 0), (p1[0], p1[1]), stroke="#0b6", width=3, dash="3,6")
 
-    svg.append('</svg>')
-    return "\n".join(svg)
+    return d.render()
 
 # -------------------------
 # SVG 2: detal PRO - siodło na murłacie + siodło na płatwi
 # -------------------------
-def svg_detail_notches(data):
+def svg_detail_notches(data, drawing_cls=Drawing):
     inp = data["input"]
     res = data["results"]
     p = data["purlin"]
@@ -231,30 +800,17 @@ def svg_detail_notches(data):
     max_y = 140
     s = min((W - 2*pad)/max_x, (H - 2*pad)/max_y)
 
-    def tx(x): return pad + x*s
-    def ty(y): return H - pad - y*s
-
-    def line_xy(x1,y1,x2,y2, stroke="#111", width=3, dash=None):
-        ds = f' stroke-dasharray="{dash}"' if dash else ""
-        return f'<line x1="{tx(x1)}" y1="{ty(y1)}" x2="{tx(x2)}" y2="{ty(y2)}" stroke="{stroke}" stroke-width="{width}"{ds} />'
-
-    def text(x, y, t, size=14, color="#111", anchor="start"):
-        return f'<text x="{x}" y="{y}" font-size="{size}" fill="{color}" font-family="Arial" text-anchor="{anchor}">{t}</text>'
-
-    def poly(points, stroke="#111", width=2, fill="none"):
-        pts = " ".join([f"{tx(x)},{ty(y)}" for x,y in points])
-        return f'<polyline points="{pts}" fill="{fill}" stroke="{stroke}" stroke-width="{width}" />'
+    d = drawing_cls(W, H, Affine.y_up(s, pad, H - pad))
+    tx, ty = d.tx, d.ty
 
-    svg = [f'<svg width="{W}" height="{H}" xmlns="http://www.w3.org/2000/svg">']
-    svg.append('<rect width="100%" height="100%" fill="#ffffff"/>')
-    svg.append(text(20, 30, "Rysunek 2: detal PRO – siodełka (cm)", 18))
-    svg.append(text(20, 54, f"Kąt: {fmt_deg(angle)} | siodełko w dół: {fmt_cm(bearing)} (tak samo na murłacie i płatwi)", 13, "#444"))
+    d.text(20, 30, "Rysunek 2: detal PRO – siodełka (cm)", 18)
+    d.text(20, 54, f"Kąt: {fmt_deg(angle)} | siodełko w dół: {fmt_cm(bearing)} (tak samo na murłacie i płatwi)", 13, "#444")
 
     # Rafter rectangle (schemat)
     L = 200
     Hk = rafter_h
     rafter_rect = [(0,0), (L,0), (L,Hk), (0,Hk), (0,0)]
-    svg.append(poly(rafter_rect, stroke="#111", width=3))
+    d.polyline(rafter_rect, stroke="#111", width=3)
 
     # Murłata notch (na dole krokwi, schematycznie z lewej)
     # Pokazujemy "w dół" i "poziomo"
@@ -268,14 +824,14 @@ def svg_detail_notches(data):
         (x0, m_depth),
         (x0, 0)
     ]
-    svg.append(poly(notch_m, stroke="#c00", width=4))
-    svg.append(text(tx(x0), ty(m_depth+8), "siodełko na murłacie", 12, "#c00"))
+    d.polyline(notch_m, stroke="#c00", width=4)
+    d.text(tx(x0), ty(m_depth+8), "siodełko na murłacie", 12, "#c00")
 
     # Wymiary murłaty
-    svg.append(line_xy(x0 + m_horiz + 10, 0, x0 + m_horiz + 10, m_depth, stroke="#c00", width=2, dash="4,6"))
-    svg.append(text(tx(x0 + m_horiz + 18), ty(m_depth/2), f"w dół: {fmt_cm(m_depth)}", 12, "#c00"))
-    svg.append(line_xy(x0, -8, x0 + m_horiz, -8, stroke="#c00", width=2, dash="4,6"))
-    svg.append(text((tx(x0)+tx(x0+m_horiz))/2, ty(-8) - 6, f"poziomo: {fmt_cm(m_horiz)}", 12, "#c00", anchor="middle"))
+    d.line((x0 + m_horiz + 10, 0), (x0 + m_horiz + 10, m_depth), stroke="#c00", width=2, dash="4,6")
+    d.text(tx(x0 + m_horiz + 18), ty(m_depth/2), f"w dół: {fmt_cm(m_depth)}", 12, "#c00")
+    d.line((x0, -8), (x0 + m_horiz, -8), stroke="#c00", width=2, dash="4,6")
+    d.text((tx(x0)+tx(x0+m_horiz))/2, ty(-8) - 6, f"poziomo: {fmt_cm(m_horiz)}", 12, "#c00", anchor="middle")
 
     # Płatew notch (na górze krokwi, bardziej w prawo)
     if p:
@@ -288,8 +844,8 @@ def svg_detail_notches(data):
             (x1, y_top - p_depth),
             (x1, y_top),
         ]
-        svg.append(poly(notch_p, stroke="#0b6", width=4))
-        svg.append(text(tx(x1), ty(y_top - p_depth - 8), "siodełko pod płatew", 12, "#0b6"))
+        d.polyline(notch_p, stroke="#0b6", width=4)
+        d.text(tx(x1), ty(y_top - p_depth - 8), "siodełko pod płatew", 12, "#0b6")
 
         # płatew (prostokąt na siodełku)
         p_rect = [
@@ -299,22 +855,412 @@ def svg_detail_notches(data):
             (x1, y_top + p_h),
             (x1, y_top),
         ]
-        svg.append(poly(p_rect, stroke="#0b6", width=2))
+        d.polyline(p_rect, stroke="#0b6", width=2)
 
         # wymiary płatwi
-        svg.append(line_xy(x1 + p_horiz + 10, y_top, x1 + p_horiz + 10, y_top - p_depth, stroke="#0b6", width=2, dash="4,6"))
-        svg.append(text(tx(x1 + p_horiz + 18), ty(y_top - p_depth/2), f"w dół: {fmt_cm(p_depth)}", 12, "#0b6"))
-        svg.append(line_xy(x1, y_top - p_depth - 10, x1 + p_horiz, y_top - p_depth - 10, stroke="#0b6", width=2, dash="4,6"))
-        svg.append(text((tx(x1)+tx(x1+p_horiz))/2, ty(y_top - p_depth - 10) - 6, f"poziomo: {fmt_cm(p_horiz)}", 12, "#0b6", anchor="middle"))
+        d.line((x1 + p_horiz + 10, y_top), (x1 + p_horiz + 10, y_top - p_depth), stroke="#0b6", width=2, dash="4,6")
+        d.text(tx(x1 + p_horiz + 18), ty(y_top - p_depth/2), f"w dół: {fmt_cm(p_depth)}", 12, "#0b6")
+        d.line((x1, y_top - p_depth - 10), (x1 + p_horiz, y_top - p_depth - 10), stroke="#0b6", width=2, dash="4,6")
+        d.text((tx(x1)+tx(x1+p_horiz))/2, ty(y_top - p_depth - 10) - 6, f"poziomo: {fmt_cm(p_horiz)}", 12, "#0b6", anchor="middle")
 
-    svg.append('</svg>')
-    return "\n".join(svg)
+    return d.render()
+
+# -------------------------
+# SVG jako osobne zasoby: /svg/{rysunek}/{skrót}.svg?parametry
+# Skrót = hash znormalizowanego wejścia (+ CACHE_VERSION), więc pod danym
+# URL-em zawsze jest ten sam plik -> można cache'ować "na zawsze".
+# -------------------------
+SVG_RENDERERS = {
+    "roof": svg_roof_main,
+    "notches": svg_detail_notches,
+}
+SVG_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# z czego korzysta każdy rysunek (ścieżki jak w RoofGraph.changed_outputs);
+# trzymać w zgodzie z svg_roof_main / svg_detail_notches
+SVG_DEPENDS = {
+    "roof": frozenset({
+        "input.span_cm", "input.angle_deg", "input.eave_out_cm",
+        "input.rafter_h_cm", "input.wallplate_w_cm", "input.wallplate_h_cm",
+        "results.polowa_rozpietosci_cm", "results.wysokosc_kalenicy_nad_gora_murlaty_cm",
+        "purlin.x_cm", "purlin.y_top_cm",
+    }),
+    "notches": frozenset({
+        "input.angle_deg", "input.rafter_h_cm", "input.bearing_cm", "input.purlin_section_h_cm",
+        "results.murlata_siodlo_w_dol_cm", "results.murlata_siodlo_poziomo_cm",
+        "purlin.notch_depth_cm", "purlin.notch_horiz_cm",
+    }),
+}
+
+def drawings_changed(graph, changed):
+    """Wynik graph.update(...) -> rysunki do odświeżenia."""
+    outputs = graph.changed_outputs(changed)
+    return [kind for kind, deps in SVG_DEPENDS.items() if not deps.isdisjoint(outputs)]
+
+def svg_digest(kind, key):
+    return etag_for("svg_" + kind, key).strip('"')
+
+def svg_url(kind, key):
+    return f"/svg/{kind}/{svg_digest(kind, key)}.svg?{roof_query_string(key)}"
+
+def svg_cached(kind, key):
+    def compute():
+        data = calc_cached(key)
+        render = SVG_RENDERERS[kind]
+        with STAGE_SECONDS.time(render.__name__):
+            return render(data)
+    return cached(render_cache, ("svg_" + kind, key), compute, str.encode, bytes.decode)
+
+# -------------------------
+# PDF: karta cięć (reportlab w puli procesów, nie blokuje event loopa)
+# -------------------------
+PDF_WORKERS = int(os.environ.get("DACH_PDF_WORKERS", "2"))
+PDF_BATCH_MAX_ROOFS = 2000
+PDF_STREAM_CHUNK = 64 * 1024
+
+_pdf_pool = None
+
+def pdf_pool():
+    global _pdf_pool
+    if _pdf_pool is None:
+        # spawn, nie fork: procesy robocze liczą strony (app, locki cache),
+        # a fork procesu z wątkami mógłby skopiować zajęty lock
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        shutdown_hooks.append(lambda: _pdf_pool.shutdown(cancel_futures=True))
+    return _pdf_pool
+
+async def run_in_pdf_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(pdf_pool(), fn, *args)
+
+def sheet_page(key):
+    """Dane jednej strony karty cięć (tabele jak w /view + oba rysunki)."""
+    data = calc_cached(key)
+    inp = data["input"]
+    res = data["results"]
+    p = data["purlin"]
+
+    sections = [
+        ("Wymiary i kąty", [
+            ("Połowa rozpiętości", fmt_cm(res["polowa_rozpietosci_cm"])),
+            ("Wysokość kalenicy nad górą murłaty", fmt_cm(res["wysokosc_kalenicy_nad_gora_murlaty_cm"])),
+            ("Długość krokwi po osi (bez okapu)", fmt_cm(res["dlugosc_krokwi_po_osi_bez_okapu_cm"])),
+            ("Długość krokwi po osi (z okapem)", fmt_cm(res["dlugosc_krokwi_po_osi_z_okapem_cm"])),
+            ("Kąt cięcia przy kalenicy (plumb)", fmt_deg(res["kat_plumb_kalenica_deg"])),
+            ("Kąt cięcia przy murłacie (seat)", fmt_deg(res["kat_seat_murlata_deg"])),
+        ]),
+        ("Siodełko na murłacie", [
+            ("W dół", fmt_cm(res["murlata_siodlo_w_dol_cm"])),
+            ("Poziomo", fmt_cm(res["murlata_siodlo_poziomo_cm"])),
+            ("Po krokwi", fmt_cm(res["murlata_siodlo_po_krokwi_cm"])),
+        ]),
+    ]
+    if p:
+        sections += [
+            ("Płatew – pozycja i osadzenie", [
+                ("Pozycja od zewn. krawędzi murłaty", fmt_cm(p["x_cm"])),
+                ("Góra płatwi nad górą murłaty", fmt_cm(p["y_top_cm"])),
+                ("Dół płatwi nad górą murłaty", fmt_cm(p["y_bottom_cm"])),
+                ("Dół płatwi od dołu murłaty", fmt_cm(p["bottom_from_bottom_wallplate_cm"])),
+            ]),
+            ("Siodełko pod płatew", [
+                ("W dół", fmt_cm(p["notch_depth_cm"])),
+                ("Poziomo", fmt_cm(p["notch_horiz_cm"])),
+                ("Po krokwi", fmt_cm(p["notch_along_rafter_cm"])),
+            ]),
+        ]
+
+    return {
+        "title": "Karta cięć – dach dwuspadowy (cm)",
+        "subtitle": (
+            f"Rozpiętość: {fmt_cm(inp['span_cm'])} | kąt: {fmt_deg(inp['angle_deg'])} | "
+            f"okap: {fmt_cm(inp['eave_out_cm'])} | krokiew: {fmt_cm(inp['rafter_h_cm'])} | "
+            f"siodełko: {fmt_cm(inp['bearing_cm'])}"
+        ),
+        "sections": sections,
+        "drawings": [
+            svg_roof_main(data, RecordingDrawing),
+            svg_detail_notches(data, RecordingDrawing),
+        ],
+    }
+
+def pdf_batch_to_file(keys, path):
+    """W procesie roboczym: strony z kluczy (po jednej naraz) -> plik PDF."""
+    return pdfsheet.render_pdf_to_file((sheet_page(k) for k in keys), path)
+
+def read_file_chunks(path):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(PDF_STREAM_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+
+class TempFileResponse(StreamingResponse):
+    """Plik tymczasowy porcjami; kasowany po odpowiedzi, także gdy klient
+    rozłączy się przed pierwszą porcją (generator wtedy w ogóle nie rusza)."""
+
+    def __init__(self, path, **kwargs):
+        self.path = path
+        super().__init__(read_file_chunks(path), **kwargs)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            with suppress(FileNotFoundError):
+                os.unlink(self.path)
+
+# -------------------------
+# Zadania w tle: POST /jobs -> id, GET /jobs/{id} -> postęp, wynik z dysku
+# Walidacja parametrów dzieje się od razu przy zgłoszeniu (te same modele
+# co endpointy synchroniczne), w tle tylko liczenie i zapis pliku.
+# -------------------------
+JOBS_DIR = os.environ.get("DACH_JOBS_DIR", os.path.join(tempfile.gettempdir(), "dach_jobs"))
+JOB_WORKERS = int(os.environ.get("DACH_JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.environ.get("DACH_JOB_MAX_PENDING", "16"))
+JOB_TTL_S = float(os.environ.get("DACH_JOB_TTL_S", str(24 * 3600)))
+
+_job_runner = None
+
+def job_runner():
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = jobs.JobRunner(JOBS_DIR, JOB_WORKERS, JOB_MAX_PENDING, JOB_TTL_S)
+        shutdown_hooks.append(_job_runner.shutdown)
+    return _job_runner
+
+def job_calc_batch(body):
+    batch_check(body)
+    cols = batch_columns(body.roofs, body.columns)
+
+    def task(progress, path):
+        out = calc_roof_cm_batch(cols)
+        progress(0.5)
+        data = batch_payload(body, out)
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data))
+        return "application/json"
+    return task
+
+def job_sweep(body):
+    axes, base, total = sweep_prepare(body)
+
+    def task(progress, path):
+        chunks = sweep_chunks(axes, base, body.max_ridge_height_cm, body.max_rafter_len_cm,
+                              progress=progress)
+        if body.format == "csv":
+            parts, media_type = sweep_csv(chunks, sweep_header(base["purlin_enabled"] != 0)), "text/csv"
+        else:
+            parts, media_type = sweep_ndjson(chunks), "application/x-ndjson"
+        with open(path, "wb") as f:
+            for part in parts:
+                f.write(part)
+        return media_type
+    return task
+
+def job_pdf_batch(body):
+    keys = pdf_batch_keys(body)
+
+    def task(progress, path):
+        pages = []
+        for i, k in enumerate(keys):
+            pages.append(sheet_page(k))
+            progress(0.5 * (i + 1) / len(keys), "dane stron")
+        # render w puli procesów PDF (ten wątek tylko czeka)
+        pdf_pool().submit(pdfsheet.render_pdf_to_file, pages, path).result()
+        return "application/pdf"
+    return task
+
+def job_cutlist(body):
+    pieces = cutlist_pieces(body)
+
+    def task(progress, path):
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(cutlist_project(body, pieces)))
+        return "application/json"
+    return task
+
+def job_takeoff(body):
+    params = takeoff_check(body)
+
+    def task(progress, path):
+        writer, media_type = TAKEOFF_WRITERS[body.format]
+        with open(path, "wb") as f:
+            for part in writer(takeoff_chunks(body, params, progress=progress)):
+                f.write(part)
+        return media_type
+    return task
+
+def job_status(job):
+    out = {k: job[k] for k in ("id", "kind", "status", "progress", "message", "created", "updated", "expires")}
+    if job["status"] == "done":
+        out["result_url"] = f"/jobs/{job['id']}/result"
+    return out
+
+# -------------------------
+# Tryb na żywo (WebSocket /ws/live)
+# Klient -> {"set": {pole: wartość, ...}} (tylko zmienione pola formularza).
+# Serwer zbiera zmiany (debounce LIVE_DEBOUNCE_S, ale nie dłużej niż
+# LIVE_MAX_DELAY_S od pierwszej), liczy raz przez RoofGraph i odsyła tylko
+# zmienione, sformatowane wartości + SVG rysunków, których dotyczy zmiana:
+# {"seq", "values": {"results.<klucz>"|"purlin.<klucz>": tekst}, "purlin": bool,
+#  "svg": {rysunek: "<svg...>"}, "view_url", "errors": {pole: komunikat}}
+# -------------------------
+LIVE_DEBOUNCE_S = 0.06
+LIVE_MAX_DELAY_S = 0.25
+
+def live_paths():
+    return ([f"results.{k}" for k in CALC_RESULT_FIELDS] +
+            [f"purlin.{k}" for k in PURLIN_FIELDS if k != "purlin_section_h_cm"])
+
+def live_values(graph, outputs=None):
+    """Sformatowane wartości dla ścieżek z outputs (None = wszystkie)."""
+    p = graph["purlin"]
+    out = {}
+    for path in live_paths():
+        if outputs is not None and path not in outputs:
+            continue
+        group, k = path.split(".", 1)
+        if group == "results":
+            x = graph[roofgraph.RESULT_NODES[k]]
+        elif p is None:
+            out[path] = ""
+            continue
+        else:
+            x = p[k]
+        out[path] = fmt_deg(x) if k.endswith("_deg") else fmt_cm(x)
+    return out
+
+def live_parse(changes):
+    """{pole: wartość z formularza} -> (floaty, błędy)."""
+    values, errors = {}, {}
+    if not isinstance(changes, dict):
+        return values, {"set": "oczekiwano obiektu {pole: wartość}"}
+    for k, v in changes.items():
+        if k not in CALC_FIELDS:
+            errors[k] = "nieznane pole"
+            continue
+        try:
+            x = float(str(v).replace(",", "."))
+        except ValueError:
+            errors[k] = "to nie jest liczba"
+            continue
+        if not math.isfinite(x):
+            errors[k] = "to nie jest liczba"
+            continue
+        values[k] = x
+    return values, errors
+
+@app.websocket("/ws/live")
+async def ws_live(ws: WebSocket):
+    await ws.accept()
+    loop = asyncio.get_running_loop()
+    pending = {}
+    errors = {}
+    wake = asyncio.Event()
+    params = dict(CALC_DEFAULTS)
+    graph = None
+    last_key = None
+    seq = 0
+
+    async def receive():
+        # tylko zbiera zmiany; liczenie jest w pętli niżej
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("text") is None:
+                errors["message"] = "oczekiwano ramki tekstowej (JSON)"
+                wake.set()
+                continue
+            try:
+                msg = orjson.loads(message["text"])
+            except orjson.JSONDecodeError:
+                errors["message"] = "niepoprawny JSON"
+                wake.set()
+                continue
+            values, errs = live_parse(msg.get("set") if isinstance(msg, dict) else None)
+            pending.update(values)
+            errors.update(errs)
+            for k in values:
+                errors.pop(k, None)
+            wake.set()
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while True:
+            waiter = asyncio.ensure_future(wake.wait())
+            await asyncio.wait({receiver, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                waiter.cancel()
+                receiver.result()   # WebSocketDisconnect -> koniec
+            # debounce: czekamy na ciszę, ale nie dłużej niż LIVE_MAX_DELAY_S
+            first = loop.time()
+            while True:
+                wake.clear()
+                left = min(LIVE_DEBOUNCE_S, first + LIVE_MAX_DELAY_S - loop.time())
+                if left <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(wake.wait(), left)
+                except asyncio.TimeoutError:
+                    break
+            wake.clear()
+
+            params.update(pending)
+            pending.clear()
+            key = roof_key(*[params[k] for k in CALC_FIELDS])
+            args = dict(zip(CALC_FIELDS, key))
+            args["purlin_enabled"] = bool(args["purlin_enabled"])
+
+            msg = {"seq": seq}
+            try:
+                if graph is None:
+                    graph = roofgraph.RoofGraph(**args)
+                    msg["values"] = live_values(graph)
+                    msg["purlin"] = graph["purlin"] is not None
+                    drawings = list(SVG_RENDERERS)
+                else:
+                    changed = graph.update(**args)
+                    outputs = graph.changed_outputs(changed)
+                    msg["values"] = live_values(graph, outputs)
+                    if "purlin" in outputs:
+                        msg["purlin"] = graph["purlin"] is not None
+                    drawings = drawings_changed(graph, changed)
+                if drawings:
+                    # render (gdy nie ma w cache) poza pętlą zdarzeń - inne połączenia nie czekają
+                    msg["svg"] = await asyncio.to_thread(lambda: {kind: svg_cached(kind, key) for kind in drawings})
+                if key != last_key:
+                    msg["view_url"] = "/view?" + roof_query_string(key)
+                    last_key = key
+            except (ArithmeticError, ValueError) as e:
+                # np. dzielenie przez zero; stan grafu liczymy potem od nowa
+                graph = last_key = None
+                errors["calc"] = f"nie da się policzyć: {e}"
+            if errors:
+                msg["errors"] = dict(errors)
+                # błędy pól zostają do poprawienia pola, pozostałe wysyłamy raz
+                for k in [k for k in errors if k not in CALC_FIELDS]:
+                    del errors[k]
+            try:
+                await ws.send_text(orjson.dumps(msg).decode())
+            except (WebSocketDisconnect, RuntimeError):
+                break   # klient rozłączył się w trakcie debounce/liczenia
+            seq += 1
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
 
 # -------------------------
 # UI
 # -------------------------
 @app.get("/", response_class=HTMLResponse)
-def home():
+def home(request: Request):
+    # bez max-age: po wdrożeniu przeglądarka od razu dostaje nową stronę (ETag z treści)
+    return static_pages()["home"].response(request, {"Cache-Control": "no-cache"})
+
+def home_html():
     return """
     <html>
     <head>
@@ -332,6 +1278,9 @@ def home():
         .muted{color:#666;font-size:13px;line-height:1.35}
         .full{grid-column:1 / -1}
         .pill{display:inline-block;background:#f4f4f4;border-radius:999px;padding:4px 10px;font-size:12px}
+        table{width:100%;border-collapse:collapse}
+        td{padding:8px;border-bottom:1px solid #f0f0f0}
+        #live-out svg{max-width:100%;height:auto}
       </style>
     </head>
     <body>
@@ -413,15 +1362,201 @@ def home():
 
           <div style="margin-top:14px">
             <button type="submit">Policz</button>
+            <label style="display:inline;margin-left:12px">
+              <input type="checkbox" id="live" style="width:auto"/> Na żywo (wyniki od razu, bez przeładowania)
+            </label>
           </div>
         </form>
       </div>
+
+      <div id="live-out" class="card" style="display:none;margin-top:14px">
+        <div class="muted" id="live-status"></div>
+        <div class="grid">
+          <table>
+              <tr><td>Połowa rozpiętości</td><td><b data-k="results.polowa_rozpietosci_cm"></b></td></tr>
+              <tr><td>Wysokość kalenicy nad górą murłaty</td><td><b data-k="results.wysokosc_kalenicy_nad_gora_murlaty_cm"></b></td></tr>
+              <tr><td>Długość krokwi po osi (bez okapu)</td><td><b data-k="results.dlugosc_krokwi_po_osi_bez_okapu_cm"></b></td></tr>
+              <tr><td>Długość krokwi po osi (z okapem)</td><td><b data-k="results.dlugosc_krokwi_po_osi_z_okapem_cm"></b></td></tr>
+              <tr><td>Kąt cięcia przy kalenicy (plumb)</td><td><b data-k="results.kat_plumb_kalenica_deg"></b></td></tr>
+              <tr><td>Kąt cięcia przy murłacie (seat)</td><td><b data-k="results.kat_seat_murlata_deg"></b></td></tr>
+              <tr><td>Siodełko na murłacie – w dół</td><td><b data-k="results.murlata_siodlo_w_dol_cm"></b></td></tr>
+              <tr><td>Siodełko na murłacie – poziomo</td><td><b data-k="results.murlata_siodlo_poziomo_cm"></b></td></tr>
+              <tr><td>Siodełko na murłacie – po krokwi</td><td><b data-k="results.murlata_siodlo_po_krokwi_cm"></b></td></tr>
+          </table>
+          <table id="live-purlin">
+              <tr><td>Pozycja płatwi od zewn. krawędzi murłaty</td><td><b data-k="purlin.x_cm"></b></td></tr>
+              <tr><td>Odległość po krokwi</td><td><b data-k="purlin.s_cm"></b></td></tr>
+              <tr><td>Góra płatwi nad górą murłaty</td><td><b data-k="purlin.y_top_cm"></b></td></tr>
+              <tr><td>Dół płatwi nad górą murłaty</td><td><b data-k="purlin.y_bottom_cm"></b></td></tr>
+              <tr><td>Dół płatwi od dołu murłaty</td><td><b data-k="purlin.bottom_from_bottom_wallplate_cm"></b></td></tr>
+              <tr><td>Siodełko pod płatew – w dół</td><td><b data-k="purlin.notch_depth_cm"></b></td></tr>
+              <tr><td>Siodełko pod płatew – poziomo</td><td><b data-k="purlin.notch_horiz_cm"></b></td></tr>
+              <tr><td>Siodełko pod płatew – po krokwi</td><td><b data-k="purlin.notch_along_rafter_cm"></b></td></tr>
+          </table>
+          <div class="full" data-svg="roof"></div>
+          <div class="full" data-svg="notches"></div>
+        </div>
+        <a id="live-view" href="/view">Pełne wyniki (do druku) →</a>
+      </div>
+
+      <script>
+      // tryb na żywo: zmiany pól idą przez WebSocket, serwer odsyła tylko to, co się zmieniło
+      (function () {
+        var form = document.querySelector('form'), box = document.getElementById('live');
+        var out = document.getElementById('live-out'), ws = null;
+        function send(set) { if (ws && ws.readyState === 1) ws.send(JSON.stringify({set: set})); }
+        function all() {
+          var s = {};
+          form.querySelectorAll('input[name]').forEach(function (i) { s[i.name] = i.value; });
+          return s;
+        }
+        function apply(m) {
+          var k, el, errs = m.errors || {};
+          for (k in (m.values || {})) {
+            el = out.querySelector('[data-k="' + k + '"]');
+            if (el) el.textContent = m.values[k];
+          }
+          if ('purlin' in m) document.getElementById('live-purlin').style.display = m.purlin ? '' : 'none';
+          for (k in (m.svg || {})) out.querySelector('[data-svg="' + k + '"]').innerHTML = m.svg[k];
+          if (m.view_url) document.getElementById('live-view').href = m.view_url;
+          form.querySelectorAll('input[name]').forEach(function (i) {
+            i.style.borderColor = errs[i.name] ? '#c00' : '';
+            i.title = errs[i.name] || '';
+          });
+          document.getElementById('live-status').textContent = errs.calc || errs.message || '';
+        }
+        function start() {
+          ws = new WebSocket((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/ws/live');
+          ws.onopen = function () { send(all()); };
+          ws.onmessage = function (e) { apply(JSON.parse(e.data)); };
+          ws.onclose = function () { ws = null; box.checked = false; out.style.display = 'none'; };
+          out.style.display = '';
+        }
+        box.addEventListener('change', function () {
+          if (box.checked) start(); else if (ws) ws.close();
+        });
+        form.addEventListener('input', function (e) {
+          if (e.target.name) { var s = {}; s[e.target.name] = e.target.value; send(s); }
+        });
+      })();
+      </script>
     </body>
     </html>
     """
 
-@app.get("/api/calc")
+# -------------------------
+# Strony gotowe: strona główna, pola i wyniki /api/calc oraz /view dla
+# domyślnych parametrów - budowane raz (warm_up: start workera, a w
+# serve.py przed fork), trzymane jako bajty + gzip; odpowiedź to tylko
+# wybór wersji, bez renderu, serializacji i kompresji na zapytanie
+# -------------------------
+DEFAULT_KEY = roof_key(*(CALC_DEFAULTS[k] for k in CALC_FIELDS))
+GZIP_LEVEL = 9
+
+class StaticBody:
+    __slots__ = ("body", "gzip", "media_type", "etag")
+
+    def __init__(self, body, media_type, etag=None):
+        self.body = body.encode() if isinstance(body, str) else body
+        self.gzip = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+        self.media_type = media_type
+        # bez ETagu z klucza: skrót treści (strona zmienia się tylko z wdrożeniem)
+        self.etag = etag or f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+
+    def response(self, request, headers=None):
+        headers = {**cache_headers(self.etag), **(headers or {}), "Vary": "Accept-Encoding"}
+        if not_modified(request, self.etag):
+            return Response(status_code=304, headers=headers)
+        # Content-Encoding ustawione -> GZipMiddleware nie kompresuje drugi raz
+        if "gzip" in request.headers.get("accept-encoding", "") and len(self.gzip) < len(self.body):
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip, media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+_static_pages = None
+
+def static_pages():
+    global _static_pages
+    if _static_pages is None:
+        r = calc_result(DEFAULT_KEY)
+        _static_pages = {
+            "home": StaticBody(home_html(), "text/html; charset=utf-8"),
+            "calc_fields": StaticBody(orjson.dumps(calc_fields()), "application/json"),
+            "calc": StaticBody(r.json(), "application/json", etag_for("calc", DEFAULT_KEY)),
+            "calc-compact": StaticBody(r.compact_json(), "application/json", etag_for("calc-compact", DEFAULT_KEY)),
+            "view": StaticBody(view_html(DEFAULT_KEY), "text/html; charset=utf-8", etag_for("view", DEFAULT_KEY)),
+        }
+        for kind in SVG_RENDERERS:
+            svg_cached(kind, DEFAULT_KEY)
+    return _static_pages
+
+def warm_up():
+    """Strony gotowe + cache wspólny; wywołać przed fork workerów (serve.py)."""
+    shared_cache()
+    return static_pages()
+
+# modele odpowiedzi: tylko do OpenAPI/dokumentacji - endpointy zwracają gotowe
+# bajty (Response), więc FastAPI ich nie waliduje i nie przepuszcza przez
+# jsonable_encoder
+class CalcInputOut(BaseModel):
+    span_cm: float
+    angle_deg: float
+    eave_out_cm: float
+    rafter_h_cm: float
+    wallplate_w_cm: float
+    wallplate_h_cm: float
+    bearing_cm: float
+    purlin_enabled: bool
+    purlin_section_h_cm: float
+    purlin_s_from_outer_wallplate_cm: float
+    purlin_top_above_wallplate_cm: float
+
+class CalcResultsOut(BaseModel):
+    polowa_rozpietosci_cm: float
+    wysokosc_kalenicy_nad_gora_murlaty_cm: float
+    dlugosc_krokwi_po_osi_bez_okapu_cm: float
+    dlugosc_krokwi_po_osi_z_okapem_cm: float
+    kat_plumb_kalenica_deg: float
+    kat_seat_murlata_deg: float
+    murlata_siodlo_w_dol_cm: float
+    murlata_siodlo_poziomo_cm: float
+    murlata_siodlo_po_krokwi_cm: float
+
+class PurlinOut(BaseModel):
+    mode: str   # "po_krokwi" | "po_wysokosci_gory"
+    x_cm: float
+    s_cm: float
+    y_top_cm: float
+    y_bottom_cm: float
+    bottom_from_bottom_wallplate_cm: float
+    purlin_section_h_cm: float
+    notch_depth_cm: float
+    notch_horiz_cm: float
+    notch_along_rafter_cm: float
+
+class CalcOut(BaseModel):
+    input: CalcInputOut
+    results: CalcResultsOut
+    purlin: Optional[PurlinOut] = None
+
+class CalcCompactOut(BaseModel):
+    # wartości w kolejności z GET /api/calc/fields
+    input: List[Union[bool, float]]
+    results: List[float]
+    purlin: Optional[List[Union[str, float]]] = None
+
+class CalcFieldsOut(BaseModel):
+    input: List[str]
+    results: List[str]
+    purlin: List[str]
+
+@app.get("/api/calc/fields", response_model=CalcFieldsOut)
+def api_calc_fields(request: Request):
+    return static_pages()["calc_fields"].response(request)
+
+@app.get("/api/calc", response_model=Union[CalcOut, CalcCompactOut])
 def api_calc(
+    request: Request,
     span_cm: float = 1000,
     angle_deg: float = 35,
     eave_out_cm: float = 50,
@@ -436,19 +1571,837 @@ def api_calc(
     purlin_section_h_cm: float = 20,
     purlin_s_from_outer_wallplate_cm: float = 0,
     purlin_top_above_wallplate_cm: float = 0,
+
+    format: str = "full",   # "full" (jak dotąd) | "compact" (same wartości)
 ):
-    return calc_roof_cm(
+    if format not in ("full", "compact"):
+        raise HTTPException(422, "format: full albo compact")
+    key = roof_query(
         span_cm, angle_deg, eave_out_cm,
         rafter_h_cm, wallplate_w_cm, wallplate_h_cm,
         bearing_cm,
-        bool(purlin_enabled),
+        purlin_enabled,
         purlin_section_h_cm,
         purlin_s_from_outer_wallplate_cm,
         purlin_top_above_wallplate_cm,
     )
+    log_roof(request, key)
+    headers = cache_headers(etag_for("calc" if format == "full" else "calc-compact", key))
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if key == DEFAULT_KEY:
+        return static_pages()["calc" if format == "full" else "calc-compact"].response(request, headers)
+    r = calc_result(key)
+    body = r.json() if format == "full" else r.compact_json()
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# -------------------------
+# Dobór przekrojów krokwi/płatwi z katalogu (timber.py)
+# Katalog własny: DACH_TIMBER_CATALOG=plik.json ([{"class", "b_cm", "h_cm", "price_m"?}])
+# -------------------------
+TIMBER_CATALOG_PATH = os.environ.get("DACH_TIMBER_CATALOG", "")
+timber_catalog = (timber.Catalog.from_file(TIMBER_CATALOG_PATH) if TIMBER_CATALOG_PATH
+                  else timber.Catalog.default())
+
+class TimberIn(BaseModel):
+    rafter_spacing_cm: float = timber.RAFTER_SPACING_CM
+    purlin_post_spacing_cm: float = timber.PURLIN_POST_SPACING_CM
+    snow_kn_m2: float = timber.SNOW_KN_M2     # s_k na gruncie
+    dead_kn_m2: float = timber.DEAD_KN_M2     # pokrycie, na m² połaci
+    classes: Optional[List[str]] = None       # np. ["C24"]; domyślnie wszystkie
+
+TIMBER_FIELDS = ("name", "class", "b_cm", "h_cm", "price_m", "utilization_bending", "utilization_deflection")
+
+def timber_check(t):
+    unknown = set(t.classes or ()) - set(timber_catalog.classes)
+    if unknown:
+        raise HTTPException(422, f"nieznane klasy drewna: {sorted(unknown)}")
+    try:
+        timber.check_params(t.rafter_spacing_cm, t.purlin_post_spacing_cm, t.snow_kn_m2, t.dead_kn_m2)
+    except timber.TimberError as e:
+        raise HTTPException(422, str(e))
+
+def timber_pick(t, angle_deg, rafter_len_no_eave_cm, purlin_s_cm):
+    """Tablice n dachów -> {"krokiew": [dict|None], "płatew": [dict|None]}."""
+    timber_check(t)
+    picked = timber.pick_sections(
+        timber_catalog, angle_deg, rafter_len_no_eave_cm, purlin_s_cm,
+        t.rafter_spacing_cm, t.purlin_post_spacing_cm, t.snow_kn_m2, t.dead_kn_m2, t.classes)
+    n = int(np.size(angle_deg))
+    return {
+        "krokiew": timber_catalog.describe(*picked["krokiew"]),
+        "płatew": timber_catalog.describe(*picked["płatew"]) if picked["płatew"] else [None] * n,
+    }
+
+def timber_batch(out, t):
+    purlin_s = np.where(out["purlin"]["enabled"], out["purlin"]["s_cm"], np.nan)
+    return timber_pick(t, out["input"]["angle_deg"], out["results"]["dlugosc_krokwi_po_osi_bez_okapu_cm"],
+                       purlin_s)
+
+def timber_to_columns(picked):
+    return {elem: {k: [d[k] if d else None for d in items] for k in TIMBER_FIELDS}
+            for elem, items in picked.items()}
+
+@app.get("/api/timber")
+def api_timber(
+    key=Depends(roof_query),
+    rafter_spacing_cm: float = timber.RAFTER_SPACING_CM,
+    purlin_post_spacing_cm: float = timber.PURLIN_POST_SPACING_CM,
+    snow_kn_m2: float = timber.SNOW_KN_M2,
+    dead_kn_m2: float = timber.DEAD_KN_M2,
+    classes: str = "",   # po przecinku
+):
+    t = TimberIn(rafter_spacing_cm=rafter_spacing_cm, purlin_post_spacing_cm=purlin_post_spacing_cm,
+                 snow_kn_m2=snow_kn_m2, dead_kn_m2=dead_kn_m2,
+                 classes=[c.strip() for c in classes.split(",") if c.strip()] or None)
+    data = calc_cached(key)
+    p = data["purlin"]
+    picked = timber_pick(t, [data["input"]["angle_deg"]], [data["results"]["dlugosc_krokwi_po_osi_bez_okapu_cm"]],
+                         [p["s_cm"] if p else np.nan])
+    return FastJSONResponse({
+        "input": roof_params(key),
+        "obciazenia": t.model_dump(),
+        "krokiew": picked["krokiew"][0],
+        "płatew": picked["płatew"][0],
+    })
+
+class CalcBatchIn(BaseModel):
+    # albo lista dachów (jak parametry /api/calc), albo kolumny (pole -> lista/skalar)
+    roofs: Optional[List[Dict[str, float]]] = None
+    columns: Optional[Dict[str, Union[List[float], float]]] = None
+    format: str = "rows"   # "rows" | "columns" | "compact"
+    timber: Optional[TimberIn] = None   # + dobór przekrojów ("przekroje" w wyniku)
+
+def batch_check(body):
+    if body.format not in ("rows", "columns", "compact"):
+        raise HTTPException(422, "format: rows, columns albo compact")
+    if body.timber:
+        timber_check(body.timber)
+
+def batch_payload(body, out):
+    """Wynik calc_roof_cm_batch w formacie z body (+ przekroje, jeśli zamówione)."""
+    picked = timber_batch(out, body.timber) if body.timber else None
+    if body.format == "rows":
+        data = batch_to_rows(out)
+        if picked:
+            for row, r, p in zip(data, picked["krokiew"], picked["płatew"]):
+                row["przekroje"] = {"krokiew": r, "płatew": p}
+        return data
+    data = batch_to_columns(out) if body.format == "columns" else batch_to_compact(out)
+    if picked:
+        data["przekroje"] = timber_to_columns(picked)
+    return data
+
+@app.post("/api/calc/batch")
+def api_calc_batch(body: CalcBatchIn):
+    batch_check(body)
+    out = calc_roof_cm_batch(batch_columns(body.roofs, body.columns))
+    # odpowiedź bezpośrednio: same listy floatów, jsonable_encoder niepotrzebny
+    return FastJSONResponse(batch_payload(body, out))
+
+class SweepRange(BaseModel):
+    start: float
+    stop: float      # włącznie
+    step: float = 1.0
+
+class SweepIn(BaseModel):
+    angle_deg: Optional[SweepRange] = None
+    span_cm: Optional[SweepRange] = None
+    eave_out_cm: Optional[SweepRange] = None
+    purlin_top_above_wallplate_cm: Optional[SweepRange] = None
+    # pozostałe parametry (jak w /api/calc); osie bez zakresu też biorą wartość stąd
+    base: Dict[str, float] = {}
+    # filtry po stronie serwera
+    max_ridge_height_cm: Optional[float] = None
+    max_rafter_len_cm: Optional[float] = None    # np. długość handlowa krokwi
+    format: str = "ndjson"   # "ndjson" | "csv"
+
+def sweep_prepare(body):
+    """Walidacja SweepIn -> (osie, parametry bazowe, liczba punktów)."""
+    if body.format not in ("ndjson", "csv"):
+        raise HTTPException(422, "format: ndjson albo csv")
+    unknown = set(body.base) - set(CALC_FIELDS)
+    if unknown:
+        raise HTTPException(422, f"nieznane pola: {sorted(unknown)}")
+    base = {**CALC_DEFAULTS, **body.base}
+
+    ranges = {k: getattr(body, k) for k in SWEEP_AXES if getattr(body, k) is not None}
+    if not ranges:
+        raise HTTPException(422, f"podaj zakres dla co najmniej jednej osi: {', '.join(SWEEP_AXES)}")
+    counts = {k: sweep_axis_len(r.start, r.stop, r.step) for k, r in ranges.items()}
+
+    # walidacja rozmiaru (int Pythona, bez przepełnienia) zanim powstanie
+    # jakakolwiek tablica osi i ruszy strumień
+    total = math.prod(counts.values())
+    if total > SWEEP_MAX_POINTS:
+        raise HTTPException(413, f"maksymalnie {SWEEP_MAX_POINTS} punktów siatki")
+    axes = {k: sweep_axis(r.start, r.step, counts[k]) for k, r in ranges.items()}
+    return axes, base, total
+
+@app.post("/api/calc/sweep")
+def api_calc_sweep(body: SweepIn):
+    axes, base, total = sweep_prepare(body)
+    chunks = sweep_chunks(axes, base, body.max_ridge_height_cm, body.max_rafter_len_cm)
+    headers = {"X-Sweep-Points": str(total)}
+    if body.format == "csv":
+        header = sweep_header(base["purlin_enabled"] != 0)
+        return StreamingResponse(sweep_csv(chunks, header), media_type="text/csv", headers=headers)
+    return StreamingResponse(sweep_ndjson(chunks), media_type="application/x-ndjson", headers=headers)
+
+# -------------------------
+# Zadanie odwrotne: kąt z zadanej wysokości kalenicy / długości krokwi itp. (inverse.py)
+# -------------------------
+INVERSE_TARGETS = inverse.target_keys(CALC_RESULT_FIELDS, PURLIN_FIELDS)
+INVERSE_FORMATS = {"rows": batch_to_rows, "columns": batch_to_columns, "compact": batch_to_compact}
+
+class InverseIn(BaseModel):
+    # stałe wejścia jak w /api/calc/batch (angle_deg pomijany); bez nich: domyślne
+    roofs: Optional[List[Dict[str, float]]] = None
+    columns: Optional[Dict[str, Union[List[float], float]]] = None
+    target: str                          # klucz "results" albo "purlin_<pole>"
+    values: Union[List[float], float]    # zadane wartości (lista na dach albo jedna dla wszystkich)
+    purlin_s_cm: Optional[Union[List[Optional[float]], float]] = None   # płatew w tym miejscu po krokwi
+    angle_min_deg: float = 0.0
+    angle_max_deg: float = 90.0
+    method: str = "auto"                 # "auto" | "numeric" (wymuś Newtona)
+    format: Optional[str] = None         # + pełne wyniki: "rows" | "columns" | "compact"
+
+def inverse_columns(body):
+    """Kolumny wejść + zadane wartości (+ płatew) rozciągnięte do wspólnej długości n."""
+    if body.target not in INVERSE_TARGETS:
+        raise HTTPException(422, f"target: jedno z {list(INVERSE_TARGETS)}")
+    if body.format is not None and body.format not in INVERSE_FORMATS:
+        raise HTTPException(422, "format: rows, columns albo compact")
+    columns = body.columns if body.roofs is not None or body.columns is not None else {}
+    cols = batch_columns(body.roofs, columns)
+    values = np.asarray(body.values, dtype=np.float64)
+    purlin_s = None
+    if body.purlin_s_cm is not None:
+        s = body.purlin_s_cm
+        purlin_s = np.asarray([np.nan if v is None else v for v in s] if isinstance(s, list) else s,
+                              dtype=np.float64)
+    n = max(len(cols["span_cm"]), values.size, 1 if purlin_s is None else purlin_s.size)
+    if n > BATCH_MAX_ROOFS:
+        raise HTTPException(413, f"maksymalnie {BATCH_MAX_ROOFS} dachów na zapytanie")
+    try:
+        cols = {k: np.broadcast_to(v, (n,)) for k, v in cols.items()}
+        values = np.broadcast_to(values, (n,))
+        if purlin_s is not None:
+            purlin_s = np.broadcast_to(purlin_s, (n,))
+    except ValueError:
+        raise HTTPException(422, "values/purlin_s_cm: inna długość niż liczba dachów")
+    return cols, values, purlin_s
+
+def inverse_solve(body):
+    cols, values, purlin_s = inverse_columns(body)
+    try:
+        sol = inverse.solve(calc_roof_cm_batch, cols, body.target, values, purlin_s,
+                            body.angle_min_deg, body.angle_max_deg, body.method)
+    except inverse.InverseError as e:
+        raise HTTPException(422, str(e))
+    status = sol["status"]
+    warned = [(k, m.tolist()) for k, m in sol["warnings"].items()]
+    data = {
+        "n": int(values.shape[0]),
+        "target": body.target,
+        "method": sol["method"],
+        "iterations": sol["iterations"],
+        # NaN (brak rozwiązania) -> null
+        "angle_deg": sol["angle_deg"].tolist(),
+        "purlin_top_above_wallplate_cm": np.where(
+            sol["out"]["purlin"]["enabled"], sol["purlin_top_above_wallplate_cm"], None).tolist(),
+        "achieved": sol["achieved"].tolist(),
+        "feasible": (status == 0).tolist(),
+        "status": np.asarray(inverse.STATUSES, dtype=object)[status].tolist(),
+        # clampy, które zadziałały poza celem (wynik celu dokładny): lista nazw na wiersz
+        "ostrzezenia": [[k for k, m in warned if m[i]] for i in range(status.shape[0])],
+    }
+    if body.format:
+        data["wyniki"] = INVERSE_FORMATS[body.format](sol["out"])
+    return data
+
+@app.post("/api/calc/inverse")
+def api_calc_inverse(body: InverseIn):
+    return FastJSONResponse(inverse_solve(body))
+
+def parse_stock_lengths(s):
+    try:
+        stocks = [float(v) for v in s.split(",") if v.strip()]
+    except ValueError:
+        raise HTTPException(422, "stock_lengths_cm: lista liczb oddzielonych przecinkami")
+    if not stocks or min(stocks) <= 0:
+        raise HTTPException(422, "stock_lengths_cm: wymagane długości > 0")
+    return stocks
+
+def run_cut_list(pieces, stocks, kerf_cm):
+    try:
+        return cutlist.cut_list(pieces, stocks, kerf_cm)
+    except cutlist.CutListError as e:
+        raise HTTPException(422, str(e))
+
+@app.get("/api/cutlist")
+def api_cutlist(
+    building_length_cm: float = 1200,
+    rafter_spacing_cm: float = 80,
+    purlin_overhang_cm: float = 0,
+    allowance_cm: float = 0,
+    stock_lengths_cm: str = ",".join(f"{s:g}" for s in cutlist.STOCK_LENGTHS_CM),
+    kerf_cm: float = cutlist.KERF_CM,
+    key: tuple = Depends(roof_query),
+):
+    try:
+        pieces = cutlist.building_pieces(
+            calc_cached(key), building_length_cm, rafter_spacing_cm, purlin_overhang_cm, allowance_cm)
+    except cutlist.CutListError as e:
+        raise HTTPException(422, str(e))
+    out = run_cut_list(pieces, parse_stock_lengths(stock_lengths_cm), kerf_cm)
+    out["pieces"] = [{"name": n, "length_cm": l, "count": c, "splittable": s} for n, l, c, s in pieces]
+    return FastJSONResponse(out)
+
+class CutListBuilding(BaseModel):
+    roof: Dict[str, float] = {}   # parametry jak /api/calc
+    building_length_cm: float
+    rafter_spacing_cm: float = 80
+    purlin_overhang_cm: float = 0
+    count: int = 1                # ile takich samych budynków
+
+class CutListIn(BaseModel):
+    buildings: List[CutListBuilding]
+    stock_lengths_cm: List[float] = list(cutlist.STOCK_LENGTHS_CM)
+    kerf_cm: float = cutlist.KERF_CM
+    allowance_cm: float = 0
+
+def cutlist_pieces(body):
+    """Walidacja CutListIn + elementy wszystkich budynków razem (bez pakowania).
+
+    Sprawdza też to, co wyszłoby dopiero przy pakowaniu (za długie elementy),
+    więc zadanie w tle może zwrócić 422 od razu.
+    """
+    if not body.stock_lengths_cm or min(body.stock_lengths_cm) <= 0:
+        raise HTTPException(422, "stock_lengths_cm: wymagane długości > 0")
+    cols = batch_columns(roofs=[b.roof for b in body.buildings])
+    keys = batch_keys(cols)
+
+    totals = {}
+    for b, key in zip(body.buildings, keys):
+        try:
+            pieces = cutlist.building_pieces(
+                calc_cached(key), b.building_length_cm, b.rafter_spacing_cm,
+                b.purlin_overhang_cm, body.allowance_cm)
+        except cutlist.CutListError as e:
+            raise HTTPException(422, str(e))
+        for name, length, count, splittable in pieces:
+            k = (name, length, splittable)
+            totals[k] = totals.get(k, 0) + count * b.count
+    pieces = [(n, l, c, s) for (n, l, s), c in totals.items()]
+    try:
+        cutlist.check_pieces(cutlist.split_long(pieces, max(body.stock_lengths_cm)), body.stock_lengths_cm)
+    except cutlist.CutListError as e:
+        raise HTTPException(422, str(e))
+    return pieces
+
+def cutlist_project(body, pieces=None):
+    """Rozkrój dla całego osiedla: elementy wszystkich budynków razem."""
+    if pieces is None:
+        pieces = cutlist_pieces(body)
+    out = run_cut_list(pieces, body.stock_lengths_cm, body.kerf_cm)
+    out["pieces"] = [{"name": n, "length_cm": l, "count": c, "splittable": s} for n, l, c, s in pieces]
+    return out
+
+@app.post("/api/cutlist")
+def api_cutlist_project(body: CutListIn):
+    return FastJSONResponse(cutlist_project(body))
+
+# -------------------------
+# Zestawienie materiałów dla projektu (takeoff.py): porcje budynków przez
+# calc_roof_cm_batch, wiersze budynków od razu do odpowiedzi, sumy na końcu
+# -------------------------
+TAKEOFF_CHUNK = 256
+TAKEOFF_FORMATS = ("ndjson", "json")
+
+class TakeoffBuilding(BaseModel):
+    id: Optional[str] = None
+    roof: Dict[str, float] = {}   # parametry jak /api/calc
+    building_length_cm: float
+    rafter_spacing_cm: float = 80
+    gable_overhang_cm: float = 0  # okap na szczytach (łaty, powierzchnia)
+    purlin_overhang_cm: float = 0
+    count: int = 1                # ile takich samych budynków
+
+class TakeoffIn(BaseModel):
+    buildings: List[TakeoffBuilding]
+    params: Dict[str, float] = {}   # takeoff.DEFAULTS: przekroje, rozstaw łat, membrana, łączniki
+    format: str = "ndjson"          # "ndjson": wiersz na budynek + {"razem": ...}; "json": jeden dokument
+
+def takeoff_check(body):
+    """Walidacja przed startem strumienia (potem nie da się już zwrócić 422)."""
+    if body.format not in TAKEOFF_FORMATS:
+        raise HTTPException(422, "format: ndjson albo json")
+    if len(body.buildings) > BATCH_MAX_ROOFS:
+        raise HTTPException(413, f"maksymalnie {BATCH_MAX_ROOFS} budynków na zapytanie")
+    try:
+        params = takeoff.check_params(body.params)
+        for b in body.buildings:
+            takeoff.check_building(b.building_length_cm, b.rafter_spacing_cm, b.count,
+                                   b.gable_overhang_cm, b.purlin_overhang_cm)
+    except takeoff.TakeoffError as e:
+        raise HTTPException(422, str(e))
+    for b in body.buildings:
+        unknown = set(b.roof) - set(CALC_FIELDS)
+        if unknown:
+            raise HTTPException(422, f"nieznane pola: {sorted(unknown)}")
+        if not all(math.isfinite(v) for v in b.roof.values()):
+            raise HTTPException(422, "roof: wartości muszą być skończone")
+    if body.buildings:
+        # liczenie wektorowe jest tanie: geometria całego projektu sprawdzona od razu
+        try:
+            takeoff.check_roofs(calc_roof_cm_batch(batch_columns(roofs=[b.roof for b in body.buildings])))
+        except takeoff.TakeoffError as e:
+            raise HTTPException(422, str(e))
+    return params
+
+def takeoff_chunks(body, params, chunk=TAKEOFF_CHUNK, progress=None):
+    """Generator (wiersze budynków porcji, None) ... i na końcu (None, sumy)."""
+    totals = takeoff.Totals(params)
+    n = len(body.buildings)
+    for lo in range(0, n, chunk):
+        part = body.buildings[lo:lo + chunk]
+        out = calc_roof_cm_batch(batch_columns(roofs=[b.roof for b in part]))
+
+        def col(name):
+            return np.array([getattr(b, name) for b in part], dtype=np.float64)
+        count = col("count")
+        q, timber = takeoff.quantities(
+            out, col("building_length_cm"), col("rafter_spacing_cm"), count,
+            col("gable_overhang_cm"), col("purlin_overhang_cm"), params)
+        totals.add(q, timber, count)
+        rows = takeoff.building_rows(q, timber)
+        for i, (b, row) in enumerate(zip(part, rows)):
+            row["budynek"] = lo + i
+            row["id"] = b.id
+            row["count"] = b.count
+        if progress is not None:
+            progress((lo + len(part)) / n)
+        yield rows, None
+    yield None, totals.result()
+
+def takeoff_ndjson(chunks):
+    for rows, total in chunks:
+        if rows is not None:
+            yield b"".join(orjson.dumps(r) + b"\n" for r in rows)
+        else:
+            yield orjson.dumps({"razem": total}) + b"\n"
+
+def takeoff_json(chunks):
+    """Jeden dokument {"budynki": [...], "razem": {...}} składany porcjami."""
+    yield b'{"budynki":['
+    first = True
+    for rows, total in chunks:
+        if rows is not None:
+            if rows:
+                yield (b"" if first else b",") + b",".join(orjson.dumps(r) for r in rows)
+                first = False
+        else:
+            yield b'],"razem":' + orjson.dumps(total) + b"}"
+
+TAKEOFF_WRITERS = {
+    "ndjson": (takeoff_ndjson, "application/x-ndjson"),
+    "json": (takeoff_json, "application/json"),
+}
+
+@app.post("/api/takeoff")
+def api_takeoff(body: TakeoffIn):
+    params = takeoff_check(body)
+    writer, media_type = TAKEOFF_WRITERS[body.format]
+    return StreamingResponse(writer(takeoff_chunks(body, params)), media_type=media_type)
+
+# -------------------------
+# Dachy wielopołaciowe: kopertowy, dwuspadowy o różnych spadkach, skrzydło
+# z koszami (roofplanes.py) - połacie, linie przecięć, pełne zestawienie krokwi
+# -------------------------
+ROOF_PLANES_MAX_RAFTERS = 100_000
+ROOF_PLANES_RAFTER_COLUMNS = (
+    ("polac", "plane"), ("element", "kind"), ("s_cm", "s"), ("bieg_cm", "run"),
+    ("dlugosc_cm", "length"), ("dlugosc_z_okapem_cm", "length_with_eave"),
+    ("plumb_deg", "plumb"), ("seat_deg", "seat"),
+    ("ciecie_boczne_dol_deg", "bevel_bottom"), ("ciecie_boczne_gora_deg", "bevel_top"),
+)
+
+class RoofWingIn(BaseModel):
+    offset_cm: float          # od lewego narożnika wzdłuż okapu przedniego
+    width_cm: float
+    length_cm: float          # wysunięcie przed okap przedni
+    pitch_deg: float
+
+class RoofPlanesIn(BaseModel):
+    type: str = "kopertowy"   # "dwuspadowy" | "kopertowy"
+    span_cm: float = CALC_DEFAULTS["span_cm"]
+    length_cm: float = 1200
+    pitch_front_deg: float = CALC_DEFAULTS["angle_deg"]
+    pitch_back_deg: Optional[float] = None     # brak = jak przód
+    pitch_left_deg: Optional[float] = None     # tylko kopertowy
+    pitch_right_deg: Optional[float] = None
+    wing: Optional[RoofWingIn] = None
+    eave_out_cm: float = CALC_DEFAULTS["eave_out_cm"]
+    rafter_spacing_cm: float = 80
+    rafters: bool = True      # false: tylko połacie, linie i zestawienie
+
+def roof_planes(body):
+    if body.type not in roofplanes.ROOF_TYPES:
+        raise HTTPException(422, f"type: jedno z {list(roofplanes.ROOF_TYPES)}")
+    pitches = {"pitch_back_deg": body.pitch_back_deg}
+    if body.type == "kopertowy":
+        pitches.update(pitch_left_deg=body.pitch_left_deg, pitch_right_deg=body.pitch_right_deg)
+    elif body.pitch_left_deg is not None or body.pitch_right_deg is not None:
+        raise HTTPException(422, "pitch_left_deg/pitch_right_deg tylko dla dachu kopertowego")
+    try:
+        roof = roofplanes.ROOF_TYPES[body.type](
+            body.span_cm, body.length_cm, body.pitch_front_deg,
+            wing=body.wing.model_dump() if body.wing else None, **pitches)
+        if body.rafter_spacing_cm > 0 and \
+                roof.rafter_count(body.rafter_spacing_cm) > ROOF_PLANES_MAX_RAFTERS:
+            raise HTTPException(413, f"maksymalnie {ROOF_PLANES_MAX_RAFTERS} krokwi na zapytanie")
+        r = roof.rafters(body.rafter_spacing_cm, body.eave_out_cm)
+    except roofplanes.GeometryError as e:
+        raise HTTPException(422, str(e))
+    data = {
+        "typ": roof.kind,
+        "wysokosc_kalenicy_nad_gora_murlaty_cm": roof.ridge_height_cm,
+        "polacie": roof.plane_info(),
+        "linie": roof.line_info(body.eave_out_cm),
+        "zestawienie": roofplanes.rafter_schedule(r),
+        "liczba_krokwi": int(r["s"].size),
+    }
+    if body.rafters:
+        # kolumnowo (jak /api/calc/batch format=columns); seat NaN (kulawka koszowa) -> null
+        data["krokwie"] = {
+            name: np.where(np.isnan(r[col]), None, r[col]).tolist() if r[col].dtype != object else r[col].tolist()
+            for name, col in ROOF_PLANES_RAFTER_COLUMNS
+        }
+    return data
+
+@app.post("/api/roof/planes")
+def api_roof_planes(body: RoofPlanesIn):
+    return FastJSONResponse(roof_planes(body))
+
+# -------------------------
+# Projekty: zapisane dachy klientów (projects.py, SQLite)
+# DACH_PROJECTS_DB=<ścieżka>; jeden plik dla wszystkich workerów
+# -------------------------
+PROJECTS_DB = os.environ.get("DACH_PROJECTS_DB", "projects.sqlite3")
+
+_project_store = None
+
+def project_store():
+    global _project_store
+    if _project_store is None:
+        _project_store = projects.ProjectStore(PROJECTS_DB)
+        shutdown_hooks.append(_project_store.close)
+    return _project_store
+
+class ProjectIn(BaseModel):
+    name: str
+    client: str = ""
+    site: str = ""                # budowa / adres
+    tags: List[str] = []
+    roof: Dict[str, float] = {}   # parametry jak /api/calc; brakujące = domyślne
+
+class ProjectPatch(BaseModel):
+    name: Optional[str] = None
+    client: Optional[str] = None
+    site: Optional[str] = None
+    tags: Optional[List[str]] = None
+    roof: Optional[Dict[str, float]] = None   # całe wejście (brakujące = domyślne)
+
+def project_key(roof):
+    return batch_keys(batch_columns(roofs=[roof]))[0]
+
+def project_name(name):
+    name = name.strip()
+    if not name:
+        raise HTTPException(422, "name: wymagana nazwa projektu")
+    return name
+
+def project_result(project_id):
+    """(klucz, gotowy JSON wyniku) z bazy; przeliczany tylko po zmianie wzorów."""
+    store = project_store()
+    row = store.result(project_id)
+    if row is None:
+        raise HTTPException(404, "nie ma takiego projektu")
+    key, version, body = row
+    if version != CACHE_VERSION:
+        body = calc_result(key).json()
+        store.store_result(project_id, key, CACHE_VERSION, body)
+    return key, body
+
+def project_response(project_id):
+    item = project_store().get(project_id)
+    if item is None:
+        raise HTTPException(404, "nie ma takiego projektu")
+    _, body = project_result(project_id)
+    # wynik wklejony jako gotowe bajty, bez dekodowania
+    return Response(orjson.dumps(item)[:-1] + b',"calc":' + body + b"}", media_type="application/json")
+
+@app.post("/api/projects")
+def api_projects_create(body: ProjectIn):
+    key = project_key(body.roof)
+    try:
+        project_id = project_store().create(
+            project_name(body.name), body.client.strip(), body.site.strip(), body.tags,
+            roof_params(key), key, CACHE_VERSION, calc_result(key).json())
+    except projects.ProjectError as e:
+        raise HTTPException(422, str(e))
+    return project_response(project_id)
+
+@app.get("/api/projects")
+def api_projects_list(
+    client: Optional[str] = None,
+    site: Optional[str] = None,
+    tag: Optional[str] = None,
+    q: str = "",            # początek nazwy
+    limit: int = 50,
+    cursor: str = "",       # next_cursor z poprzedniej strony
+):
+    try:
+        items, nxt = project_store().list(client, site, tag, q.strip(), limit, cursor or None)
+    except projects.ProjectError as e:
+        raise HTTPException(422, str(e))
+    return FastJSONResponse({"items": items, "next_cursor": nxt})
+
+@app.get("/api/projects/{project_id}")
+def api_projects_get(project_id: int):
+    return project_response(project_id)
+
+@app.get("/api/projects/{project_id}/calc", response_model=CalcOut)
+def api_projects_calc(project_id: int, request: Request):
+    key, body = project_result(project_id)
+    # ten sam ETag co /api/calc dla tych parametrów
+    headers = cache_headers(etag_for("calc", key))
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.put("/api/projects/{project_id}")
+def api_projects_update(project_id: int, body: ProjectPatch):
+    fields = body.model_dump(exclude_unset=True, exclude_none=True)
+    roof = fields.pop("roof", None)
+    if "name" in fields:
+        fields["name"] = project_name(fields["name"])
+    for k in ("client", "site"):
+        if k in fields:
+            fields[k] = fields[k].strip()
+    compute = None
+    if roof is not None:
+        key = project_key(roof)
+        fields["inputs"] = roof_params(key)
+
+        def compute(old_key, old_version):
+            if old_key == key and old_version == CACHE_VERSION:
+                return None   # te same wejścia: zostaje zapisany wynik
+            return key, CACHE_VERSION, calc_result(key).json()
+    try:
+        found = project_store().update(project_id, compute, **fields)
+    except projects.ProjectError as e:
+        raise HTTPException(422, str(e))
+    if not found:
+        raise HTTPException(404, "nie ma takiego projektu")
+    return project_response(project_id)
+
+@app.delete("/api/projects/{project_id}")
+def api_projects_delete(project_id: int):
+    if not project_store().delete(project_id):
+        raise HTTPException(404, "nie ma takiego projektu")
+    return {"deleted": project_id}
+
+@app.get("/api/cache/stats")
+def api_cache_stats():
+    out = {c.name: c.stats() for c in (result_cache, render_cache)}
+    if shared_cache() is not None:
+        out["shared"] = shared_cache().stats()
+    return out
+
+@metrics.REGISTRY.collector
+def cache_metrics():
+    caches = (result_cache, render_cache)
+    stats = [(c.name, c.stats()) for c in caches]
+    out = [
+        (f"dach_cache_{field}_total", "counter", f"Cache: {field}",
+         [({"cache": name}, s[field]) for name, s in stats])
+        for field in ("hits", "misses", "expired", "evictions")
+    ]
+    out.append(("dach_cache_size", "gauge", "Cache: liczba wpisów",
+                [({"cache": name}, s["size"]) for name, s in stats]))
+    if _shared_cache is not None:
+        s = _shared_cache.stats()
+        out += [(f"dach_shared_cache_{field}_total", "counter", f"Cache wspólny (ten worker): {field}",
+                 [({}, s[field])]) for field in ("hits", "misses", "sets", "too_big")]
+        out.append(("dach_shared_cache_size", "gauge", "Cache wspólny: liczba wpisów (wszystkie workery)",
+                    [({}, s["size"])]))
+    if _job_runner is not None:
+        js = _job_runner.stats()
+        out.append(("dach_jobs_pending", "gauge", "Zadania w kolejce lub w toku", [({}, js["pending"])]))
+    return out
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile/{profile_id}")
+def debug_profile(profile_id: str):
+    # collapsed stacks (flamegraph.pl / speedscope); id z nagłówka X-Profile-Id
+    text = profiler.get(profile_id)
+    if text is None:
+        raise HTTPException(404, "nie ma takiego profilu")
+    return PlainTextResponse(text)
+
+@app.get("/svg/{kind}/{digest}.svg")
+def svg_file(kind: str, digest: str, request: Request, key: tuple = Depends(roof_query)):
+    if kind not in SVG_RENDERERS:
+        raise HTTPException(404, "nieznany rysunek")
+    # skrót musi pasować do parametrów, inaczej URL nie byłby niezmienny
+    if digest != svg_digest(kind, key):
+        raise HTTPException(404, "skrót nie pasuje do parametrów")
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": SVG_CACHE_CONTROL}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(svg_cached(kind, key), media_type="image/svg+xml", headers=headers)
+
+@app.get("/pdf")
+async def pdf(request: Request, key: tuple = Depends(roof_query)):
+    headers = cache_headers(etag_for("pdf", key))
+    headers["Content-Disposition"] = 'inline; filename="karta_ciec.pdf"'
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    body = render_cache.get(("pdf", key))
+    if body is None:
+        body = shared_get(render_cache, ("pdf", key))
+        if body is None:
+            with STAGE_SECONDS.time("pdf_render"):
+                page = await asyncio.to_thread(sheet_page, key)
+                body = await run_in_pdf_pool(pdfsheet.render_pdf, [page])
+            shared_set(render_cache, ("pdf", key), body)
+        render_cache.set(("pdf", key), body)
+    return Response(body, media_type="application/pdf", headers=headers)
+
+class PdfBatchIn(BaseModel):
+    roofs: List[Dict[str, float]]   # jak parametry /api/calc; brakujące = domyślne
+
+def pdf_batch_keys(body):
+    if len(body.roofs) > PDF_BATCH_MAX_ROOFS:
+        raise HTTPException(413, f"maksymalnie {PDF_BATCH_MAX_ROOFS} dachów na dokument")
+    cols = batch_columns(roofs=body.roofs)
+    return batch_keys(cols)
+
+@app.post("/pdf/batch")
+async def pdf_batch(body: PdfBatchIn):
+    keys = pdf_batch_keys(body)
+
+    # do procesu roboczego idą same klucze: strony (obliczenia + rysunki)
+    # powstają tam, dokument do pliku tymczasowego (reportlab trzyma go
+    # w pamięci procesu roboczego do save()), a proces web tylko
+    # strumieniuje gotowy plik do klienta
+    fd, path = tempfile.mkstemp(prefix="dach_", suffix=".pdf")
+    os.close(fd)
+    try:
+        await run_in_pdf_pool(pdf_batch_to_file, keys, path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return TempFileResponse(
+        path,
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="karty_ciec.pdf"'},
+    )
+
+# -------------------------
+# DXF dla CNC (dxf.py): profil krokwi albo wszystkie krokwie budynku,
+# generowany strumieniowo prosto do odpowiedzi
+# -------------------------
+DXF_MAX_RAFTERS = 20_000
+
+def dxf_response(request, key, names, filename):
+    headers = cache_headers(etag_for(f"dxf:{len(names)}", key))
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(dxf.rafters_dxf(calc_cached(key), names), media_type="application/dxf",
+                             headers=headers)
+
+@app.get("/dxf")
+def dxf_rafter(request: Request, key: tuple = Depends(roof_query)):
+    return dxf_response(request, key, ["K1"], "krokiew.dxf")
+
+@app.get("/dxf/building")
+def dxf_building(
+    request: Request,
+    building_length_cm: float = 1200,
+    rafter_spacing_cm: float = 80,
+    key: tuple = Depends(roof_query),
+):
+    if building_length_cm <= 0 or rafter_spacing_cm <= 0:
+        raise HTTPException(422, "długość budynku i rozstaw krokwi muszą być > 0")
+    per_slope = cutlist.rafters_per_slope(building_length_cm, rafter_spacing_cm)
+    if 2 * per_slope > DXF_MAX_RAFTERS:
+        raise HTTPException(413, f"maksymalnie {DXF_MAX_RAFTERS} krokwi w pliku")
+    return dxf_response(request, key, dxf.building_rafter_names(per_slope), "krokwie_budynek.dxf")
+
+# rodzaj -> (model parametrów, funkcja: parametry -> task)
+JOB_KINDS = {
+    "calc_batch": (CalcBatchIn, job_calc_batch),
+    "sweep": (SweepIn, job_sweep),
+    "pdf_batch": (PdfBatchIn, job_pdf_batch),
+    "cutlist": (CutListIn, job_cutlist),
+    "takeoff": (TakeoffIn, job_takeoff),
+}
+
+class JobIn(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+@app.post("/jobs", status_code=202)
+def jobs_submit(body: JobIn):
+    if body.kind not in JOB_KINDS:
+        raise HTTPException(422, f"kind: jedno z {sorted(JOB_KINDS)}")
+    model, make_task = JOB_KINDS[body.kind]
+    try:
+        params = model(**body.params)
+    except ValidationError as e:
+        raise HTTPException(422, e.errors(include_url=False, include_context=False))
+    task = make_task(params)
+    try:
+        job_id = job_runner().submit(body.kind, task)
+    except jobs.JobQueueFull as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": "10"})
+    return job_status(job_runner().get(job_id))
+
+@app.get("/jobs/stats")
+def jobs_stats():
+    return job_runner().stats()
+
+@app.get("/jobs/{job_id}")
+def jobs_get(job_id: str):
+    job = job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(404, "nie ma takiego zadania (lub wygasło)")
+    return job_status(job)
+
+@app.get("/jobs/{job_id}/result")
+def jobs_result(job_id: str):
+    job = job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(404, "nie ma takiego zadania (lub wygasło)")
+    if job["status"] != "done":
+        raise HTTPException(409, f"zadanie nie jest gotowe ({job['status']})")
+    if not os.path.exists(job["result_path"]):
+        raise HTTPException(404, "plik wyniku już usunięty")
+    return FileResponse(job["result_path"], media_type=job["media_type"],
+                        filename=os.path.basename(job["result_path"]))
 
 @app.get("/view", response_class=HTMLResponse)
 def view(
+    request: Request,
     span_cm: float = 1000,
     angle_deg: float = 35,
     eave_out_cm: float = 50,
@@ -464,21 +2417,51 @@ def view(
     purlin_s_from_outer_wallplate_cm: float = 0,
     purlin_top_above_wallplate_cm: float = 0,
 ):
-    data = calc_roof_cm(
+    key = roof_query(
         span_cm, angle_deg, eave_out_cm,
         rafter_h_cm, wallplate_w_cm, wallplate_h_cm,
         bearing_cm,
-        bool(purlin_enabled),
+        purlin_enabled,
         purlin_section_h_cm,
         purlin_s_from_outer_wallplate_cm,
         purlin_top_above_wallplate_cm,
     )
-
+    log_roof(request, key)
+    headers = cache_headers(etag_for("view", key))
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if key == DEFAULT_KEY:
+        return static_pages()["view"].response(request, headers)
+    return HTMLResponse(view_html(key), headers=headers)
+
+def view_html(key):
+    def compute():
+        data = calc_cached(key)
+        with STAGE_SECONDS.time("view_html"):
+            return render_view(key, data)
+    return cached(render_cache, ("view", key), compute, str.encode, bytes.decode)
+
+def render_view(key, data):
+    inp = data["input"]
     res = data["results"]
     p = data["purlin"]
 
-    svg1 = svg_roof_main(data)
-    svg2 = svg_detail_notches(data)
+    # wartości znormalizowane (z klucza cache), nie surowe z zapytania
+    span_cm = inp["span_cm"]
+    angle_deg = inp["angle_deg"]
+    eave_out_cm = inp["eave_out_cm"]
+    rafter_h_cm = inp["rafter_h_cm"]
+    wallplate_w_cm = inp["wallplate_w_cm"]
+    wallplate_h_cm = inp["wallplate_h_cm"]
+    bearing_cm = inp["bearing_cm"]
+    purlin_enabled = int(inp["purlin_enabled"])
+    purlin_section_h_cm = inp["purlin_section_h_cm"]
+    purlin_s_from_outer_wallplate_cm = inp["purlin_s_from_outer_wallplate_cm"]
+    purlin_top_above_wallplate_cm = inp["purlin_top_above_wallplate_cm"]
+
+    # rysunki jako osobne, adresowane treścią pliki (cache przeglądarki/CDN)
+    svg1 = f'<img src="{svg_url("roof", key)}" width="980" height="460" alt="Rysunek 1"/>'
+    svg2 = f'<img src="{svg_url("notches", key)}" width="980" height="460" alt="Rysunek 2"/>'
 
     purlin_html = ""
     if p:
@@ -517,6 +2500,7 @@ def view(
         td{{padding:10px;border-bottom:1px solid #f0f0f0;vertical-align:top}}
         .muted{{color:#666;font-size:13px;line-height:1.35}}
         a{{color:#111}}
+        img{{max-width:100%;height:auto}}
         .btn{{display:inline-block;padding:10px 14px;border-radius:12px;background:#111;color:#fff;text-decoration:none;font-weight:700}}
       </style>
     </head>
@@ -565,6 +2549,8 @@ def view(
           <h3>API (JSON)</h3>
           <div class="muted">Te same dane w JSON:</div>
           <div><a href="/api/calc?span_cm={span_cm}&angle_deg={angle_deg}&eave_out_cm={eave_out_cm}&rafter_h_cm={rafter_h_cm}&wallplate_w_cm={wallplate_w_cm}&wallplate_h_cm={wallplate_h_cm}&bearing_cm={bearing_cm}&purlin_enabled={purlin_enabled}&purlin_section_h_cm={purlin_section_h_cm}&purlin_s_from_outer_wallplate_cm={purlin_s_from_outer_wallplate_cm}&purlin_top_above_wallplate_cm={purlin_top_above_wallplate_cm}">/api/calc (link)</a></div>
+          <div class="muted">Profil krokwi dla CNC (DXF, mm):</div>
+          <div><a href="/dxf?{roof_query_string(key)}">krokiew.dxf</a> · <a href="/dxf/building?{roof_query_string(key)}">wszystkie krokwie budynku (12 m, co 80 cm)</a></div>
         </div>
       </div>
     </body>
@@ -0,0 +1,68 @@
+# -------------------------
+# Wspólne dla benchmarków: import app z katalogu repo, metadane wyniku,
+# zestaw "realistycznych" parametrów dachów.
+# -------------------------
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+
+def git_rev():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def meta():
+    import numpy
+    return {
+        "git_rev": git_rev(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# typowe dachy: większość ruchu to kilkadziesiąt standardowych zestawów
+STANDARD_SPANS = (600, 700, 800, 840, 900, 960, 1000, 1100, 1200)
+STANDARD_ANGLES = (25, 30, 35, 38, 40, 45)
+
+
+def roof_params(rng, standard_share=0.8):
+    """Parametry jak dla /api/calc: standardowe (powtarzalne) albo losowe."""
+    if rng.random() < standard_share:
+        p = {
+            "span_cm": rng.choice(STANDARD_SPANS),
+            "angle_deg": rng.choice(STANDARD_ANGLES),
+            "eave_out_cm": rng.choice((40, 50, 60)),
+        }
+    else:
+        p = {
+            "span_cm": round(rng.uniform(400, 1500), 1),
+            "angle_deg": round(rng.uniform(15, 55), 2),
+            "eave_out_cm": round(rng.uniform(0, 90), 1),
+        }
+    if rng.random() < 0.6:
+        p["purlin_enabled"] = 1
+        if rng.random() < 0.5:
+            p["purlin_top_above_wallplate_cm"] = rng.choice((100, 120, 140))
+        else:
+            p["purlin_s_from_outer_wallplate_cm"] = rng.choice((250, 300, 350))
+    return p
+
+
+def rng(seed=12345):
+    return random.Random(seed)
@@ -0,0 +1,54 @@
+# -------------------------
+# Porównanie dwóch wyników bench/run.py
+# Uruchom: python bench/compare.py stary.json nowy.json [--threshold 10]
+# Kod wyjścia 1, gdy coś zwolniło bardziej niż o threshold %.
+# -------------------------
+import argparse
+import json
+import sys
+
+# (sekcja, metryka, czy więcej = lepiej)
+METRICS = (
+    ("micro", "us_per_call", False),
+    ("load", "rps", True),
+    ("load", "p50_ms", False),
+    ("load", "p95_ms", False),
+    ("load", "p99_ms", False),
+)
+
+
+def compare(old, new, threshold):
+    regressions = []
+    print(f"{'':<34} {'stary':>10} {'nowy':>10} {'zmiana':>8}")
+    for section, metric, higher_better in METRICS:
+        for name in sorted(set(old.get(section, {})) & set(new.get(section, {}))):
+            a = old[section][name][metric]
+            b = new[section][name][metric]
+            if not a:
+                continue
+            change = (b - a) / a * 100.0
+            worse = -change if higher_better else change
+            flag = "  <-- wolniej" if worse > threshold else ""
+            if flag:
+                regressions.append((section, name, metric, change))
+            print(f"{section + '.' + name + '.' + metric:<34} {a:10.2f} {b:10.2f} {change:+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("old")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=10.0, help="próg regresji w %%")
+    args = ap.parse_args()
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"stary: {old['meta']['git_rev']} ({old['meta']['timestamp']})")
+    print(f"nowy:  {new['meta']['git_rev']} ({new['meta']['timestamp']})\n")
+    sys.exit(1 if compare(old, new, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# -------------------------
+# Harness obciążeniowy w procesie: zapytania idą prosto do aplikacji ASGI
+# (bez sieci i bez serwera), z zadaną współbieżnością.
+# Raport: przepustowość, p50/p95/p99, błędy. Uruchom: python bench/load.py
+# -------------------------
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+from common import roof_params, rng
+
+import app
+
+
+async def asgi_request(asgi_app, method, path, query="", body=b"", headers=()):
+    """Minimalny klient ASGI: zwraca (status, liczba bajtów treści)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench")] + [(k.encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    sent_body = False
+    status = 0
+    size = 0
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await asgi_app(scope, receive, send)
+    done.set()
+    return status, size
+
+
+# -------------------------
+# Scenariusze: funkcja (rng) -> (metoda, ścieżka, query, body, nagłówki)
+# -------------------------
+def req_api_calc(r):
+    return "GET", "/api/calc", urlencode(roof_params(r)), b"", ()
+
+
+def req_view(r):
+    return "GET", "/view", urlencode(roof_params(r)), b"", ()
+
+
+def req_svg(r):
+    key = app.roof_key(*[{**app.CALC_DEFAULTS, **roof_params(r)}[k] for k in app.CALC_FIELDS])
+    url = app.svg_url(r.choice(("roof", "notches")), key)
+    path, query = url.split("?", 1)
+    return "GET", path, query, b"", ()
+
+
+def req_batch(r, n=100):
+    body = json.dumps({"roofs": [roof_params(r) for _ in range(n)], "format": "columns"}).encode()
+    return "POST", "/api/calc/batch", "", body, (("content-type", "application/json"),)
+
+
+def req_sweep(r):
+    body = json.dumps({
+        "angle_deg": {"start": 20, "stop": 50, "step": 1},
+        "span_cm": {"start": 600, "stop": 1200, "step": 50},
+        "max_rafter_len_cm": 700,
+    }).encode()
+    return "POST", "/api/calc/sweep", "", body, (("content-type", "application/json"),)
+
+
+def req_mixed(r):
+    x = r.random()
+    if x < 0.45:
+        return req_api_calc(r)
+    if x < 0.70:
+        return req_view(r)
+    if x < 0.92:
+        return req_svg(r)
+    if x < 0.98:
+        return req_batch(r)
+    return req_sweep(r)
+
+
+SCENARIOS = {
+    "api_calc": req_api_calc,
+    "view": req_view,
+    "svg": req_svg,
+    "batch_100": req_batch,
+    "sweep_small": req_sweep,
+    "mixed": req_mixed,
+}
+
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(q / 100.0 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[i]
+
+
+async def run_scenario(make_request, requests=2000, concurrency=16, seed=1, warmup=50):
+    r = rng(seed)
+    reqs = [make_request(r) for _ in range(requests + warmup)]
+    for req in reqs[:warmup]:
+        await asgi_request(app.app, *req)
+
+    queue = iter(reqs[warmup:])
+    latencies = []
+    errors = 0
+    nbytes = 0
+
+    async def worker():
+        nonlocal errors, nbytes
+        for req in queue:
+            t0 = time.perf_counter()
+            status, size = await asgi_request(app.app, *req)
+            latencies.append(time.perf_counter() - t0)
+            nbytes += size
+            if status >= 400:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+
+    lat = sorted(latencies)
+    return {
+        "requests": len(lat),
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_s": wall,
+        "rps": len(lat) / wall if wall else 0.0,
+        "bytes_per_req": nbytes / len(lat) if lat else 0.0,
+        "p50_ms": percentile(lat, 50) * 1e3,
+        "p95_ms": percentile(lat, 95) * 1e3,
+        "p99_ms": percentile(lat, 99) * 1e3,
+        "max_ms": lat[-1] * 1e3 if lat else 0.0,
+    }
+
+
+def clear_caches():
+    app.result_cache.clear()
+    app.render_cache.clear()
+
+
+def run(scenarios=None, requests=2000, concurrency=16):
+    out = {}
+    for name in scenarios or SCENARIOS:
+        clear_caches()
+        n = requests if name not in ("batch_100", "sweep_small") else max(requests // 10, 20)
+        out[name] = asyncio.run(run_scenario(SCENARIOS[name], n, concurrency))
+    for hook in reversed(app.shutdown_hooks):
+        hook()
+    return out
+
+
+def print_table(res):
+    print(f"{'scenario':<14} {'req':>6} {'err':>4} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'B/req':>9}")
+    for name, r in res.items():
+        print(f"{name:<14} {r['requests']:6d} {r['errors']:4d} {r['rps']:9.1f} {r['p50_ms']:8.2f} "
+              f"{r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {r['bytes_per_req']:9.0f}")
+
+
+if __name__ == "__main__":
+    print_table(run())
@@ -0,0 +1,57 @@
+# -------------------------
+# Micro-benchmarki: calc_roof_cm, batch, oba rysunki SVG, szablon HTML /view
+# Uruchom: python bench/micro.py
+# -------------------------
+import timeit
+
+import numpy as np
+
+from common import roof_params, rng
+
+import app
+import roofgraph
+
+
+def _per_call_us(fn, number, repeat=5):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def run(number=2000):
+    r = rng()
+    params = [roof_params(r) for _ in range(64)]
+    keys = [app.roof_key(*[{**app.CALC_DEFAULTS, **p}[k] for k in app.CALC_FIELDS]) for p in params]
+    datas = [app.calc_cached(k) for k in keys]
+    args = [tuple(bool(v) if f == "purlin_enabled" else v for f, v in zip(app.CALC_FIELDS, k)) for k in keys]
+
+    it = iter(range(1 << 62))
+
+    def pick(seq):
+        return seq[next(it) % len(seq)]
+
+    cols = app.batch_columns(roofs=[{**p} for p in params] * 160)   # 10 240 dachów
+
+    cases = {
+        "calc_roof_cm": (lambda: app.calc_roof_cm(*pick(args)), number),
+        "roofgraph_evaluate": (lambda: roofgraph.result_of(roofgraph.evaluate(dict(zip(app.CALC_FIELDS, pick(args))))), number),
+        "calc_roof_cm_batch_10k": (lambda: app.calc_roof_cm_batch(cols), max(number // 200, 5)),
+        "svg_roof_main": (lambda: app.svg_roof_main(pick(datas)), number),
+        "svg_detail_notches": (lambda: app.svg_detail_notches(pick(datas)), number),
+        "view_html": (lambda: app.render_view(keys[0], datas[0]), number),
+        "roof_key": (lambda: app.roof_key(*pick(keys)), number),
+    }
+    out = {}
+    for name, (fn, n) in cases.items():
+        us = _per_call_us(fn, n)
+        out[name] = {"us_per_call": us, "ops_per_s": 1e6 / us}
+    return out
+
+
+def print_table(res):
+    print(f"{'benchmark':<26} {'us/call':>12} {'ops/s':>12}")
+    for name, r in res.items():
+        print(f"{name:<26} {r['us_per_call']:12.2f} {r['ops_per_s']:12.0f}")
+
+
+if __name__ == "__main__":
+    np.random.seed(0)
+    print_table(run())
@@ -0,0 +1,125 @@
+# -------------------------
+# Odtwarzanie zapisanego ruchu (DACH_REQUEST_LOG, patrz reqlog.py)
+# Zapytania idą w odstępach z logu podzielonych przez --speed
+# (1 = tempo oryginalne, 10 = 10x szybciej, 0 = bez czekania).
+# Domyślnie w procesie (ASGI, jak load.py) - można to profilować
+# (np. py-spy / X-Profile); z --url na działający serwer.
+# Uruchom: python bench/replay.py requests.jsonl [requests.jsonl.1 ...] [--speed 10]
+# -------------------------
+import argparse
+import asyncio
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+import orjson
+
+from load import asgi_request, percentile
+
+import app
+
+
+def read_log(paths, limit=0):
+    """Rekordy z plików logu (też rotowanych), posortowane po czasie."""
+    records = []
+    for path in paths:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    r = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue   # urwana linia (np. zabity proces w trakcie zapisu)
+                # "query" - pełny query string; starsze logi miały tylko "params"
+                if isinstance(r, dict) and "path" in r and ("query" in r or "params" in r):
+                    records.append(r)
+    records.sort(key=lambda r: r.get("ts", 0.0))
+    return records[:limit] if limit else records
+
+
+def http_request(base_url, path, query, timeout=30.0):
+    """Zapytanie do działającego serwera: (status, liczba bajtów)."""
+    try:
+        with urllib.request.urlopen(f"{base_url.rstrip('/')}{path}?{query}", timeout=timeout) as resp:
+            return resp.status, len(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, len(e.read())
+
+
+async def replay(records, speed=1.0, base_url="", max_inflight=64):
+    sem = asyncio.Semaphore(max_inflight)
+    latencies = []
+    lags = []
+    errors = 0
+    recorded_ms = [r["ms"] for r in records if "ms" in r]
+
+    async def one(rec, due):
+        nonlocal errors
+        async with sem:
+            lags.append(max(time.perf_counter() - due, 0.0))
+            query = rec["query"] if "query" in rec else urlencode(rec["params"])
+            t0 = time.perf_counter()
+            if base_url:
+                status, _ = await asyncio.to_thread(http_request, base_url, rec["path"], query)
+            else:
+                status, _ = await asgi_request(app.app, rec.get("method", "GET"), rec["path"], query)
+            latencies.append(time.perf_counter() - t0)
+            if status >= 400:
+                errors += 1
+
+    tasks = []
+    ts0 = records[0].get("ts", 0.0) if records else 0.0
+    start = time.perf_counter()
+    for rec in records:
+        due = start + ((rec.get("ts", ts0) - ts0) / speed if speed > 0 else 0.0)
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(rec, due)))
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - start
+
+    lat = sorted(latencies)
+    rec_ms = sorted(recorded_ms)
+    return {
+        "requests": len(lat),
+        "errors": errors,
+        "speed": speed,
+        "recorded_s": (records[-1].get("ts", ts0) - ts0) if records else 0.0,
+        "wall_s": wall,
+        "rps": len(lat) / wall if wall else 0.0,
+        "p50_ms": percentile(lat, 50) * 1e3,
+        "p95_ms": percentile(lat, 95) * 1e3,
+        "p99_ms": percentile(lat, 99) * 1e3,
+        "recorded_p50_ms": percentile(rec_ms, 50),
+        "recorded_p95_ms": percentile(rec_ms, 95),
+        # jak bardzo spóźnione było wysłanie (klient/limit współbieżności nie nadąża)
+        "max_lag_ms": max(lags, default=0.0) * 1e3,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Odtwarzanie logu zapytań kalkulatora dachu")
+    ap.add_argument("logs", nargs="+", help="pliki JSONL z DACH_REQUEST_LOG")
+    ap.add_argument("--speed", type=float, default=1.0, help="mnożnik tempa (0 = bez czekania)")
+    ap.add_argument("--url", default="", help="adres serwera (domyślnie aplikacja w procesie)")
+    ap.add_argument("--max-inflight", type=int, default=64)
+    ap.add_argument("--limit", type=int, default=0, help="najwyżej N pierwszych zapytań")
+    args = ap.parse_args()
+
+    records = read_log(args.logs, args.limit)
+    if not records:
+        raise SystemExit("brak zapytań w logu")
+    res = asyncio.run(replay(records, args.speed, args.url, args.max_inflight))
+    for hook in reversed(app.shutdown_hooks):
+        hook()
+
+    print(f"{res['requests']} zapytań ({res['errors']} błędów), "
+          f"nagranie {res['recorded_s']:.1f} s -> odtworzenie {res['wall_s']:.1f} s ({res['rps']:.1f} rps)")
+    print(f"odtworzone p50/p95/p99: {res['p50_ms']:.2f} / {res['p95_ms']:.2f} / {res['p99_ms']:.2f} ms")
+    print(f"nagrane    p50/p95:     {res['recorded_p50_ms']:.2f} / {res['recorded_p95_ms']:.2f} ms")
+    print(f"maks. opóźnienie wysłania: {res['max_lag_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# -------------------------
+# Pełny zestaw: micro + load -> bench/results/<czas>-<commit>.json
+# Uruchom: python bench/run.py [--requests N] [--concurrency C] [--out plik]
+# Porównanie dwóch wyników: python bench/compare.py stary.json nowy.json
+# -------------------------
+import argparse
+import json
+import os
+
+from common import RESULTS_DIR, meta
+
+import load
+import micro
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarki kalkulatora dachu (offline, w procesie)")
+    ap.add_argument("--requests", type=int, default=2000, help="zapytań na scenariusz")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--number", type=int, default=2000, help="powtórzeń micro-benchmarków")
+    ap.add_argument("--scenarios", default="", help="lista po przecinku (domyślnie wszystkie)")
+    ap.add_argument("--skip-micro", action="store_true")
+    ap.add_argument("--skip-load", action="store_true")
+    ap.add_argument("--out", default="", help="plik JSON (domyślnie bench/results/...)")
+    args = ap.parse_args()
+
+    result = {"meta": meta(), "micro": {}, "load": {}}
+    result["meta"]["params"] = {"requests": args.requests, "concurrency": args.concurrency, "number": args.number}
+
+    if not args.skip_micro:
+        result["micro"] = micro.run(args.number)
+        micro.print_table(result["micro"])
+        print()
+    if not args.skip_load:
+        scenarios = [s for s in args.scenarios.split(",") if s] or None
+        result["load"] = load.run(scenarios, args.requests, args.concurrency)
+        load.print_table(result["load"])
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = result["meta"]["timestamp"].replace(":", "").replace("-", "")
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{result['meta']['git_rev']}.json")
+    with open(out, "w") as f:
+        json.dump(result, f, indent=1)
+    print(f"\nzapisano: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# -------------------------
+# Micro-benchmark: svgdraw vs stare renderery (f-string + closures tx/ty)
+# Uruchom: python bench/svg_bench.py
+# Sprawdza też, że rysunki są wizualnie te same (te same elementy,
+# współrzędne zgodne co do precyzji formatowania).
+# -------------------------
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import calc_roof_cm, clamp, fmt_cm, fmt_deg, svg_detail_notches, svg_roof_main
+
+
+# -------------------------
+# Referencja: renderery sprzed svgdraw (bez zmian, tylko do porównania)
+# -------------------------
+def legacy_svg_roof_main(data):
+    inp = data["input"]
+    res = data["results"]
+    p = data["purlin"]
+
+    span = inp["span_cm"]
+    angle = inp["angle_deg"]
+    eave = inp["eave_out_cm"]
+    wallplate_w = inp["wallplate_w_cm"]
+    wallplate_h = inp["wallplate_h_cm"]
+    rafter_h = inp["rafter_h_cm"]
+
+    half = res["polowa_rozpietosci_cm"]
+    rise = res["wysokosc_kalenicy_nad_gora_murlaty_cm"]
+
+    W, H = 980, 460
+    pad = 60
+
+    left_outer = (0, 0)
+    right_outer = (span, 0)
+    ridge = (half, rise)
+
+    left_eave = (-eave, 0)
+    right_eave = (span + eave, 0)
+
+    max_x = span + 2 * eave
+    max_y = max(rise, 1)
+    s = min((W - 2 * pad) / max_x, (H - 2 * pad) / max_y)
+
+    def tx(x): return pad + (x + eave) * s
+    def ty(y): return H - pad - y * s
+
+    thick_px = clamp((rafter_h * s) * 0.20, 6, 18)
+
+    def line(p1, p2, stroke="#111", width=3, dash=None):
+        ds = f' stroke-dasharray="{dash}"' if dash else ""
+        return f'<line x1="{tx(p1[0])}" y1="{ty(p1[1])}" x2="{tx(p2[0])}" y2="{ty(p2[1])}" stroke="{stroke}" stroke-width="{width}"{ds} />'
+
+    def text(x, y, t, size=14, color="#111", anchor="start"):
+        return f'<text x="{x}" y="{y}" font-size="{size}" fill="{color}" font-family="Arial" text-anchor="{anchor}">{t}</text>'
+
+    def poly(points, stroke="#111", width=2, fill="none"):
+        pts = " ".join([f"{tx(x)},{ty(y)}" for x, y in points])
+        return f'<polyline points="{pts}" fill="{fill}" stroke="{stroke}" stroke-width="{width}" />'
+
+    svg = [f'<svg width="{W}" height="{H}" xmlns="http://www.w3.org/2000/svg">']
+    svg.append('<rect width="100%" height="100%" fill="#ffffff"/>')
+    svg.append(text(20, 30, "Rysunek 1: przekrój dachu (cm)", 18))
+    svg.append(text(20, 54, f"Rozpiętość: {fmt_cm(span)} | kąt: {fmt_deg(angle)} | okap: {fmt_cm(eave)}", 13, "#444"))
+
+    # murłaty (realna wys. z pola)
+    left_wp = [(0, -wallplate_h), (wallplate_w, -wallplate_h), (wallplate_w, 0), (0, 0), (0, -wallplate_h)]
+    right_wp = [(span - wallplate_w, -wallplate_h), (span, -wallplate_h), (span, 0), (span - wallplate_w, 0), (span - wallplate_w, -wallplate_h)]
+    svg.append(poly(left_wp, stroke="#777", width=2))
+    svg.append(poly(right_wp, stroke="#777", width=2))
+    svg.append(text(tx(wallplate_w/2), ty(-wallplate_h-2), "murłata", 12, "#777", anchor="middle"))
+
+    # krokwie
+    svg.append(line(left_eave, ridge, stroke="#111", width=thick_px))
+    svg.append(line(ridge, right_eave, stroke="#111", width=thick_px))
+    svg.append(line(left_outer, right_outer, stroke="#444", width=2))
+
+    # płatew (góra)
+    if p:
+        y = p["y_top_cm"]
+        x = p["x_cm"]
+        p1 = (x, y)
+        p2 = (span - x, y)
+        svg.append(line(p1, p2, stroke="#0b6", width=5))
+        svg.append(text(tx(p1[0]), ty(p1[1]) - 10, "góra płatwi", 12, "#0b6"))
+        svg.append(line((p1[0], 0), (p1[0], p1[1]), stroke="#0b6", width=3, dash="3,6"))
+
+    svg.append('</svg>')
+    return "\n".join(svg)
+
+# -------------------------
+# SVG 2: detal PRO - siodło na murłacie + siodło na płatwi
+# -------------------------
+def legacy_svg_detail_notches(data):
+    inp = data["input"]
+    res = data["results"]
+    p = data["purlin"]
+
+    angle = inp["angle_deg"]
+    rafter_h = inp["rafter_h_cm"]
+    bearing = inp["bearing_cm"]
+
+    m_depth = res["murlata_siodlo_w_dol_cm"]
+    m_horiz = res["murlata_siodlo_poziomo_cm"]
+
+    # purlin notch (może być None)
+    p_depth = p["notch_depth_cm"] if p else None
+    p_horiz = p["notch_horiz_cm"] if p else None
+    p_h = inp["purlin_section_h_cm"] if p else None
+
+    W, H = 980, 460
+    pad = 60
+
+    # skala pod detal
+    max_x = 240
+    max_y = 140
+    s = min((W - 2*pad)/max_x, (H - 2*pad)/max_y)
+
+    def tx(x): return pad + x*s
+    def ty(y): return H - pad - y*s
+
+    def line_xy(x1,y1,x2,y2, stroke="#111", width=3, dash=None):
+        ds = f' stroke-dasharray="{dash}"' if dash else ""
+        return f'<line x1="{tx(x1)}" y1="{ty(y1)}" x2="{tx(x2)}" y2="{ty(y2)}" stroke="{stroke}" stroke-width="{width}"{ds} />'
+
+    def text(x, y, t, size=14, color="#111", anchor="start"):
+        return f'<text x="{x}" y="{y}" font-size="{size}" fill="{color}" font-family="Arial" text-anchor="{anchor}">{t}</text>'
+
+    def poly(points, stroke="#111", width=2, fill="none"):
+        pts = " ".join([f"{tx(x)},{ty(y)}" for x,y in points])
+        return f'<polyline points="{pts}" fill="{fill}" stroke="{stroke}" stroke-width="{width}" />'
+
+    svg = [f'<svg width="{W}" height="{H}" xmlns="http://www.w3.org/2000/svg">']
+    svg.append('<rect width="100%" height="100%" fill="#ffffff"/>')
+    svg.append(text(20, 30, "Rysunek 2: detal PRO – siodełka (cm)", 18))
+    svg.append(text(20, 54, f"Kąt: {fmt_deg(angle)} | siodełko w dół: {fmt_cm(bearing)} (tak samo na murłacie i płatwi)", 13, "#444"))
+
+    # Rafter rectangle (schemat)
+    L = 200
+    Hk = rafter_h
+    rafter_rect = [(0,0), (L,0), (L,Hk), (0,Hk), (0,0)]
+    svg.append(poly(rafter_rect, stroke="#111", width=3))
+
+    # Murłata notch (na dole krokwi, schematycznie z lewej)
+    # Pokazujemy "w dół" i "poziomo"
+    x0 = 20
+    # notch od dołu krokwi w górę? Uproszczenie: pokażemy "wybranie" od dołu do góry o m_depth
+    # i po poziomie m_horiz
+    notch_m = [
+        (x0, 0),
+        (x0 + m_horiz, 0),
+        (x0 + m_horiz, m_depth),
+        (x0, m_depth),
+        (x0, 0)
+    ]
+    svg.append(poly(notch_m, stroke="#c00", width=4))
+    svg.append(text(tx(x0), ty(m_depth+8), "siodełko na murłacie", 12, "#c00"))
+
+    # Wymiary murłaty
+    svg.append(line_xy(x0 + m_horiz + 10, 0, x0 + m_horiz + 10, m_depth, stroke="#c00", width=2, dash="4,6"))
+    svg.append(text(tx(x0 + m_horiz + 18), ty(m_depth/2), f"w dół: {fmt_cm(m_depth)}", 12, "#c00"))
+    svg.append(line_xy(x0, -8, x0 + m_horiz, -8, stroke="#c00", width=2, dash="4,6"))
+    svg.append(text((tx(x0)+tx(x0+m_horiz))/2, ty(-8) - 6, f"poziomo: {fmt_cm(m_horiz)}", 12, "#c00", anchor="middle"))
+
+    # Płatew notch (na górze krokwi, bardziej w prawo)
+    if p:
+        x1 = 110
+        y_top = Hk
+        notch_p = [
+            (x1, y_top),
+            (x1 + p_horiz, y_top),
+            (x1 + p_horiz, y_top - p_depth),
+            (x1, y_top - p_depth),
+            (x1, y_top),
+        ]
+        svg.append(poly(notch_p, stroke="#0b6", width=4))
+        svg.append(text(tx(x1), ty(y_top - p_depth - 8), "siodełko pod płatew", 12, "#0b6"))
+
+        # płatew (prostokąt na siodełku)
+        p_rect = [
+            (x1, y_top),
+            (x1 + p_horiz, y_top),
+            (x1 + p_horiz, y_top + p_h),
+            (x1, y_top + p_h),
+            (x1, y_top),
+        ]
+        svg.append(poly(p_rect, stroke="#0b6", width=2))
+
+        # wymiary płatwi
+        svg.append(line_xy(x1 + p_horiz + 10, y_top, x1 + p_horiz + 10, y_top - p_depth, stroke="#0b6", width=2, dash="4,6"))
+        svg.append(text(tx(x1 + p_horiz + 18), ty(y_top - p_depth/2), f"w dół: {fmt_cm(p_depth)}", 12, "#0b6"))
+        svg.append(line_xy(x1, y_top - p_depth - 10, x1 + p_horiz, y_top - p_depth - 10, stroke="#0b6", width=2, dash="4,6"))
+        svg.append(text((tx(x1)+tx(x1+p_horiz))/2, ty(y_top - p_depth - 10) - 6, f"poziomo: {fmt_cm(p_horiz)}", 12, "#0b6", anchor="middle"))
+
+    svg.append('</svg>')
+    return "\n".join(svg)
+
+
+
+CASES = {
+    "bez_platwi": calc_roof_cm(1000, 35, 50, 20, 14, 14, 4, False, 20, 0, 0),
+    "platew_wys": calc_roof_cm(1000, 35, 50, 20, 14, 14, 4, True, 20, 0, 120),
+    "platew_krokiew": calc_roof_cm(840, 42.5, 65, 18, 14, 16, 3.5, True, 18, 300, 0),
+}
+
+_TAG = re.compile(r"<(\w+)([^>]*)>")
+_NUM = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _shape(svg):
+    """(tag, liczby z atrybutów) dla każdego elementu; tekst bez zmian."""
+    out = []
+    for tag, attrs in _TAG.findall(svg):
+        out.append((tag, [float(v) for v in _NUM.findall(attrs)]))
+    return out, re.findall(r">([^<]+)</text>", svg)
+
+
+def same_picture(a, b, tol=0.051):
+    (sa, ta), (sb, tb) = _shape(a), _shape(b)
+    if ta != tb or len(sa) != len(sb):
+        return False
+    for (tag_a, na), (tag_b, nb) in zip(sa, sb):
+        if tag_a != tag_b or len(na) != len(nb):
+            return False
+        if any(abs(x - y) > tol for x, y in zip(na, nb)):
+            return False
+    return True
+
+
+def bench(fn, data, number):
+    return min(timeit.repeat(lambda: fn(data), number=number, repeat=5)) / number * 1e6
+
+
+def main(number=5000):
+    pairs = [
+        ("svg_roof_main", legacy_svg_roof_main, svg_roof_main),
+        ("svg_detail_notches", legacy_svg_detail_notches, svg_detail_notches),
+    ]
+    print(f"{'rysunek':<20} {'przypadek':<16} {'stary us':>9} {'nowy us':>9} {'x':>6} {'stary B':>8} {'nowy B':>8}  ok")
+    for name, old, new in pairs:
+        for case, data in CASES.items():
+            a, b = old(data), new(data)
+            t_old, t_new = bench(old, data, number), bench(new, data, number)
+            print(f"{name:<20} {case:<16} {t_old:9.1f} {t_new:9.1f} {t_old / t_new:6.2f} "
+                  f"{len(a):8d} {len(b):8d}  {same_picture(a, b)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+# -------------------------
+# Przetwarzanie masowe z linii poleceń: plik CSV/JSONL z dachami -> wyniki
+#
+#   python bulk.py dachy.csv --out wyniki.csv
+#   python bulk.py dachy.jsonl --out wyniki.jsonl --workers 8
+#   python bulk.py dachy.csv --format svg --out rysunki/      (pliki na dach)
+#   python bulk.py dachy.csv --out wyniki.csv --resume        (po awarii)
+#
+# Wejście: kolumny/klucze jak parametry /api/calc (brakujące = domyślne),
+# opcjonalnie kolumna z identyfikatorem (--id-column, domyślnie "id").
+# Wiersze czytane strumieniowo, porcjami (--chunk) do puli procesów;
+# najwyżej 2 porcje na proces w locie, wyniki zapisywane w kolejności
+# wejścia -> pamięć stała niezależnie od długości pliku.
+# Liczenie: calc_roof_cm_batch (bit w bit jak calc_roof_cm).
+# Wznowienie: po każdej zapisanej porcji plik kontrolny <wyjście>.progress
+# (dla katalogu: <katalog>/.progress) z liczbą wierszy i długością wyjścia;
+# --resume obcina wyjście do tej długości i pomija zrobione wiersze; gdy
+# wyjścia nie ma (albo jest krótsze niż w punkcie kontrolnym) - od nowa.
+# -------------------------
+import argparse
+import contextlib
+import csv
+import io
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import orjson
+
+import app
+import pdfsheet
+
+FORMATS = ("csv", "jsonl", "svg", "pdf")
+
+CSV_HEADER = (
+    ["row", "id"] + list(app.CALC_FIELDS) + list(app.CALC_RESULT_FIELDS) +
+    ["purlin_mode"] + ["purlin_" + k for k in app.PURLIN_FIELDS] + ["error"]
+)
+
+
+def parse_value(v):
+    try:
+        x = float(v)   # najczęstszy przypadek: "123.4" albo liczba z JSON
+    except (TypeError, ValueError):
+        x = None
+    if x is not None:
+        if not math.isfinite(x):
+            raise ValueError(f"{v!r}")
+        return x
+    s = str(v).strip().lower().replace(",", ".")
+    if s in ("true", "tak"):
+        return 1.0
+    if s in ("false", "nie"):
+        return 0.0
+    x = float(s)
+    if not math.isfinite(x):
+        raise ValueError(f"{v!r}")
+    return x
+
+
+def parse_rows(rows, id_column):
+    """Surowe wiersze -> (kolumny float64 poprawnych, [(id, błąd albo None)])."""
+    cols = {k: [] for k in app.CALC_FIELDS}
+    meta = []
+    for raw in rows:
+        if not isinstance(raw, dict):
+            meta.append(("", "wiersz nie jest obiektem"))
+            continue
+        rid = raw.get(id_column, "") if id_column else ""
+        try:
+            vals = {}
+            for k in app.CALC_FIELDS:
+                v = raw.get(k)
+                vals[k] = app.CALC_DEFAULTS[k] if v is None or v == "" else parse_value(v)
+        except (TypeError, ValueError) as e:
+            meta.append((rid, f"{k}: nie liczba ({e})"))
+            continue
+        for k in app.CALC_FIELDS:
+            cols[k].append(vals[k])
+        meta.append((rid, None))
+    return {k: np.array(v, dtype=np.float64) for k, v in cols.items()}, meta
+
+
+def _csv_columns(out):
+    """Wynik batcha -> kolumny tekstowe w kolejności CSV_HEADER[2:-1]."""
+    enabled = out["purlin"]["enabled"]
+    cols = [out["input"][k].tolist() for k in app.CALC_FIELDS]
+    cols[app.CALC_FIELDS.index("purlin_enabled")] = enabled.astype(int).tolist()
+    cols += [out["results"][k].tolist() for k in app.CALC_RESULT_FIELDS]
+    mode = np.where(out["purlin"]["by_rafter"], "po_krokwi", "po_wysokosci_gory")
+    cols.append(np.where(enabled, mode, "").tolist())
+    for k in app.PURLIN_FIELDS:
+        vals = out["purlin"][k].tolist()
+        cols.append([repr(v) if e else "" for v, e in zip(vals, enabled.tolist())])
+    return cols
+
+
+def _csv_chunk(start, meta, out):
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    blank = [""] * (len(CSV_HEADER) - 3)
+    rows = iter(zip(*_csv_columns(out))) if out is not None else iter(())
+    for i, (rid, err) in enumerate(meta):
+        if err is not None:
+            w.writerow([start + i, rid, *blank, err])
+        else:
+            w.writerow([start + i, rid, *next(rows), ""])
+    return buf.getvalue().encode()
+
+
+def _jsonl_chunk(start, meta, rows):
+    out = []
+    it = iter(rows)
+    for i, (rid, err) in enumerate(meta):
+        rec = {"row": start + i, "id": rid}
+        if err is not None:
+            rec["error"] = err
+        else:
+            rec.update(next(it))
+        out.append(orjson.dumps(rec) + b"\n")
+    return b"".join(out)
+
+
+def _file_stem(start, i, rid):
+    # identyfikator z wejścia jako nazwa pliku, ale bez ścieżek
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(rid)).strip(".")
+    return safe or f"row{start + i:08d}"
+
+
+def _drawings_chunk(fmt, out_dir, start, meta, cols):
+    n_ok = 0
+    errors = []
+    for i, (rid, err) in enumerate(meta):
+        if err is not None:
+            errors.append(orjson.dumps({"row": start + i, "id": rid, "error": err}) + b"\n")
+            continue
+        key = app.roof_key(*[cols[k][n_ok] for k in app.CALC_FIELDS])
+        n_ok += 1
+        stem = os.path.join(out_dir, _file_stem(start, i, rid))
+        if fmt == "svg":
+            data = app.calc_cached(key)
+            for kind, render in app.SVG_RENDERERS.items():
+                with open(f"{stem}_{kind}.svg", "w", encoding="utf-8") as f:
+                    f.write(render(data))
+        else:
+            pdfsheet.render_pdf_to_file([app.sheet_page(key)], stem + ".pdf")
+    # do wyjścia (errors.jsonl w katalogu) trafiają tylko błędne wiersze
+    return b"".join(errors)
+
+
+def process_chunk(fmt, out_dir, start, rows, id_column):
+    """Praca w procesie roboczym: porcja surowych wierszy -> bajty do dopisania."""
+    cols, meta = parse_rows(rows, id_column)
+    if fmt in ("svg", "pdf"):
+        return _drawings_chunk(fmt, out_dir, start, meta, cols), len(meta)
+    out = app.calc_roof_cm_batch(cols) if len(cols["span_cm"]) else None
+    if fmt == "csv":
+        return _csv_chunk(start, meta, out), len(meta)
+    return _jsonl_chunk(start, meta, app.batch_to_rows(out) if out is not None else []), len(meta)
+
+
+# -------------------------
+# Wejście, postęp, punkt kontrolny
+# -------------------------
+def read_rows(path):
+    """Generator słowników z CSV albo JSONL (po rozszerzeniu) + funkcja pozycji w bajtach."""
+    f = open(path, "rb")
+    size = os.path.getsize(path)
+
+    def pos():
+        return size if f.closed else f.tell()
+    if path.endswith((".jsonl", ".ndjson")):
+        def gen():
+            with f:
+                for line in f:
+                    if line.strip():
+                        yield orjson.loads(line)
+    else:
+        text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+
+        def gen():
+            with text:
+                yield from csv.DictReader(text)
+    return gen(), pos
+
+
+def chunked(rows, size, skip=0):
+    batch = []
+    for i, r in enumerate(rows):
+        if i < skip:
+            continue
+        batch.append(r)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(state))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Progress:
+    def __init__(self, total_bytes, stream=sys.stderr):
+        self.total = total_bytes
+        self.stream = stream
+        self.t0 = time.perf_counter()
+        self.last = 0.0
+        self.shown = None     # ostatnio wypisana liczba wierszy
+
+    def update(self, rows, pos, final=False):
+        now = time.perf_counter()
+        if final and rows == self.shown:
+            # ostatnia porcja już wypisana - tylko koniec linii
+            self.stream.write("\n")
+            self.stream.flush()
+            return
+        if not final and now - self.last < 0.5:
+            return
+        self.last = now
+        self.shown = rows
+        rate = rows / (now - self.t0) if now > self.t0 else 0.0
+        pct = f"{100.0 * pos / self.total:5.1f}%  " if self.total else ""
+        self.stream.write(f"\r{pct}{rows} wierszy  {rate:,.0f}/s ")
+        if final:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def run(input_path, out, fmt, workers, chunk, id_column, resume):
+    if fmt in ("svg", "pdf"):
+        os.makedirs(out, exist_ok=True)
+        out_dir, out_path = out, os.path.join(out, "errors.jsonl")
+        ckpt_path = os.path.join(out, ".progress")
+    else:
+        out_dir, out_path = None, out
+        ckpt_path = out + ".progress"
+
+    ident = {"input": os.path.abspath(input_path), "format": fmt, "id_column": id_column}
+    state = load_checkpoint(ckpt_path) if resume else None
+    if state is not None and {k: state.get(k) for k in ident} != ident:
+        raise SystemExit(f"{ckpt_path}: punkt kontrolny dotyczy innego wejścia/formatu")
+    if state is not None and (not os.path.exists(out_path) or os.path.getsize(out_path) < state["out_bytes"]):
+        print(f"{out_path}: brak wyjścia z punktu kontrolnego, zaczynam od początku", file=sys.stderr)
+        state = None
+    done = state["rows"] if state else 0
+
+    f = open(out_path, "r+b" if state else "wb")
+    if state:
+        f.truncate(state["out_bytes"])   # porcja w trakcie zapisu przy awarii
+        f.seek(state["out_bytes"])
+    elif fmt == "csv":
+        f.write((",".join(CSV_HEADER) + "\n").encode())
+
+    rows, pos = read_rows(input_path)
+    progress = Progress(os.path.getsize(input_path))
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    inflight = deque()
+
+    def drain(limit):
+        nonlocal done
+        while len(inflight) > limit:
+            fut = inflight.popleft()
+            data, n = fut.result() if pool else fut
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            done += n
+            save_checkpoint(ckpt_path, {**ident, "rows": done, "out_bytes": f.tell()})
+            progress.update(done, pos())
+
+    try:
+        start = done
+        for batch in chunked(rows, chunk, skip=done):
+            args = (fmt, out_dir, start, batch, id_column)
+            inflight.append(pool.submit(process_chunk, *args) if pool else process_chunk(*args))
+            start += len(batch)
+            drain(2 * max(workers, 1))
+        drain(0)
+        progress.update(done, pos(), final=True)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        f.close()
+    # bez wierszy danych punkt kontrolny nie powstaje
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(ckpt_path)
+    return done
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Kalkulator dachu: przetwarzanie masowe CSV/JSONL")
+    ap.add_argument("input", help="plik .csv albo .jsonl/.ndjson")
+    ap.add_argument("--out", required=True, help="plik wyników (csv/jsonl) albo katalog (svg/pdf)")
+    ap.add_argument("--format", choices=FORMATS, default="",
+                    help="domyślnie z rozszerzenia --out (csv/jsonl)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesy (0 = bez puli)")
+    ap.add_argument("--chunk", type=int, default=5000, help="wierszy na porcję")
+    ap.add_argument("--id-column", default="id", help="kolumna przepisywana do wyniku/nazw plików")
+    ap.add_argument("--resume", action="store_true", help="kontynuuj od punktu kontrolnego")
+    args = ap.parse_args()
+
+    fmt = args.format or ("jsonl" if args.out.endswith((".jsonl", ".ndjson")) else "csv")
+    if args.chunk < 1:
+        raise SystemExit("--chunk musi być >= 1")
+    if fmt in ("svg", "pdf") and args.chunk > 500:
+        args.chunk = 500   # rysunki są wolniejsze, mniejsze porcje = równiejsze obciążenie
+    n = run(args.input, args.out, fmt, args.workers, args.chunk, args.id_column, args.resume)
+    print(f"gotowe: {n} wierszy -> {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
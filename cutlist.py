@@ -0,0 +1,210 @@
+import math
+
+# -------------------------
+# Lista cięć dla całego budynku + rozkrój na długości handlowe
+#
+# Elementy w projekcie mają tylko kilka różnych długości (wszystkie krokwie
+# są takie same), więc pakowanie robimy na grupach: (długość, ilość) zamiast
+# pojedynczych sztuk, a pręty o identycznym układzie cięć trzymamy jako jedną
+# grupę z licznikiem. Heurystyka: best-fit decreasing. Czas zależy od liczby
+# różnych długości, nie od liczby sztuk (dziesiątki tysięcy -> milisekundy).
+# -------------------------
+STOCK_LENGTHS_CM = (300, 400, 450, 500, 600, 700, 800, 900, 1000, 1200)
+KERF_CM = 0.5   # rzaz piły
+MIN_SEGMENT_CM = 100.0   # najkrótszy sensowny odcinek płatwi/murłaty
+
+
+class CutListError(ValueError):
+    pass
+
+
+def rafters_per_slope(building_length_cm, rafter_spacing_cm):
+    # pierwsza i ostatnia krokiew na szczytach
+    return int(math.floor(building_length_cm / rafter_spacing_cm + 1e-9)) + 1
+
+
+def building_pieces(
+    data,
+    building_length_cm,
+    rafter_spacing_cm,
+    purlin_overhang_cm=0.0,
+    allowance_cm=0.0,
+):
+    """Elementy budynku z wyniku calc_roof_cm.
+
+    Zwraca listę (nazwa, długość_cm, ilość, dzielony); "dzielony" = element
+    biegnący wzdłuż budynku, który można łączyć na podporach (płatew, murłata).
+    """
+    if building_length_cm <= 0 or rafter_spacing_cm <= 0:
+        raise CutListError("długość budynku i rozstaw krokwi muszą być > 0")
+
+    res = data["results"]
+    p = data["purlin"]
+
+    per_slope = rafters_per_slope(building_length_cm, rafter_spacing_cm)
+    pieces = [
+        ("krokiew", res["dlugosc_krokwi_po_osi_z_okapem_cm"] + allowance_cm, 2 * per_slope, False),
+        ("murłata", building_length_cm + allowance_cm, 2, True),
+    ]
+    if p:
+        pieces.append(("płatew", building_length_cm + 2 * purlin_overhang_cm + allowance_cm, 2, True))
+    return pieces
+
+
+def split_long(pieces, max_len):
+    """Elementy dzielone dłuższe niż najdłuższy pręt -> odcinki.
+
+    Całe pręty najdłuższe + reszta; gdy reszta wyszłaby krótsza niż
+    MIN_SEGMENT_CM, dzielimy na równe odcinki.
+    """
+    out = []
+    for name, length, count, splittable in pieces:
+        if length <= max_len:
+            out.append((name, length, count))
+        elif splittable:
+            k = int(math.ceil(length / max_len))
+            rest = length - (k - 1) * max_len
+            if rest >= MIN_SEGMENT_CM:
+                out.append((f"{name} (odcinek)", max_len, count * (k - 1)))
+                out.append((f"{name} (odcinek)", rest, count))
+            else:
+                out.append((f"{name} (odcinek)", length / k, count * k))
+        else:
+            raise CutListError(f"{name}: {length:.1f} cm dłuższe niż najdłuższy pręt {max_len:g} cm")
+    return out
+
+
+class _BinGroup:
+    """`count` prętów długości `stock` z identycznym układem cięć."""
+    __slots__ = ("stock", "cuts", "free", "count")
+
+    def __init__(self, stock, cuts, free, count):
+        self.stock = stock
+        self.cuts = cuts      # krotka (nazwa, długość)
+        self.free = free      # wolne miejsce (z jednym rzazem "w zapasie")
+        self.count = count
+
+
+def _best_stock(size, count, stocks, kerf):
+    """Długość handlowa dla nowych prętów: najmniej materiału na sztukę."""
+    best = None
+    for s in stocks:
+        per_bar = int((s + kerf) // size)
+        if per_bar == 0:
+            continue
+        # dla ostatniego, niepełnego pręta wystarczy krótszy
+        per_bar = min(per_bar, count)
+        cost = s / per_bar
+        if best is None or cost < best[0] - 1e-9:
+            best = (cost, s, per_bar)
+    return best[1], best[2]
+
+
+def check_pieces(pieces, stock_lengths):
+    """Błędy, które wyszłyby przy pakowaniu (pieces: nazwa, długość, ilość) -> CutListError."""
+    if not stock_lengths:
+        raise CutListError("brak długości handlowych")
+    max_len = max(stock_lengths)
+    for name, length, count in pieces:
+        if length <= 0 or count < 0:
+            raise CutListError(f"{name}: nieprawidłowa długość/ilość")
+        if length > max_len:
+            raise CutListError(f"{name}: {length:.1f} cm dłuższe niż najdłuższy pręt {max_len:g} cm")
+
+
+def pack_pieces(pieces, stock_lengths=STOCK_LENGTHS_CM, kerf_cm=KERF_CM):
+    """Best-fit decreasing na grupach. pieces: (nazwa, długość, ilość)."""
+    stocks = sorted(set(float(s) for s in stock_lengths))
+    check_pieces(pieces, stocks)
+
+    # każdy kawałek zajmuje długość + rzaz; pręt ma pojemność stock + rzaz
+    # (ostatnie cięcie nie potrzebuje rzazu)
+    groups = []
+    for name, length, count in sorted(pieces, key=lambda p: -p[1]):
+        size = length + kerf_cm
+        left = int(count)
+        while left > 0:
+            fits = [g for g in groups if g.free >= size - 1e-9]
+            if fits:
+                g = min(fits, key=lambda g: g.free)
+                per_bar = int((g.free + 1e-9) // size)
+                if g.count * per_bar <= left:
+                    # cała grupa dostaje po per_bar sztuk
+                    g.cuts += ((name, length),) * per_bar
+                    g.free -= per_bar * size
+                    left -= g.count * per_bar
+                else:
+                    # część prętów grupy: full po per_bar, jeden z resztą
+                    full, rest = divmod(left, per_bar)
+                    g.count -= full + (1 if rest else 0)
+                    if full:
+                        groups.append(_BinGroup(g.stock, g.cuts + ((name, length),) * per_bar,
+                                                g.free - per_bar * size, full))
+                    if rest:
+                        groups.append(_BinGroup(g.stock, g.cuts + ((name, length),) * rest,
+                                                g.free - rest * size, 1))
+                    if g.count == 0:
+                        groups.remove(g)
+                    left = 0
+            else:
+                stock, per_bar = _best_stock(size, left, stocks, kerf_cm)
+                full, rest = divmod(left, per_bar)
+                if full:
+                    groups.append(_BinGroup(stock, ((name, length),) * per_bar,
+                                            stock + kerf_cm - per_bar * size, full))
+                    left -= full * per_bar
+                if rest:
+                    # ostatni pręt: zostaje w grupach, więc resztę dołożą
+                    # krótsze elementy; tu tylko otwieramy go (najtańszy
+                    # krótszy pręt może nie zmieścić całej reszty - wtedy
+                    # pozostałe sztuki idą w następnym obiegu)
+                    stock, n = _best_stock(size, rest, stocks, kerf_cm)
+                    groups.append(_BinGroup(stock, ((name, length),) * n,
+                                            stock + kerf_cm - n * size, 1))
+                    left -= n
+    return groups
+
+
+def summarize(groups, kerf_cm=KERF_CM):
+    """Wynik pogrupowany po długości handlowej + sumy odpadu."""
+    by_stock = {}
+    for g in groups:
+        used = sum(length for _, length in g.cuts)
+        waste = g.stock - used                 # razem z rzazami
+        entry = by_stock.setdefault(g.stock, {"stock_cm": g.stock, "bars": 0, "waste_cm": 0.0, "patterns": []})
+        entry["bars"] += g.count
+        entry["waste_cm"] += waste * g.count
+        cuts = {}
+        for name, length in g.cuts:
+            k = (name, length)
+            cuts[k] = cuts.get(k, 0) + 1
+        entry["patterns"].append({
+            "bars": g.count,
+            "cuts": [{"name": n, "length_cm": l, "count": c} for (n, l), c in cuts.items()],
+            "offcut_cm": max(g.free - kerf_cm, 0.0),
+            "waste_cm": waste,
+        })
+
+    stock_total = sum(e["stock_cm"] * e["bars"] for e in by_stock.values())
+    waste_total = sum(e["waste_cm"] for e in by_stock.values())
+    return {
+        "stock": [by_stock[s] for s in sorted(by_stock)],
+        "totals": {
+            "bars": sum(e["bars"] for e in by_stock.values()),
+            "pieces": sum(p["bars"] * sum(c["count"] for c in p["cuts"])
+                          for e in by_stock.values() for p in e["patterns"]),
+            "stock_cm": stock_total,
+            "used_cm": stock_total - waste_total,
+            "waste_cm": waste_total,
+            "waste_pct": 100.0 * waste_total / stock_total if stock_total else 0.0,
+        },
+    }
+
+
+def cut_list(pieces, stock_lengths=STOCK_LENGTHS_CM, kerf_cm=KERF_CM):
+    """building_pieces(...) (jednego lub wielu budynków) -> rozkrój + podsumowanie."""
+    stocks = sorted(stock_lengths)
+    if not stocks:
+        raise CutListError("brak długości handlowych")
+    flat = split_long(pieces, stocks[-1])
+    return summarize(pack_pieces(flat, stocks, kerf_cm), kerf_cm)
@@ -0,0 +1,166 @@
+import math
+
+# -------------------------
+# Eksport DXF (R12, ASCII) profilu krokwi pod maszyny ciesielskie CNC
+#
+# Profil z wyniku calc_roof_cm, w układzie budynku (cm):
+# - "oś" krokwi z wyników to linia y = x * tan(kąt) przez zewn. górny róg
+#   murłaty; na niej leżą pięty obu siodełek (murłata: (0, 0), płatew:
+#   (x_cm, y_top_cm)), dolna krawędź krokwi jest o siodełko niżej
+# - siodełko: cięcie pionowe (pięta) w dół o notch_depth + poziome (seat)
+#   do dolnej krawędzi; na murłacie seat najwyżej na szerokość murłaty
+# - kalenica: cięcie pionowe w x = połowa rozpiętości; okap: pionowo w x = -okap
+# Potem obrót o -kąt: krokiew leży poziomo, dolna krawędź na v = 0.
+#
+# Plik powstaje w generatorze: nagłówek (wymiary rysunku znane z góry),
+# potem encje porcjami - budynek z setkami krokwi nie leży w pamięci.
+# Jednostki w pliku: mm ($INSUNITS = 4), teksty w CP1250.
+# -------------------------
+MM = 10.0                 # cm -> mm
+TEXT_H_MM = 40.0
+GAP_MM = 150.0            # odstęp między krokwiami na arkuszu
+ROWS_PER_COLUMN = 25
+RAFTERS_PER_CHUNK = 32
+
+LAYERS = (
+    ("KONTUR", 7),        # zamknięty obrys krokwi (z cięciami i siodełkami)
+    ("OPIS", 8),          # teksty
+)
+
+
+def rafter_profile(data):
+    """Obrys krokwi [(u, v), ...] w cm, w układzie krokwi (u po dolnej krawędzi)."""
+    inp = data["input"]
+    res = data["results"]
+    p = data["purlin"]
+
+    a = math.radians(inp["angle_deg"])
+    tan, cos, sin = math.tan(a), math.cos(a), math.sin(a)
+    half = res["polowa_rozpietosci_cm"]
+    eave = inp["eave_out_cm"]
+    d = res["murlata_siodlo_w_dol_cm"]
+    h_vert = inp["rafter_h_cm"] / cos     # wysokość krokwi w pionie
+
+    def bottom(x):
+        return x * tan - d
+
+    def top(x):
+        return bottom(x) + h_vert
+
+    notch = d / tan if tan else 0.0
+    pts = [(-eave, bottom(-eave))]
+    # siodełko na murłacie
+    pts += [(0.0, -d), (0.0, 0.0)]
+    seat = res["murlata_siodlo_poziomo_cm"]
+    pts.append((seat, 0.0))
+    if seat < notch:
+        pts.append((seat, bottom(seat)))   # seat przycięty do murłaty
+    ridge_bottom = (half, bottom(half))
+    # siodełko pod płatew
+    if p and seat <= p["x_cm"] < half:
+        x, y = p["x_cm"], p["y_top_cm"]
+        pts += [(x, bottom(x)), (x, y)]
+        if x + notch < half:
+            pts.append((x + notch, y))
+        else:
+            ridge_bottom = (half, y)
+    pts += [ridge_bottom, (half, top(half)), (-eave, top(-eave))]
+
+    # obrót o -kąt i przesunięcie do (0, 0)
+    local = [(x * cos + y * sin, -x * sin + y * cos) for x, y in pts]
+    u0 = min(u for u, _ in local)
+    v0 = min(v for _, v in local)
+    out = []
+    for u, v in local:
+        q = (u - u0, v - v0)
+        if not out or abs(q[0] - out[-1][0]) > 1e-9 or abs(q[1] - out[-1][1]) > 1e-9:
+            out.append(q)
+    return out
+
+
+def rafter_label(data):
+    res = data["results"]
+    return (f"L={res['dlugosc_krokwi_po_osi_z_okapem_cm'] * MM:.0f} mm  "
+            f"plumb {res['kat_plumb_kalenica_deg']:.2f}°  seat {res['kat_seat_murlata_deg']:.2f}°")
+
+
+# --- zapis DXF ---
+def _f(x):
+    return f"{x:.3f}"
+
+
+def _header(width, height):
+    layers = "".join(f"0\nLAYER\n2\n{name}\n70\n0\n62\n{color}\n6\nCONTINUOUS\n" for name, color in LAYERS)
+    return (
+        "0\nSECTION\n2\nHEADER\n"
+        "9\n$ACADVER\n1\nAC1009\n"
+        "9\n$DWGCODEPAGE\n3\nANSI_1250\n"
+        "9\n$INSUNITS\n70\n4\n"
+        f"9\n$EXTMIN\n10\n0.0\n20\n0.0\n30\n0.0\n"
+        f"9\n$EXTMAX\n10\n{_f(width)}\n20\n{_f(height)}\n30\n0.0\n"
+        "0\nENDSEC\n"
+        "0\nSECTION\n2\nTABLES\n"
+        "0\nTABLE\n2\nLTYPE\n70\n1\n"
+        "0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n40\n0.0\n"
+        "0\nENDTAB\n"
+        f"0\nTABLE\n2\nLAYER\n70\n{len(LAYERS)}\n{layers}"
+        "0\nENDTAB\n"
+        "0\nENDSEC\n"
+        "0\nSECTION\n2\nENTITIES\n"
+    )
+
+
+_FOOTER = "0\nENDSEC\n0\nEOF\n"
+
+
+def _polyline(pts, ox, oy, layer="KONTUR"):
+    parts = [f"0\nPOLYLINE\n8\n{layer}\n66\n1\n10\n0.0\n20\n0.0\n30\n0.0\n70\n1\n"]
+    parts += [f"0\nVERTEX\n8\n{layer}\n10\n{_f(ox + u)}\n20\n{_f(oy + v)}\n30\n0.0\n" for u, v in pts]
+    parts.append(f"0\nSEQEND\n8\n{layer}\n")
+    return "".join(parts)
+
+
+def _text(x, y, text, height=TEXT_H_MM, layer="OPIS"):
+    return f"0\nTEXT\n8\n{layer}\n10\n{_f(x)}\n20\n{_f(y)}\n30\n0.0\n40\n{_f(height)}\n1\n{text}\n"
+
+
+def _encode(s):
+    return s.encode("cp1250", errors="replace")
+
+
+def layout(profile_mm, count):
+    """Pozycje (x, y) kolejnych krokwi na arkuszu + wymiary arkusza (mm)."""
+    w = max(u for u, _ in profile_mm)
+    h = max(v for _, v in profile_mm)
+    row_h = h + TEXT_H_MM * 2 + GAP_MM
+    col_w = w + GAP_MM
+    rows = min(count, ROWS_PER_COLUMN)
+    cols = -(-count // ROWS_PER_COLUMN)
+
+    def pos(i):
+        c, r = divmod(i, ROWS_PER_COLUMN)
+        return c * col_w, (rows - 1 - r) * row_h
+    return pos, cols * col_w - GAP_MM, rows * row_h - GAP_MM
+
+
+def rafters_dxf(data, names):
+    """Generator bajtów pliku DXF: każda krokiew z `names` jako osobny obrys."""
+    profile = [(u * MM, v * MM) for u, v in rafter_profile(data)]
+    label = rafter_label(data)
+    count = len(names)
+    pos, width, height = layout(profile, count)
+    h = max(v for _, v in profile)
+    yield _encode(_header(width, height))
+    for lo in range(0, count, RAFTERS_PER_CHUNK):
+        parts = []
+        for i in range(lo, min(lo + RAFTERS_PER_CHUNK, count)):
+            ox, oy = pos(i)
+            parts.append(_polyline(profile, ox, oy))
+            parts.append(_text(ox, oy + h + TEXT_H_MM * 0.5, f"{names[i]}  {label}"))
+        yield _encode("".join(parts))
+    yield _encode(_FOOTER)
+
+
+def building_rafter_names(per_slope):
+    """L1..Ln (lewa połać), P1..Pn (prawa) - krokwie są identyczne."""
+    return [f"{side}{i}" for side in ("L", "P") for i in range(1, per_slope + 1)]
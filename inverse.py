@@ -0,0 +1,245 @@
+import numpy as np
+
+# -------------------------
+# Zadanie odwrotne: kąt dachu z zadanej wartości wyniku (+ wysokość płatwi)
+#
+# Klient podaje np. wysokość kalenicy albo długość krokwi zamiast kąta;
+# pozostałe wejścia są stałe, szukamy angle_deg takiego, że calc_roof_cm
+# daje zadaną wartość. Dla kluczy z CLOSED_FORM wzór jest odwracalny
+# wprost (atan/acos/asin), dla pozostałych (płatew) - Newton z pochodną
+# z różnicy skończonej, zabezpieczony bisekcją w przedziale z różnymi
+# znakami na końcach. Wszystko na tablicach (tysiące zapytań naraz).
+#
+# Płatew: purlin_s_cm = zadane miejsce po krokwi (od zewn. krawędzi
+# murłaty) -> purlin_top_above_wallplate_cm = s * sin(kąt) (tryb "po
+# wysokości góry", jak w formularzu).
+#
+# Na końcu liczymy wynik w przód (forward = calc_roof_cm_batch) i
+# sprawdzamy clampy calc_roof_cm. Niewykonalne jest tylko zapytanie, w którym
+# clamp przycina sam cel (CLAMPED_TARGETS) albo wynik w przód odbiega od
+# zadanej wartości; clamp innej wielkości (np. siodło przy celu "wysokość
+# kalenicy") to tylko ostrzeżenie (warnings).
+# -------------------------
+STATUSES = (
+    "ok",
+    "poza_zakresem",    # żaden kąt z przedziału nie daje zadanej wartości
+    "zacisk_platew",    # płatew poza krokwią (clamp s / y_top)
+    "zacisk_murlata",   # siodło szersze niż murłata (min z wallplate_w_cm)
+    "brak_platwi",      # cel "purlin_*", a płatew wyłączona
+    "rozbiezny",        # wynik w przód odbiega od zadanej wartości
+)
+NEWTON_MAX_ITER = 60
+ANGLE_TOL_DEG = 1e-10
+DIFF_STEP_DEG = 1e-7
+EDGE_DEG = 1e-6       # przedział numeryczny bez 0° i 90° (tan = 0 / cos = 0)
+CLAMP_TOL_CM = 1e-9
+ACHIEVED_RTOL = 1e-7
+ACHIEVED_ATOL = 1e-7
+PURLIN_S_COL = "_purlin_s_cm"   # kolumna z purlin_s_cm przekazywana przez solve_numeric
+
+
+class InverseError(ValueError):
+    pass
+
+
+def _half(c):
+    return c["span_cm"] / 2.0
+
+def _depth(c):
+    return np.maximum(0, np.minimum(0.33 * c["rafter_h_cm"], c["bearing_cm"]))
+
+
+# klucz -> f(kolumny, zadane wartości) = kąt w stopniach (NaN gdy brak rozwiązania)
+CLOSED_FORM = {
+    "wysokosc_kalenicy_nad_gora_murlaty_cm": lambda c, v: np.degrees(np.arctan2(v, _half(c))),
+    "dlugosc_krokwi_po_osi_bez_okapu_cm": lambda c, v: np.degrees(np.arccos(_half(c) / v)),
+    "dlugosc_krokwi_po_osi_z_okapem_cm": lambda c, v: np.degrees(np.arccos((_half(c) + c["eave_out_cm"]) / v)),
+    "kat_plumb_kalenica_deg": lambda c, v: v,
+    "kat_seat_murlata_deg": lambda c, v: 90.0 - v,
+    "murlata_siodlo_poziomo_cm": lambda c, v: np.degrees(np.arctan2(_depth(c), v)),
+    "murlata_siodlo_po_krokwi_cm": lambda c, v: np.degrees(np.arcsin(_depth(c) / v)),
+    "purlin_notch_horiz_cm": lambda c, v: np.degrees(np.arctan2(_depth(c), v)),
+    "purlin_notch_along_rafter_cm": lambda c, v: np.degrees(np.arcsin(_depth(c) / v)),
+}
+
+
+# status clampu -> cele, które ten clamp przycina (tylko dla nich zapytanie jest niewykonalne)
+CLAMPED_TARGETS = {
+    2: frozenset("purlin_" + k for k in (
+        "x_cm", "s_cm", "y_top_cm", "y_bottom_cm", "bottom_from_bottom_wallplate_cm")),
+    3: frozenset(("murlata_siodlo_poziomo_cm",)),
+}
+
+
+# nie zależą od kąta - nie da się z nich wyznaczyć kąta
+ANGLE_INDEPENDENT = frozenset((
+    "polowa_rozpietosci_cm", "murlata_siodlo_w_dol_cm",
+    "purlin_purlin_section_h_cm", "purlin_notch_depth_cm",
+))
+
+
+def target_keys(result_fields, purlin_fields):
+    """Dozwolone klucze: pola "results" i "purlin_<pole>" (jak kolumny CSV)."""
+    keys = tuple(result_fields) + tuple("purlin_" + k for k in purlin_fields)
+    return tuple(k for k in keys if k not in ANGLE_INDEPENDENT)
+
+
+def _pick(out, key):
+    if key.startswith("purlin_"):
+        return out["purlin"][key[len("purlin_"):]]
+    return out["results"][key]
+
+
+def _at(forward, cols, key, angle):
+    return _pick(forward({**cols, "angle_deg": angle}), key)
+
+
+def _place_purlin(cols, s):
+    """Kolumny z płatwią w s po krokwi (NaN = bez zmian): tryb po wysokości
+    góry, góra = s * sin(kąt) - liczone dla kąta z cols["angle_deg"]."""
+    given = ~np.isnan(s)
+    return {
+        **cols,
+        "purlin_enabled": np.where(given, 1.0, cols["purlin_enabled"]),
+        "purlin_s_from_outer_wallplate_cm": np.where(given, 0.0, cols["purlin_s_from_outer_wallplate_cm"]),
+        "purlin_top_above_wallplate_cm": np.where(
+            given, s * np.sin(np.radians(cols["angle_deg"])), cols["purlin_top_above_wallplate_cm"]),
+    }
+
+
+def _with_purlin_s(forward):
+    """forward, który płatew z kolumny PURLIN_S_COL stawia przy każdym kącie
+    (Newton zmienia kąt, więc i wysokość góry płatwi)."""
+    def fwd(cols):
+        cols = dict(cols)
+        return forward(_place_purlin(cols, cols.pop(PURLIN_S_COL)))
+    return fwd
+
+
+def solve_numeric(forward, cols, key, target, lo, hi):
+    """Newton + bisekcja w [lo, hi] dla każdego wiersza -> (kąty, liczba iteracji).
+
+    Wymaga zmiany znaku f(kąt) - cel na końcach przedziału (wartość monotoniczna
+    po kącie, jak wszystkie wyniki calc_roof_cm); inaczej NaN. Gdy wartość
+    w części przedziału nie zależy od kąta (płatew po krokwi, clampy), wynik
+    to jeden z kątów dających cel.
+    """
+    n = target.shape[0]
+    a = np.full(n, lo)
+    b = np.full(n, hi)
+    fa = _at(forward, cols, key, a) - target
+    fb = _at(forward, cols, key, b) - target
+    x = np.where(fa == 0, a, np.where(fb == 0, b, np.nan))
+    active = np.isnan(x) & (np.sign(fa) * np.sign(fb) < 0)
+    x[active] = 0.5 * (lo + hi)
+
+    it = 0
+    while active.any() and it < NEWTON_MAX_ITER:
+        it += 1
+        idx = np.flatnonzero(active)
+        sub = {k: v[idx] for k, v in cols.items()}
+        xi, ai, bi, fai = x[idx], a[idx], b[idx], fa[idx]
+        f0 = _at(forward, sub, key, xi) - target[idx]
+        h = np.where(xi + DIFF_STEP_DEG < bi, DIFF_STEP_DEG, -DIFF_STEP_DEG)
+        d = (_at(forward, sub, key, xi + h) - target[idx] - f0) / h
+
+        # zawężenie przedziału: xi zastępuje koniec o tym samym znaku
+        left = np.sign(f0) == np.sign(fai)
+        a[idx] = np.where(left, xi, ai)
+        fa[idx] = np.where(left, f0, fai)
+        b[idx] = np.where(left, bi, xi)
+
+        step = xi - f0 / d
+        inside = np.isfinite(step) & (step > a[idx]) & (step < b[idx])
+        new = np.where(inside, step, 0.5 * (a[idx] + b[idx]))
+        new = np.where(f0 == 0, xi, new)
+        x[idx] = new
+        done = (f0 == 0) | (np.abs(new - xi) < ANGLE_TOL_DEG) | (b[idx] - a[idx] < ANGLE_TOL_DEG)
+        active[idx[done]] = False
+    return x, it
+
+
+def solve(forward, cols, key, values, purlin_s_cm=None,
+          angle_min_deg=0.0, angle_max_deg=90.0, method="auto"):
+    """Kąty (i wysokości płatwi) dla n zapytań.
+
+    forward: calc_roof_cm_batch; cols: kolumny float64 długości n (angle_deg
+    ignorowany); values: zadane wartości klucza key; purlin_s_cm: None albo
+    tablica (NaN = bez zadanej płatwi w tym wierszu).
+    Zwraca dict: angle_deg, purlin_top_above_wallplate_cm, status (indeksy
+    STATUSES), achieved (wartość key z liczenia w przód), warnings (nazwa
+    clampu -> maska wierszy, w których zadziałał poza celem), method,
+    iterations, out (wynik forward dla rozwiązań).
+    """
+    if method not in ("auto", "numeric"):
+        raise InverseError("method: auto albo numeric")
+    if not 0.0 <= angle_min_deg < angle_max_deg <= 90.0:
+        raise InverseError("wymagane 0 <= angle_min_deg < angle_max_deg <= 90")
+    if key in ANGLE_INDEPENDENT:
+        raise InverseError(f"{key} nie zależy od kąta")
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[0]
+    enabled = cols["purlin_enabled"] != 0
+    if purlin_s_cm is not None:
+        enabled = enabled | ~np.isnan(np.asarray(purlin_s_cm, dtype=np.float64))
+    no_purlin = ~enabled if key.startswith("purlin_") else np.zeros(n, dtype=bool)
+
+    with np.errstate(all="ignore"):
+        if method == "auto" and key in CLOSED_FORM:
+            angle = np.array(CLOSED_FORM[key](cols, values), dtype=np.float64)
+            method, iterations = "analityczna", 0
+        else:
+            lo = max(angle_min_deg, EDGE_DEG)
+            hi = min(angle_max_deg, 90.0 - EDGE_DEG)
+            if purlin_s_cm is None:
+                angle, iterations = solve_numeric(forward, cols, key, values, lo, hi)
+            else:
+                placed = {**cols, PURLIN_S_COL: np.asarray(purlin_s_cm, dtype=np.float64)}
+                angle, iterations = solve_numeric(_with_purlin_s(forward), placed, key, values, lo, hi)
+            method = "numeryczna"
+
+        status = np.zeros(n, dtype=np.int8)
+        angle[no_purlin] = np.nan
+        bad = ~((angle > 0) & (angle < 90) & (angle >= angle_min_deg) & (angle <= angle_max_deg))
+        angle = np.where(bad, np.nan, angle)
+        status[bad] = 1
+
+        solved = dict(cols)
+        solved["angle_deg"] = angle
+        if purlin_s_cm is not None:
+            solved = _place_purlin(solved, np.asarray(purlin_s_cm, dtype=np.float64))
+        out = forward(solved)
+
+        # clampy z calc_roof_cm, które przy tym kącie by zadziałały
+        res = out["results"]
+        tol = CLAMP_TOL_CM
+        by_rafter = solved["purlin_s_from_outer_wallplate_cm"] > 0
+        purlin_clamped = (solved["purlin_enabled"] != 0) & np.where(
+            by_rafter,
+            solved["purlin_s_from_outer_wallplate_cm"] > res["dlugosc_krokwi_po_osi_bez_okapu_cm"] * (1 + 1e-12) + tol,
+            (solved["purlin_top_above_wallplate_cm"] < -tol) |
+            (solved["purlin_top_above_wallplate_cm"] > res["wysokosc_kalenicy_nad_gora_murlaty_cm"] * (1 + 1e-12) + tol),
+        )
+        seat_clamped = out["purlin"]["notch_horiz_cm"] > cols["wallplate_w_cm"] * (1 + 1e-12) + tol
+        achieved = _pick(out, key)
+        off_target = ~(np.abs(achieved - values) <= ACHIEVED_RTOL * np.abs(values) + ACHIEVED_ATOL)
+
+    warnings = {}
+    for code, clamped in ((2, purlin_clamped), (3, seat_clamped)):
+        if key in CLAMPED_TARGETS[code]:
+            status[(status == 0) & clamped] = code
+        else:
+            warnings[STATUSES[code]] = clamped & ~np.isnan(angle)
+    status[(status == 0) & off_target] = 5
+    status[no_purlin] = 4
+
+    return {
+        "angle_deg": angle,
+        "purlin_top_above_wallplate_cm": solved["purlin_top_above_wallplate_cm"],
+        "status": status,
+        "achieved": achieved,
+        "warnings": warnings,
+        "method": method,
+        "iterations": iterations,
+        "out": out,
+    }
@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# -------------------------
+# Kolejka zadań w tle (bez zewnętrznego brokera)
+# - stan zadań w SQLite (WAL), wyniki jako pliki w katalogu obok
+# - ograniczona liczba wątków + limit oczekujących (backpressure)
+# - wyniki wygasają po ttl_s
+# Zadanie = funkcja task(progress, out_path) -> media_type; progress(x, msg=None)
+# z x w [0, 1]. Zadania żyją w pamięci procesu: po restarcie niedokończone
+# są oznaczane jako "failed".
+# -------------------------
+EXTENSIONS = {
+    "application/json": ".json",
+    "application/x-ndjson": ".ndjson",
+    "text/csv": ".csv",
+    "application/pdf": ".pdf",
+}
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _pid_alive(pid):
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobRunner:
+    def __init__(self, root_dir, workers=2, max_pending=16, ttl_s=24 * 3600.0, cleanup_every_s=60.0):
+        self.root_dir = root_dir
+        self.ttl_s = ttl_s
+        self.max_pending = max_pending
+        self.cleanup_every_s = cleanup_every_s
+        os.makedirs(root_dir, exist_ok=True)
+        self.db_path = os.path.join(root_dir, "jobs.sqlite3")
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,          -- queued | running | done | failed
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result_path TEXT,
+                    media_type TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    expires REAL NOT NULL,
+                    owner INTEGER                  -- pid procesu, który wykonuje zadanie
+                )""")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires)")
+            # zadania procesów, których już nie ma (restart), nie wrócą;
+            # zadania innych żywych workerów zostawiamy w spokoju
+            owners = db.execute(
+                "SELECT DISTINCT owner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+            dead = [(o,) for (o,) in owners if not _pid_alive(o)]
+            db.executemany(
+                "UPDATE jobs SET status = 'failed', message = 'przerwane (restart serwera)' "
+                "WHERE status IN ('queued', 'running') AND owner IS ?", dead)
+
+    @contextmanager
+    def _db(self):
+        # osobne połączenie na operację: bezpieczne między wątkami
+        db = sqlite3.connect(self.db_path, timeout=10.0)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._db() as db:
+            db.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, kind, task):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"za dużo zadań w kolejce (max {self.max_pending})")
+            self._pending += 1
+
+        try:
+            self.cleanup()
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            with self._db() as db:
+                db.execute(
+                    "INSERT INTO jobs (id, kind, status, created, updated, expires, owner) "
+                    "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                    (job_id, kind, now, now, now + self.ttl_s, os.getpid()))
+            self._pool.submit(self._run, job_id, task)
+        except BaseException:
+            # zadanie nie trafiło do puli: _run nie zwolni miejsca w kolejce
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def _run(self, job_id, task):
+        base = os.path.join(self.root_dir, job_id)
+        last = [0.0]
+
+        def progress(x, message=None):
+            # nie piszemy do bazy częściej niż co 0.25 s
+            now = time.monotonic()
+            if now - last[0] >= 0.25 or x >= 1.0:
+                last[0] = now
+                self._update(job_id, progress=min(max(float(x), 0.0), 1.0), message=message)
+
+        try:
+            self._update(job_id, status="running")
+            media_type = task(progress, base + ".part")
+            path = base + EXTENSIONS.get(media_type, ".bin")
+            os.replace(base + ".part", path)
+            self._update(job_id, status="done", progress=1.0, message=None, result_path=path, media_type=media_type,
+                         expires=time.time() + self.ttl_s)
+        except Exception as e:
+            if os.path.exists(base + ".part"):
+                os.unlink(base + ".part")
+            self._update(job_id, status="failed", message=f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id):
+        with self._db() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute("SELECT * FROM jobs WHERE id = ? AND expires >= ?", (job_id, time.time())).fetchone()
+        return dict(row) if row else None
+
+    def stats(self):
+        with self._db() as db:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        with self._lock:
+            pending = self._pending
+        return {"pending": pending, "max_pending": self.max_pending, "by_status": counts}
+
+    def cleanup(self, force=False):
+        """Usuwa wygasłe zadania i ich pliki (najwyżej raz na cleanup_every_s)."""
+        now = time.time()
+        if not force and now - self._last_cleanup < self.cleanup_every_s:
+            return
+        self._last_cleanup = now
+        with self._db() as db:
+            rows = db.execute(
+                "SELECT id, result_path FROM jobs WHERE expires < ? AND status IN ('done', 'failed')",
+                (now,)).fetchall()
+            for job_id, path in rows:
+                if path and os.path.exists(path):
+                    os.unlink(path)
+            db.executemany("DELETE FROM jobs WHERE id = ?", [(r[0],) for r in rows])
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
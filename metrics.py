@@ -0,0 +1,254 @@
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter as _Counter, OrderedDict
+from contextlib import contextmanager
+
+# -------------------------
+# Metryki w formacie Prometheus (bez zależności)
+# - Counter / Histogram z etykietami, rejestr renderuje /metrics
+# - kolektory: funkcje wołane przy renderze (np. statystyki cache)
+# - MetricsMiddleware (czyste ASGI): liczba i czas zapytań per route,
+#   opcjonalnie profil próbkujący włączany nagłówkiem
+# Metryki są per proces (przy kilku workerach każdy ma swoje).
+# -------------------------
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """fn() -> [(nazwa, typ, opis, [(dict etykiet, wartość), ...]), ...]"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for m in self._metrics:
+            m.render(lines)
+        for fn in self._collectors:
+            for name, kind, help_, samples in fn():
+                lines.append(f"# HELP {name} {help_}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    def __init__(self, name, help_, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help_
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, v in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_num(v)}")
+
+
+class Histogram:
+    def __init__(self, name, help_, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.name = name
+        self.help = help_
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # etykiety -> [liczniki kubełków (+Inf na końcu), suma]
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            s[0][i] += 1
+            s[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._series.items())
+        for labels, (counts, total) in items:
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le_label = 'le="%s"' % _num(le)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le_label)} {acc}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {acc}")
+
+
+HTTP_REQUESTS = Counter(
+    "dach_http_requests_total", "Liczba zapytań HTTP", ("method", "route", "status"))
+HTTP_SECONDS = Histogram(
+    "dach_http_request_seconds", "Czas obsługi zapytania (do wysłania całej odpowiedzi)", ("method", "route"))
+
+
+# -------------------------
+# Profiler próbkujący (na żądanie, per zapytanie)
+# Wątek co interval_s zbiera stosy wszystkich wątków (sys._current_frames),
+# pomija bezczynne (czekanie na lock/select/kolejkę) i zlicza je w formacie
+# "collapsed stacks" (flamegraph.pl, speedscope). Próbkuje cały proces w czasie
+# trwania zapytania, więc równoległe zapytania też trafią do profilu.
+# -------------------------
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "base_events.py")
+
+
+class SamplingProfiler:
+    def __init__(self, interval_s=0.002, keep=20):
+        self.interval_s = interval_s
+        self.keep = keep
+        self._profiles = OrderedDict()   # id -> tekst collapsed stacks
+        self._running = {}               # id -> wątek, który jeszcze nie zapisał profilu
+        self._lock = threading.Lock()
+
+    def new_id(self):
+        return uuid.uuid4().hex[:16]
+
+    @contextmanager
+    def profile(self, profile_id):
+        """Próbkowanie na czas bloku; wołane z pętli zdarzeń, więc na końcu
+        tylko sygnał dla wątku - profil zapisuje sam wątek (bez join)."""
+        stacks = _Counter()
+        stop = threading.Event()
+        me = []
+
+        def sample():
+            me.append(threading.get_ident())
+            while not stop.wait(self.interval_s):
+                for tid, frame in sys._current_frames().items():
+                    if tid == me[0]:
+                        continue
+                    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                        frame = frame.f_back
+                    stacks[";".join(reversed(stack))] += 1
+            text = "".join(f"{s} {n}\n" for s, n in stacks.most_common())
+            with self._lock:
+                self._running.pop(profile_id, None)
+                self._profiles[profile_id] = text
+                while len(self._profiles) > self.keep:
+                    self._profiles.popitem(last=False)
+
+        t = threading.Thread(target=sample, name="profiler", daemon=True)
+        with self._lock:
+            self._running[profile_id] = t
+        t.start()
+        try:
+            yield
+        finally:
+            stop.set()
+
+    def get(self, profile_id, timeout_s=1.0):
+        # profil pobrany tuż po odpowiedzi: wątek mógł jeszcze nie skończyć
+        # (wołane z puli wątków, nie z pętli zdarzeń)
+        with self._lock:
+            t = self._running.get(profile_id)
+        if t is not None:
+            t.join(timeout_s)
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+class MetricsMiddleware:
+    """Czyste ASGI: mierzy do końca odpowiedzi (też dla StreamingResponse).
+
+    Profil: gdy profile_token jest ustawiony i nagłówek X-Profile == token,
+    zapytanie jest profilowane, a odpowiedź dostaje X-Profile-Id.
+    """
+
+    def __init__(self, app, profiler=None, profile_token=None):
+        self.app = app
+        self.profiler = profiler
+        self.profile_token = profile_token
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile_id = None
+        if self.profiler is not None and self.profile_token:
+            for k, v in scope["headers"]:
+                if k == b"x-profile" and v.decode("latin-1") == self.profile_token:
+                    profile_id = self.profiler.new_id()
+                    break
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if profile_id:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            if profile_id:
+                with self.profiler.profile(profile_id):
+                    await self.app(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(scope["method"], path, str(status[0]))
+            HTTP_SECONDS.observe(time.perf_counter() - t0, scope["method"], path)
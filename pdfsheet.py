@@ -0,0 +1,167 @@
+import os
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+# -------------------------
+# Karta cięć (PDF, reportlab)
+# Funkcje tutaj działają w procesach roboczych (ProcessPoolExecutor):
+# dostają gotowe, "płaskie" dane strony (tabele + operacje rysunków
+# z svgdraw.RecordingDrawing), nic nie liczą i nie importują app.
+# -------------------------
+PAGE = landscape(A4)
+MARGIN = 28
+
+# Standardowe fonty PDF nie mają polskich znaków -> szukamy TTF z pełnym
+# zestawem (DejaVu), a jak go nie ma: Helvetica + transliteracja.
+FONT_PATHS = (
+    os.environ.get("DACH_PDF_FONT", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/Library/Fonts/DejaVuSans.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+)
+_ASCII = str.maketrans("ąćęłńóśźżĄĆĘŁŃÓŚŹŻ–°", "acelnoszzACELNOSZZ-o")
+
+_font = None
+
+
+def _setup_font():
+    global _font
+    if _font is None:
+        _font = ("Helvetica", True)
+        for path in FONT_PATHS:
+            if path and os.path.exists(path):
+                pdfmetrics.registerFont(TTFont("SheetFont", path))
+                _font = ("SheetFont", False)
+                break
+    return _font
+
+
+def _txt(s, ascii_only):
+    return s.translate(_ASCII) if ascii_only else s
+
+
+def _color(c):
+    # "#0b6" -> "#00bb66"
+    if len(c) == 4:
+        c = "#" + "".join(ch * 2 for ch in c[1:])
+    return HexColor(c)
+
+
+def _draw_ops(c, drawing, x0, y_top, width, font, ascii_only):
+    """Odtwarza operacje RecordingDrawing w prostokącie (x0, y_top, width)."""
+    w_px, h_px, ops = drawing
+    k = width / w_px
+
+    def X(px): return x0 + px * k
+    def Y(py): return y_top - py * k   # SVG: y w dół, PDF: y w górę
+
+    c.setStrokeColor(_color("#ddd"))
+    c.setLineWidth(0.5)
+    c.rect(x0, y_top - h_px * k, width, h_px * k)
+
+    for op in ops:
+        kind = op[0]
+        if kind == "line":
+            _, x1, y1, x2, y2, stroke, w, dash = op
+            c.setStrokeColor(_color(stroke))
+            c.setLineWidth(w * k)
+            c.setDash([float(v) * k for v in dash.split(",")] if dash else [])
+            c.line(X(x1), Y(y1), X(x2), Y(y2))
+        elif kind == "polyline":
+            _, pts, stroke, w, fill = op
+            c.setStrokeColor(_color(stroke))
+            c.setLineWidth(w * k)
+            c.setDash([])
+            path = c.beginPath()
+            path.moveTo(X(pts[0][0]), Y(pts[0][1]))
+            for px, py in pts[1:]:
+                path.lineTo(X(px), Y(py))
+            c.drawPath(path, stroke=1, fill=0)
+        elif kind == "text":
+            _, px, py, t, size, color, anchor = op
+            c.setFillColor(_color(color))
+            c.setFont(font, size * k)
+            if anchor == "middle":
+                c.drawCentredString(X(px), Y(py), _txt(t, ascii_only))
+            else:
+                c.drawString(X(px), Y(py), _txt(t, ascii_only))
+    c.setDash([])
+
+
+def draw_page(c, page):
+    """Jedna strona karty cięć.
+
+    page: {"title": str, "subtitle": str,
+           "sections": [(nagłówek, [(opis, wartość), ...]), ...],
+           "drawings": [RecordingDrawing.render(), ...]}
+    """
+    font, ascii_only = _setup_font()
+    pw, ph = PAGE
+
+    c.setFillColor(_color("#111"))
+    c.setFont(font, 15)
+    c.drawString(MARGIN, ph - MARGIN - 10, _txt(page["title"], ascii_only))
+    c.setFont(font, 9)
+    c.setFillColor(_color("#666"))
+    c.drawString(MARGIN, ph - MARGIN - 24, _txt(page["subtitle"], ascii_only))
+
+    # lewa kolumna: tabele wymiarów
+    col_w = 300
+    y = ph - MARGIN - 48
+    for head, rows in page["sections"]:
+        c.setFillColor(_color("#111"))
+        c.setFont(font, 10.5)
+        c.drawString(MARGIN, y, _txt(head, ascii_only))
+        y -= 15
+        c.setFont(font, 9)
+        for label, value in rows:
+            c.setFillColor(_color("#444"))
+            c.drawString(MARGIN + 6, y, _txt(label, ascii_only))
+            c.setFillColor(_color("#111"))
+            c.drawRightString(MARGIN + col_w, y, _txt(value, ascii_only))
+            c.setStrokeColor(_color("#eee"))
+            c.setLineWidth(0.5)
+            c.line(MARGIN + 6, y - 4, MARGIN + col_w, y - 4)
+            y -= 14
+        y -= 10
+
+    # prawa kolumna: rysunki jeden pod drugim
+    x0 = MARGIN + col_w + 24
+    width = pw - x0 - MARGIN
+    y_top = ph - MARGIN - 40
+    for drawing in page["drawings"]:
+        _draw_ops(c, drawing, x0, y_top, width, font, ascii_only)
+        y_top -= drawing[1] * width / drawing[0] + 12
+
+    c.showPage()
+
+
+def render_pdf(pages):
+    """Strony -> bajty PDF (do małych dokumentów, np. /pdf)."""
+    from io import BytesIO
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=PAGE, pageCompression=1)
+    for page in pages:
+        draw_page(c, page)
+    c.save()
+    return buf.getvalue()
+
+
+def render_pdf_to_file(pages, path):
+    """Strony (lista albo generator) -> plik PDF na dysku; zwraca liczbę stron.
+
+    Dla dużych dokumentów: PDF (w pamięci canvasu do save()) żyje tylko
+    w procesie roboczym, proces web strumieniuje gotowy plik do klienta.
+    """
+    c = canvas.Canvas(path, pagesize=PAGE, pageCompression=1)
+    n = 0
+    for page in pages:
+        draw_page(c, page)
+        n += 1
+    c.save()
+    return n
@@ -0,0 +1,273 @@
+import base64
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import orjson
+
+# -------------------------
+# Projekty dachów w SQLite: wejścia + policzony wynik, klient/budowa/tagi
+#
+# - WAL: czytający nie blokują piszącego, więc kilka workerów uvicorna
+#   na jednym pliku pisze bez czekania na odczyty; zapisy to krótkie
+#   transakcje BEGIN IMMEDIATE (blokada od razu, bez deadlocka przy
+#   podnoszeniu), busy_timeout czeka na drugi proces zamiast błędu
+# - pula połączeń na proces (sqlite3 z check_same_thread=False, jedno
+#   połączenie używa naraz tylko jeden wątek)
+# - lista: stronicowanie po kluczu (updated, id) malejąco - kursor to
+#   ostatni zwrócony wiersz, więc kolejne strony kosztują tyle co pierwsza
+#   (bez OFFSET); indeksy pod każdy filtr z tym samym porządkiem
+# - wynik trzymany jako gotowy JSON (RoofResult.json()) razem z kluczem
+#   wejścia i wersją wzorów; ten sam klucz i wersja -> wynik prosto z bazy
+# Moduł nie zna wzorów: klucz, wynik i wersję podaje app.py.
+# -------------------------
+LIST_MAX_LIMIT = 500
+MAX_TAGS = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL COLLATE NOCASE,
+    client TEXT NOT NULL DEFAULT '',
+    site TEXT NOT NULL DEFAULT '',
+    inputs BLOB NOT NULL,          -- JSON: pole -> wartość (jak /api/calc)
+    roof_key BLOB NOT NULL,        -- JSON: znormalizowany klucz (roof_key)
+    version TEXT NOT NULL,         -- CACHE_VERSION z chwili liczenia
+    result BLOB NOT NULL,          -- gotowa odpowiedź /api/calc
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_updated ON projects (updated DESC, id DESC);
+CREATE INDEX IF NOT EXISTS projects_client ON projects (client, updated DESC, id DESC);
+CREATE INDEX IF NOT EXISTS projects_site ON projects (site, updated DESC, id DESC);
+CREATE INDEX IF NOT EXISTS projects_name ON projects (name);
+-- "updated" powielone z projects, żeby strona po tagu szła jednym indeksem
+CREATE TABLE IF NOT EXISTS project_tags (
+    tag TEXT NOT NULL,
+    project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    updated REAL NOT NULL,
+    PRIMARY KEY (tag, project_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS project_tags_updated ON project_tags (tag, updated DESC, project_id DESC);
+CREATE INDEX IF NOT EXISTS project_tags_project ON project_tags (project_id);
+"""
+
+LIST_COLUMNS = ("id", "name", "client", "site", "inputs", "created", "updated")
+
+
+class ProjectError(ValueError):
+    pass
+
+
+def encode_cursor(updated, project_id):
+    return base64.urlsafe_b64encode(orjson.dumps([updated, project_id])).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        updated, project_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(updated), int(project_id)
+    except (ValueError, TypeError):
+        raise ProjectError("nieprawidłowy kursor")
+
+
+def normalize_tags(tags):
+    out = sorted({t.strip() for t in tags or () if t and t.strip()})
+    if len(out) > MAX_TAGS:
+        raise ProjectError(f"maksymalnie {MAX_TAGS} tagów")
+    return out
+
+
+class ProjectStore:
+    def __init__(self, path, pool_size=8, busy_timeout_s=10.0):
+        self.path = path
+        self.busy_timeout_s = busy_timeout_s
+        self._pool = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._all = []
+        with self._conn() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    # --- połączenia ---
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=self.busy_timeout_s, isolation_level=None,
+                             check_same_thread=False)
+        db.execute("PRAGMA foreign_keys=ON")
+        db.execute("PRAGMA synchronous=NORMAL")   # w WAL: trwałe po checkpoint, szybkie commity
+        with self._lock:
+            self._all.append(db)
+        return db
+
+    @contextmanager
+    def _conn(self):
+        self._slots.acquire()
+        try:
+            try:
+                db = self._pool.get_nowait()
+            except queue.Empty:
+                db = self._connect()
+            try:
+                yield db
+            finally:
+                self._pool.put(db)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def _write(self):
+        with self._conn() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            conns, self._all = self._all, []
+        for db in conns:
+            db.close()
+
+    # --- zapis ---
+    def create(self, name, client, site, tags, inputs, roof_key, version, result):
+        tags = normalize_tags(tags)
+        now = time.time()
+        with self._write() as db:
+            cur = db.execute(
+                "INSERT INTO projects (name, client, site, inputs, roof_key, version, result, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, client, site, orjson.dumps(inputs), orjson.dumps(list(roof_key)), version, result,
+                 now, now))
+            project_id = cur.lastrowid
+            db.executemany("INSERT INTO project_tags (tag, project_id, updated) VALUES (?, ?, ?)",
+                           [(t, project_id, now) for t in tags])
+        return project_id
+
+    def update(self, project_id, compute=None, **fields):
+        """Zmienia pola (name, client, site, tags, inputs); compute(stary klucz,
+        stara wersja) -> None albo (roof_key, version, result) gdy trzeba przeliczyć.
+        Zwraca False, gdy nie ma projektu.
+        """
+        tags = fields.pop("tags", None)
+        if tags is not None:
+            tags = normalize_tags(tags)
+        with self._write() as db:
+            row = db.execute("SELECT roof_key, version FROM projects WHERE id = ?", (project_id,)).fetchone()
+            if row is None:
+                return False
+            if "inputs" in fields:
+                fields["inputs"] = orjson.dumps(fields["inputs"])
+            if compute is not None:
+                fresh = compute(tuple(orjson.loads(row[0])), row[1])
+                if fresh is not None:
+                    fields["roof_key"] = orjson.dumps(list(fresh[0]))
+                    fields["version"], fields["result"] = fresh[1], fresh[2]
+            fields["updated"] = time.time()
+            cols = ", ".join(f"{k} = ?" for k in fields)
+            db.execute(f"UPDATE projects SET {cols} WHERE id = ?", (*fields.values(), project_id))
+            if tags is not None:
+                db.execute("DELETE FROM project_tags WHERE project_id = ?", (project_id,))
+                db.executemany("INSERT INTO project_tags (tag, project_id, updated) VALUES (?, ?, ?)",
+                               [(t, project_id, fields["updated"]) for t in tags])
+            else:
+                db.execute("UPDATE project_tags SET updated = ? WHERE project_id = ?",
+                           (fields["updated"], project_id))
+        return True
+
+    def store_result(self, project_id, roof_key, version, result):
+        """Zapis przeliczonego wyniku bez zmiany "updated" (np. po zmianie wzorów)."""
+        with self._write() as db:
+            db.execute("UPDATE projects SET roof_key = ?, version = ?, result = ? WHERE id = ?",
+                       (orjson.dumps(list(roof_key)), version, result, project_id))
+
+    def delete(self, project_id):
+        with self._write() as db:
+            return db.execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount > 0
+
+    # --- odczyt ---
+    def _tags(self, db, ids):
+        out = {i: [] for i in ids}
+        if ids:
+            marks = ",".join("?" * len(ids))
+            for pid, tag in db.execute(
+                    f"SELECT project_id, tag FROM project_tags WHERE project_id IN ({marks}) ORDER BY tag", ids):
+                out[pid].append(tag)
+        return out
+
+    def _row(self, row, tags):
+        item = dict(zip(LIST_COLUMNS, row))
+        item["inputs"] = orjson.loads(item["inputs"])
+        item["tags"] = tags
+        return item
+
+    def get(self, project_id):
+        """Projekt (bez wyniku) albo None."""
+        with self._conn() as db:
+            row = db.execute(f"SELECT {', '.join(LIST_COLUMNS)} FROM projects WHERE id = ?",
+                             (project_id,)).fetchone()
+            if row is None:
+                return None
+            return self._row(row, self._tags(db, [project_id])[project_id])
+
+    def result(self, project_id):
+        """(roof_key, version, gotowy JSON) albo None."""
+        with self._conn() as db:
+            row = db.execute("SELECT roof_key, version, result FROM projects WHERE id = ?",
+                             (project_id,)).fetchone()
+        if row is None:
+            return None
+        return tuple(orjson.loads(row[0])), row[1], row[2]
+
+    def list(self, client=None, site=None, tag=None, name_prefix=None, limit=50, cursor=None):
+        """Strona projektów (najnowsze najpierw) -> (lista, kursor następnej strony albo None).
+
+        name_prefix: początek nazwy bez rozróżniania wielkości liter (indeks po nazwie).
+        """
+        if not 1 <= limit <= LIST_MAX_LIMIT:
+            raise ProjectError(f"limit: 1..{LIST_MAX_LIMIT}")
+        where, args = [], []
+        # z tagiem porządek i kursor po kolumnach project_tags (ich indeks)
+        order = "p"
+        source = "projects p"
+        if tag is not None:
+            source = "project_tags t JOIN projects p ON p.id = t.project_id"
+            order = "t"
+            where.append("t.tag = ?")
+            args.append(tag)
+        if client is not None:
+            where.append("p.client = ?")
+            args.append(client)
+        if site is not None:
+            where.append("p.site = ?")
+            args.append(site)
+        if name_prefix:
+            escaped = name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("p.name LIKE ? ESCAPE '\\'")
+            args.append(escaped + "%")
+        pid = "t.project_id" if order == "t" else "p.id"
+        if cursor:
+            where.append(f"({order}.updated, {pid}) < (?, ?)")
+            args.extend(decode_cursor(cursor))
+        sql = (f"SELECT {', '.join('p.' + c for c in LIST_COLUMNS)} FROM {source} "
+               f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+               f"ORDER BY {order}.updated DESC, {pid} DESC LIMIT ?")
+        args.append(limit + 1)
+        with self._conn() as db:
+            rows = db.execute(sql, args).fetchall()
+            more = len(rows) > limit
+            rows = rows[:limit]
+            tags = self._tags(db, [r[0] for r in rows])
+        items = [self._row(r, tags[r[0]]) for r in rows]
+        nxt = encode_cursor(items[-1]["updated"], items[-1]["id"]) if more else None
+        return items, nxt
+
+    def stats(self):
+        with self._conn() as db:
+            n = db.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+        return {"projects": n, "connections": len(self._all)}
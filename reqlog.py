@@ -0,0 +1,142 @@
+import os
+import queue
+import threading
+import time
+
+import orjson
+
+# -------------------------
+# Dziennik zapytań (JSONL) z buforowaniem
+# - log() tylko wrzuca rekord do kolejki (put_nowait), nigdy nie czeka na dysk;
+#   gdy kolejka pełna, rekord jest pomijany i liczony w `dropped`
+# - wątek w tle zbiera porcję (do batch_size albo flush_interval_s),
+#   zapisuje ją jednym write() i robi flush
+# - rotacja po rozmiarze: plik -> plik.1 -> ... -> plik.N
+# Przy kilku workerach użyj "{pid}" w ścieżce (np. requests-{pid}.jsonl),
+# wtedy każdy proces rotuje swój plik.
+#
+# Middleware zapisuje każde zapytanie GET/HEAD z pełnym query stringiem
+# (bench/replay.py odtwarza dokładnie ten ruch, razem z format=... itp.);
+# "params" (znormalizowane wejście dachu) dochodzi, gdy endpoint je ustawił.
+# Pomijane: POST/PUT/DELETE (treści zapytań nie zapisujemy), WebSocket
+# (/ws/live), monitoring (/metrics, /debug/, /api/cache/stats) i zadania
+# w tle (/jobs/... - identyfikatory ważne tylko w jednym uruchomieniu).
+# -------------------------
+_STOP = object()
+LOGGED_METHODS = ("GET", "HEAD")
+EXCLUDED_PREFIXES = ("/metrics", "/debug/", "/api/cache/stats", "/jobs/")
+
+
+class RequestLog:
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backups=5,
+                 flush_interval_s=1.0, batch_size=1000, max_queue=20000):
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+        self._q = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="reqlog", daemon=True)
+        self._thread.start()
+
+    def log(self, record):
+        try:
+            self._q.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        self._q.put(_STOP)
+        self._thread.join(timeout)
+
+    def _rotate(self, f):
+        f.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.unlink(self.path)
+        return open(self.path, "ab")
+
+    def _run(self):
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        f = open(self.path, "ab")
+        stop = False
+        try:
+            while not stop:
+                item = self._q.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval_s
+                while len(batch) < self.batch_size:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    try:
+                        item = self._q.get(timeout=left)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+
+                f.write(b"".join(orjson.dumps(r) + b"\n" for r in batch))
+                f.flush()
+                self.written += len(batch)
+                if f.tell() >= self.max_bytes:
+                    f = self._rotate(f)
+        finally:
+            f.close()
+
+    def stats(self):
+        return {"path": self.path, "written": self.written, "dropped": self.dropped,
+                "queued": self._q.qsize()}
+
+
+class RequestLogMiddleware:
+    """Czyste ASGI: po zakończeniu odpowiedzi loguje zapytania GET/HEAD
+    (bez EXCLUDED_PREFIXES) z query stringiem; request.state.roof_params
+    z endpointu trafia do rekordu jako "params".
+    """
+
+    def __init__(self, app, get_log):
+        self.app = app
+        self.get_log = get_log   # () -> RequestLog | None (log tworzony leniwie)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] not in LOGGED_METHODS
+                or scope["path"].startswith(EXCLUDED_PREFIXES) or self.get_log() is None):
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record = {
+                "ts": time.time(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "status": status[0],
+                "ms": (time.perf_counter() - t0) * 1e3,
+            }
+            params = scope.get("state", {}).get("roof_params")
+            if params is not None:
+                record["params"] = params
+            self.get_log().log(record)
@@ -0,0 +1,250 @@
+import math
+
+# -------------------------
+# Obliczenia dachu jako graf zależności (wszystko w cm)
+# Definitions (jak w calc_roof_cm):
+# - Poziom x: od zewnętrznej krawędzi murłaty do środka
+# - Pion y: w górę od górnej krawędzi murłaty
+#
+# Każdy węzeł to funkcja; nazwy jej argumentów = nazwy wejść lub innych
+# węzłów, od których zależy. RoofGraph pamięta wartości węzłów i po zmianie
+# wejść przelicza tylko węzły, których zależności faktycznie się zmieniły
+# (jeśli węzeł dał tę samą wartość, dalej zmiana się nie propaguje).
+# update() zwraca zbiór zmienionych nazw -> rysunki/UI wiedzą, co odświeżyć.
+# -------------------------
+INPUTS = (
+    "span_cm", "angle_deg", "eave_out_cm",
+    "rafter_h_cm", "wallplate_w_cm", "wallplate_h_cm",
+    "bearing_cm",
+    "purlin_enabled", "purlin_section_h_cm",
+    "purlin_s_from_outer_wallplate_cm", "purlin_top_above_wallplate_cm",
+)
+
+NODES = {}   # nazwa -> (zależności, funkcja); kolejność definicji = kolejność topologiczna
+
+
+def node(fn):
+    deps = fn.__code__.co_varnames[:fn.__code__.co_argcount]
+    for d in deps:
+        if d not in INPUTS and d not in NODES:
+            raise ValueError(f"{fn.__name__}: nieznana zależność {d}")
+    NODES[fn.__name__] = (deps, fn)
+    return fn
+
+
+def _clamp(v, a, b):
+    return max(a, min(b, v))
+
+
+# --- kąt ---
+@node
+def ang(angle_deg):
+    return math.radians(angle_deg)
+
+@node
+def tan(ang):
+    return math.tan(ang)
+
+@node
+def cos(ang):
+    return math.cos(ang)
+
+@node
+def sin(ang):
+    return math.sin(ang)
+
+@node
+def plumb_cut_deg(angle_deg):
+    return angle_deg
+
+@node
+def seat_cut_deg(angle_deg):
+    return 90.0 - angle_deg
+
+
+# --- geometria krokwi ---
+@node
+def half_span(span_cm):
+    return span_cm / 2.0
+
+@node
+def ridge_height(half_span, tan):
+    return half_span * tan
+
+@node
+def rafter_len_no_eave(half_span, cos):
+    return half_span / cos
+
+@node
+def rafter_len_with_eave(half_span, eave_out_cm, cos):
+    return (half_span + eave_out_cm) / cos
+
+
+# --- siodło (4 cm w dół) - JEDNAKOWO dla murłaty i płatwi ---
+@node
+def notch_depth(bearing_cm, rafter_h_cm):
+    return _clamp(bearing_cm, 0, 0.33 * rafter_h_cm)
+
+@node
+def notch_horiz(notch_depth, tan):
+    return (notch_depth / tan) if tan != 0 else 0.0
+
+@node
+def notch_along(notch_depth, sin):
+    return (notch_depth / sin) if sin != 0 else 0.0
+
+@node
+def murlata_seat_horiz(notch_horiz, wallplate_w_cm):
+    # (opcjonalnie) żeby nie wyszło większe niż murłata
+    return min(notch_horiz, wallplate_w_cm)
+
+
+# --- płatew ---
+@node
+def purlin_point(purlin_enabled, purlin_s_from_outer_wallplate_cm, purlin_top_above_wallplate_cm,
+                 rafter_len_no_eave, ridge_height, tan, cos, sin):
+    """(mode, x, s, y_top) dla GÓRY płatwi albo None."""
+    if not purlin_enabled:
+        return None
+    if purlin_s_from_outer_wallplate_cm and purlin_s_from_outer_wallplate_cm > 0:
+        s = _clamp(purlin_s_from_outer_wallplate_cm, 0, rafter_len_no_eave)
+        return ("po_krokwi", cos * s, s, sin * s)
+    y_top = _clamp(purlin_top_above_wallplate_cm, 0, ridge_height)
+    x = y_top / tan if tan != 0 else 0.0
+    s = x / cos if cos != 0 else 0.0
+    return ("po_wysokosci_gory", x, s, y_top)
+
+@node
+def purlin(purlin_point, purlin_section_h_cm, wallplate_h_cm, notch_depth, notch_horiz, notch_along):
+    if purlin_point is None:
+        return None
+    mode, x, s, y_top = purlin_point
+    y_bottom = y_top - purlin_section_h_cm
+    return {
+        "mode": mode,
+        "x_cm": x,                 # po poziomie od zewn. krawędzi murłaty w stronę środka
+        "s_cm": s,                 # po krokwi
+        "y_top_cm": y_top,         # góra płatwi nad górą murłaty
+        "y_bottom_cm": y_bottom,   # dół płatwi nad górą murłaty
+        # dół płatwi od dołu murłaty (pod wieniec/poduszkę)
+        "bottom_from_bottom_wallplate_cm": wallplate_h_cm + y_bottom,
+
+        "purlin_section_h_cm": purlin_section_h_cm,
+
+        "notch_depth_cm": notch_depth,
+        "notch_horiz_cm": notch_horiz,
+        "notch_along_rafter_cm": notch_along,
+    }
+
+
+# klucz w "results" -> węzeł
+RESULT_NODES = {
+    "polowa_rozpietosci_cm": "half_span",
+    "wysokosc_kalenicy_nad_gora_murlaty_cm": "ridge_height",
+    "dlugosc_krokwi_po_osi_bez_okapu_cm": "rafter_len_no_eave",
+    "dlugosc_krokwi_po_osi_z_okapem_cm": "rafter_len_with_eave",
+    "kat_plumb_kalenica_deg": "plumb_cut_deg",
+    "kat_seat_murlata_deg": "seat_cut_deg",
+
+    "murlata_siodlo_w_dol_cm": "notch_depth",
+    "murlata_siodlo_poziomo_cm": "murlata_seat_horiz",
+    "murlata_siodlo_po_krokwi_cm": "notch_along",
+}
+
+
+def _same(a, b):
+    # dokładnie ta sama wartość: ten sam typ, NaN == NaN, -0.0 != 0.0
+    # (wynik po update() ma być bit w bit taki jak liczony od zera)
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, float):
+        if a != a:
+            return b != b
+        return a == b and math.copysign(1.0, a) == math.copysign(1.0, b)
+    if isinstance(a, tuple):
+        return len(a) == len(b) and all(map(_same, a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    return a == b
+
+
+def evaluate(inputs):
+    """Wszystkie węzły od zera (bez śledzenia zmian): wejścia + wartości węzłów."""
+    v = dict(inputs)
+    for name, (deps, fn) in NODES.items():
+        v[name] = fn(*[v[d] for d in deps])
+    return v
+
+
+def result_of(v):
+    """Wartości węzłów -> wynik w kształcie calc_roof_cm (świeże dicty)."""
+    p = v["purlin"]
+    return {
+        "input": {k: v[k] for k in INPUTS},
+        "results": {k: v[n] for k, n in RESULT_NODES.items()},
+        "purlin": dict(p) if p is not None else None,
+    }
+
+
+class RoofGraph:
+    """Stan jednego dachu: wejścia + zapamiętane wartości węzłów."""
+
+    def __init__(self, **inputs):
+        missing = set(INPUTS) - set(inputs)
+        if missing:
+            raise ValueError(f"brak wejść: {sorted(missing)}")
+        unknown = set(inputs) - set(INPUTS)
+        if unknown:
+            raise ValueError(f"nieznane wejścia: {sorted(unknown)}")
+        self.evals = dict.fromkeys(NODES, 1)   # ile razy liczony był każdy węzeł
+        self.values = evaluate(inputs)
+        self.previous = {}
+
+    def update(self, **changes):
+        """Zmienia wejścia, przelicza co trzeba; zwraca zbiór zmienionych nazw."""
+        unknown = set(changes) - set(INPUTS)
+        if unknown:
+            raise ValueError(f"nieznane wejścia: {sorted(unknown)}")
+        v = self.values
+        prev = self.previous = {}   # stare wartości zmienionych (z ostatniego update)
+        changed = set()
+        for k, x in changes.items():
+            if not _same(v[k], x):
+                prev[k] = v[k]
+                v[k] = x
+                changed.add(k)
+        if not changed:
+            return changed
+        for name, (deps, fn) in NODES.items():
+            if changed.isdisjoint(deps):
+                continue
+            new = fn(*[v[d] for d in deps])
+            self.evals[name] += 1
+            if not _same(v[name], new):
+                prev[name] = v[name]
+                v[name] = new
+                changed.add(name)
+        return changed
+
+    def changed_outputs(self, changed):
+        """Wynik ostatniego update() -> ścieżki w wyniku:
+        "input.<pole>", "results.<klucz>", "purlin" i "purlin.<klucz>".
+        """
+        out = {f"input.{k}" for k in INPUTS if k in changed}
+        out.update(f"results.{k}" for k, n in RESULT_NODES.items() if n in changed)
+        if "purlin" in changed:
+            out.add("purlin")
+            old, new = self.previous["purlin"], self.values["purlin"]
+            if old is None or new is None:
+                out.update(f"purlin.{k}" for k in (new or old))
+            else:
+                out.update(f"purlin.{k}" for k in new if not _same(old[k], new[k]))
+        return out
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def result(self):
+        return result_of(self.values)
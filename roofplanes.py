@@ -0,0 +1,447 @@
+import math
+
+import numpy as np
+
+# -------------------------
+# Geometria dachów wielopołaciowych: połacie, kalenice, narożne, kosze, kulawki
+#
+# Rzut (cm): budynek na prostokącie [0, length] x [0, span], okap przedni
+# y = 0, tylny y = span, szczyty/okapy boczne x = 0 i x = length; z = 0 to
+# góra murłaty. Połać = płaszczyzna z = tan(spadek) * t, gdzie t to odległość
+# w rzucie od linii okapu do środka (jak "x" w calc_roof_cm: od zewnętrznej
+# krawędzi murłaty). Kierunek okapu a -> b, budynek po lewej stronie.
+#
+# Każda połać ma kształt w rzucie z wypukłych kawałków, których krawędzie mają
+# rodzaj (okap, szczyt, kalenica, narożna, koszowa, podział). Krokwie leżą
+# prostopadle do okapu co rozstaw; dla wszystkich pozycji naraz (numpy)
+# liczymy, gdzie linia krokwi wchodzi w kawałek i gdzie z niego wychodzi -
+# rodzaje tych krawędzi mówią, czy to krokiew zwykła, kulawka narożna czy
+# koszowa. Trygonometria połaci i kąty cięć na każdej krawędzi liczone są raz
+# przy budowie dachu (Roof), zestawienie krokwi to już tylko tablice.
+#
+# Długości krokwi jak w calc_roof_cm: po "osi" (linia przez piętę siodełka),
+# do osi krokwi narożnej/koszowej (bez odejmowania połowy jej grubości).
+# Cięcie boczne: kąt na górnej powierzchni krokwi między linią cięcia a
+# cięciem prostym (0 = prosto w poprzek); plumb = spadek połaci.
+# -------------------------
+EPS = 1e-9
+
+EDGE_KINDS = ("okap", "szczyt", "kalenica", "narozna", "koszowa", "podzial")
+
+# (dół, góra) -> element
+RAFTER_KINDS = {
+    ("okap", "kalenica"): "krokiew",
+    ("okap", "narozna"): "kulawka_narozna",
+    ("koszowa", "kalenica"): "kulawka_koszowa",
+    ("koszowa", "narozna"): "kulawka_krzyzowa",
+}
+
+
+class GeometryError(ValueError):
+    pass
+
+
+def _check_pitch(name, pitch_deg):
+    if not 0.0 < pitch_deg < 90.0:
+        raise GeometryError(f"{name}: spadek musi być w (0, 90)°")
+
+
+def _unit(v):
+    n = math.sqrt(sum(c * c for c in v))
+    return tuple(c / n for c in v)
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _angle_deg(a, b):
+    return math.degrees(math.acos(max(-1.0, min(1.0, _dot(a, b)))))
+
+
+class Plane:
+    """Połać: okap od a do b (budynek po lewej), spadek w stopniach."""
+    __slots__ = ("name", "a", "u", "n", "eave_len", "pitch_deg", "tan", "cos", "sin", "axis", "normal")
+
+    def __init__(self, name, a, b, pitch_deg):
+        _check_pitch(name, pitch_deg)
+        self.name = name
+        self.a = a
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        self.eave_len = math.hypot(dx, dy)
+        self.u = (dx / self.eave_len, dy / self.eave_len)     # wzdłuż okapu
+        self.n = (-self.u[1], self.u[0])                       # w głąb budynku
+        self.pitch_deg = pitch_deg
+        ang = math.radians(pitch_deg)
+        self.tan, self.cos, self.sin = math.tan(ang), math.cos(ang), math.sin(ang)
+        # kierunek krokwi w górę połaci i normalna (w górę), 3D
+        self.axis = (self.n[0] * self.cos, self.n[1] * self.cos, self.sin)
+        self.normal = (-self.n[0] * self.sin, -self.n[1] * self.sin, self.cos)
+
+    def local(self, x, y):
+        """Rzut -> (s wzdłuż okapu od a, t w głąb)."""
+        rx, ry = x - self.a[0], y - self.a[1]
+        return rx * self.u[0] + ry * self.u[1], rx * self.n[0] + ry * self.n[1]
+
+    def z(self, x, y):
+        return self.tan * self.local(x, y)[1]
+
+
+def clip(poly, kinds, a, b, kind):
+    """Wypukły wielokąt (CCW) przycięty do lewej strony prostej a -> b.
+
+    kinds[i] = rodzaj krawędzi poly[i] -> poly[i+1]; nowa krawędź na prostej
+    dostaje rodzaj `kind`.
+    """
+    dx, dy = b[0] - a[0], b[1] - a[1]
+
+    def side(p):
+        return dx * (p[1] - a[1]) - dy * (p[0] - a[0])
+
+    out, out_kinds = [], []
+    m = len(poly)
+    for i in range(m):
+        p, q, k = poly[i], poly[(i + 1) % m], kinds[i]
+        sp, sq = side(p), side(q)
+        p_in, q_in = sp >= -EPS, sq >= -EPS
+        if p_in:
+            out.append(p)
+            out_kinds.append(k)
+        if p_in != q_in:
+            r = sp / (sp - sq)
+            out.append((p[0] + r * (q[0] - p[0]), p[1] + r * (q[1] - p[1])))
+            out_kinds.append(kind if p_in else k)
+    return _dedupe(out, out_kinds)
+
+
+def _dedupe(poly, kinds):
+    out, out_kinds = [], []
+    m = len(poly)
+    for i in range(m):
+        p, q = poly[i], poly[(i + 1) % m]
+        if abs(p[0] - q[0]) > EPS or abs(p[1] - q[1]) > EPS:
+            out.append(p)
+            out_kinds.append(kinds[i])
+    return out, out_kinds
+
+
+def _inside(poly, p):
+    m = len(poly)
+    for i in range(m):
+        a, b = poly[i], poly[(i + 1) % m]
+        if (b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0]) < -1e-6:
+            return False
+    return True
+
+
+def _area(poly):
+    m = len(poly)
+    return 0.5 * sum(poly[i][0] * poly[(i + 1) % m][1] - poly[(i + 1) % m][0] * poly[i][1] for i in range(m))
+
+
+class _Piece:
+    """Wypukły kawałek połaci jako półpłaszczyzny w (s, t) + kąty cięć na krawędziach."""
+    __slots__ = ("plane", "poly", "lower", "upper", "s_min", "s_max", "area")
+
+    def __init__(self, plane, poly, kinds):
+        self.plane = plane
+        self.poly = poly
+        self.area = _area(poly)
+        self.lower = []     # t >= t0 + k (s - s0): (s0, t0, k, rodzaj, cięcie boczne)
+        self.upper = []     # t <= ...
+        self.s_min = []     # s >= s0 (ostro dla podziału: linia na podziale należy do kawałka obok)
+        self.s_max = []     # s <= s0
+        loc = [plane.local(*p) for p in poly]
+        m = len(poly)
+        for i in range(m):
+            (s0, t0), (s1, t1) = loc[i], loc[(i + 1) % m]
+            es, et = s1 - s0, t1 - t0
+            kind = kinds[i]
+            if abs(es) <= EPS * max(1.0, abs(et)):
+                if et > 0:
+                    self.s_max.append(s0)
+                else:
+                    self.s_min.append((s0, kind == "podzial"))
+                continue
+            edge3 = _unit((poly[(i + 1) % m][0] - poly[i][0], poly[(i + 1) % m][1] - poly[i][1],
+                           plane.tan * et))
+            bevel = math.degrees(math.asin(min(1.0, abs(_dot(plane.axis, edge3)))))
+            row = (s0, t0, et / es, kind, bevel)
+            (self.lower if es > 0 else self.upper).append(row)
+
+    def cut(self, s):
+        """Dla pozycji s (tablica): maska, t dołu/góry, indeksy krawędzi dołu/góry."""
+        ok = np.ones(s.shape, dtype=bool)
+        for s0, strict in self.s_min:
+            ok &= (s > s0 + 1e-7) if strict else (s >= s0 - 1e-7)
+        for s0 in self.s_max:
+            ok &= s <= s0 + 1e-7
+        lo = np.array([t0 + k * (s - s0) for s0, t0, k, _, _ in self.lower]).reshape(len(self.lower), -1)
+        hi = np.array([t0 + k * (s - s0) for s0, t0, k, _, _ in self.upper]).reshape(len(self.upper), -1)
+        i_lo = lo.argmax(axis=0)
+        i_hi = hi.argmin(axis=0)
+        t_lo = lo.max(axis=0)
+        t_hi = hi.min(axis=0)
+        ok &= t_hi - t_lo > 1e-6
+        return ok, t_lo, t_hi, i_lo, i_hi
+
+
+class Roof:
+    """Dach: połacie, ich kawałki w rzucie i linie przecięć.
+
+    planes: lista Plane; pieces: [(nazwa połaci, wielokąt CCW, rodzaje krawędzi)];
+    lines: [(rodzaj, punkt 3D, punkt 3D, (nazwa połaci, nazwa połaci))].
+    """
+
+    def __init__(self, kind, planes, pieces, lines, ridge_height_cm):
+        self.kind = kind
+        self.planes = {p.name: p for p in planes}
+        self.pieces = {p.name: [] for p in planes}
+        for name, poly, kinds in pieces:
+            poly, kinds = _dedupe(poly, kinds)
+            if len(poly) >= 3:
+                self.pieces[name].append(_Piece(self.planes[name], poly, kinds))
+        self.extent = {}
+        for name, plane in self.planes.items():
+            ss = [plane.local(*p)[0] for piece in self.pieces[name] for p in piece.poly] or [0.0]
+            self.extent[name] = (min(ss), max(ss))
+        self.lines = lines
+        self.ridge_height_cm = ridge_height_cm
+
+    # --- połacie i linie ---
+    def plane_info(self):
+        out = []
+        for name, plane in self.planes.items():
+            plan = sum(p.area for p in self.pieces[name])
+            out.append({
+                "nazwa": name,
+                "spadek_deg": plane.pitch_deg,
+                "okap_cm": plane.eave_len,
+                "rzut_m2": plan / 1e4,
+                "powierzchnia_m2": plan / plane.cos / 1e4,
+            })
+        return out
+
+    def line_info(self, eave_out_cm=0.0):
+        out = []
+        for kind, p, q, (na, nb) in self.lines:
+            if p[2] > q[2]:
+                p, q = q, p
+            plan = math.hypot(q[0] - p[0], q[1] - p[1])
+            length = math.dist(p, q)
+            if length <= 1e-6:
+                continue
+            d = _unit(tuple(b - a for a, b in zip(p, q)))
+            pa, pb = self.planes[na], self.planes[nb]
+            item = {
+                "rodzaj": kind,
+                "polacie": [na, nb],
+                "od": list(p),
+                "do": list(q),
+                "dlugosc_cm": length,
+                "rzut_cm": plan,
+                "spadek_deg": math.degrees(math.atan2(q[2] - p[2], plan)),
+                # kąt między połaciami (od spodu dachu); 180 = jedna płaszczyzna
+                "kat_dwuscienny_deg": 180.0 - _angle_deg(pa.normal, pb.normal),
+            }
+            if kind in ("narozna", "koszowa"):
+                # podcięcie (backing) górnej krawędzi narożnej / koszowej pod połacie
+                v = _unit(_cross(d, (0.0, 0.0, 1.0)))
+                m = _unit(_cross(v, d))
+                if m[2] < 0:
+                    m = tuple(-c for c in m)
+                item["podciecie_deg"] = [_angle_deg(m, pa.normal), _angle_deg(m, pb.normal)]
+                item["plumb_deg"] = item["spadek_deg"]
+                if kind == "narozna":
+                    # przedłużenie do linii okapu połaci `na` (ta sama wysokość deski czołowej)
+                    ext = eave_out_cm * pa.tan * plan / (q[2] - p[2]) if q[2] > p[2] else 0.0
+                    item["dlugosc_z_okapem_cm"] = length + ext / math.cos(math.radians(item["spadek_deg"]))
+            out.append(item)
+        return out
+
+    # --- krokwie ---
+    def rafter_count(self, spacing_cm):
+        """Górne oszacowanie liczby krokwi (pozycje siatki) - do limitów przed liczeniem."""
+        return sum(int((hi - lo) / spacing_cm) + 1 for lo, hi in self.extent.values())
+
+    def rafters(self, spacing_cm, eave_out_cm=0.0):
+        """Wszystkie krokwie: dict nazwa -> tablice numpy (jedna pozycja = jedna krokiew)."""
+        if spacing_cm <= 0:
+            raise GeometryError("rozstaw krokwi musi być > 0")
+        cols = {k: [] for k in ("plane", "s", "t0", "t1", "bottom", "top", "bevel_bottom", "bevel_top")}
+        for name, plane in self.planes.items():
+            # siatka od początku okapu, także poza nim (kulawki koszowe skrzydła nad połacią główną)
+            s_lo, s_hi = self.extent[name]
+            k0 = math.ceil(s_lo / spacing_cm - 1e-9)
+            k1 = math.floor(s_hi / spacing_cm + 1e-9)
+            s = spacing_cm * np.arange(k0, k1 + 1, dtype=np.float64)
+            for piece in self.pieces[name]:
+                ok, t_lo, t_hi, i_lo, i_hi = piece.cut(s)
+                if not ok.any():
+                    continue
+                lo_kind = np.array([r[3] for r in piece.lower], dtype=object)
+                hi_kind = np.array([r[3] for r in piece.upper], dtype=object)
+                lo_bev = np.array([r[4] for r in piece.lower])
+                hi_bev = np.array([r[4] for r in piece.upper])
+                n = int(ok.sum())
+                cols["plane"].append(np.full(n, name, dtype=object))
+                cols["s"].append(s[ok])
+                cols["t0"].append(t_lo[ok])
+                cols["t1"].append(t_hi[ok])
+                cols["bottom"].append(lo_kind[i_lo[ok]])
+                cols["top"].append(hi_kind[i_hi[ok]])
+                cols["bevel_bottom"].append(lo_bev[i_lo[ok]])
+                cols["bevel_top"].append(hi_bev[i_hi[ok]])
+        out = {k: (np.concatenate(v) if v else np.array([])) for k, v in cols.items()}
+        cos = np.array([self.planes[p].cos for p in out["plane"]], dtype=np.float64)
+        pitch = np.array([self.planes[p].pitch_deg for p in out["plane"]], dtype=np.float64)
+        run = out["t1"] - out["t0"]
+        at_eave = out["bottom"] == "okap"
+        out["run"] = run
+        out["length"] = run / cos
+        out["length_with_eave"] = np.where(at_eave, (run + eave_out_cm) / cos, run / cos)
+        out["plumb"] = pitch
+        out["seat"] = np.where(at_eave, 90.0 - pitch, np.nan)
+        out["kind"] = np.array([RAFTER_KINDS.get((b, t), f"{b}-{t}") for b, t in zip(out["bottom"], out["top"])],
+                               dtype=object)
+        return out
+
+
+def rafter_schedule(r, decimals=1):
+    """Krokwie zgrupowane: te same połać, rodzaj, długość (zaokr.) i cięcia -> ilość."""
+    groups = {}
+    cols = zip(r["plane"], r["kind"], np.round(r["length_with_eave"], decimals).tolist(),
+               np.round(r["plumb"], 2).tolist(), np.round(r["bevel_bottom"], 2).tolist(),
+               np.round(r["bevel_top"], 2).tolist())
+    for key in cols:
+        groups[key] = groups.get(key, 0) + 1
+    order = {p: i for i, p in enumerate(dict.fromkeys(r["plane"].tolist()))}
+    return [{"polac": p, "element": k, "dlugosc_z_okapem_cm": length, "plumb_deg": plumb,
+             "ciecie_boczne_dol_deg": bb, "ciecie_boczne_gora_deg": bt, "ilosc": n}
+            for (p, k, length, plumb, bb, bt), n in sorted(groups.items(), key=lambda kv: (order[kv[0][0]], -kv[0][2]))]
+
+
+# -------------------------
+# Dachy z prostokąta (+ opcjonalne skrzydło z koszami)
+# -------------------------
+def _ridge(span, tan_f, tan_b):
+    y = span * tan_b / (tan_f + tan_b)
+    return y, y * tan_f
+
+
+def _front_with_wing(front, kinds, wing, y_v):
+    """Połać przednia z wyciętym trójkątem pod skrzydło -> dwa wypukłe kawałki."""
+    wx, ww = wing["offset_cm"], wing["width_cm"]
+    ax = wx + ww / 2.0
+    apex = (ax, y_v)
+    for p in ((wx, 0.0), (wx + ww, 0.0), apex):
+        if not _inside(front, p):
+            raise GeometryError("skrzydło nie mieści się w połaci przedniej (kosze przecinają narożne)")
+    left, lk = clip(front, kinds, (ax, 0.0), (ax, 1.0), "podzial")
+    left, lk = clip(left, lk, (wx, 0.0), apex, "koszowa")
+    right, rk = clip(front, kinds, (ax, 1.0), (ax, 0.0), "podzial")
+    right, rk = clip(right, rk, apex, (wx + ww, 0.0), "koszowa")
+    return [(left, lk), (right, rk)]
+
+
+def _wing(wing, tan_f, length, ridge_h):
+    wx, ww, wl = wing["offset_cm"], wing["width_cm"], wing["length_cm"]
+    _check_pitch("skrzydło", wing["pitch_deg"])
+    if wx < 0 or ww <= 0 or wl <= 0 or wx + ww > length:
+        raise GeometryError("skrzydło: wymagane 0 <= offset, szerokość > 0, długość > 0, offset + szerokość <= długość")
+    left = Plane("skrzydlo_lewa", (wx, 0.0), (wx, -wl), wing["pitch_deg"])
+    right = Plane("skrzydlo_prawa", (wx + ww, -wl), (wx + ww, 0.0), wing["pitch_deg"])
+    ax = wx + ww / 2.0
+    z_w = (ww / 2.0) * left.tan
+    if z_w > ridge_h + EPS:
+        raise GeometryError("kalenica skrzydła wyżej niż kalenica główna")
+    y_v = z_w / tan_f
+    apex3 = (ax, y_v, z_w)
+    pieces = [
+        ("skrzydlo_lewa", [(wx, -wl), (ax, -wl), (ax, y_v), (wx, 0.0)], ["szczyt", "kalenica", "koszowa", "okap"]),
+        ("skrzydlo_prawa", [(wx + ww, -wl), (wx + ww, 0.0), (ax, y_v), (ax, -wl)],
+         ["okap", "koszowa", "kalenica", "szczyt"]),
+    ]
+    lines = [
+        ("koszowa", (wx, 0.0, 0.0), apex3, ("przod", "skrzydlo_lewa")),
+        ("koszowa", (wx + ww, 0.0, 0.0), apex3, ("przod", "skrzydlo_prawa")),
+        ("kalenica", (ax, -wl, z_w), apex3, ("skrzydlo_lewa", "skrzydlo_prawa")),
+    ]
+    return [left, right], pieces, lines, y_v
+
+
+def gable(span_cm, length_cm, pitch_front_deg, pitch_back_deg=None, wing=None):
+    """Dwuspadowy, spadki przód/tył mogą się różnić (kalenica poza środkiem)."""
+    if span_cm <= 0 or length_cm <= 0:
+        raise GeometryError("rozpiętość i długość budynku muszą być > 0")
+    pitch_back_deg = pitch_front_deg if pitch_back_deg is None else pitch_back_deg
+    L, W = length_cm, span_cm
+    front = Plane("przod", (0.0, 0.0), (L, 0.0), pitch_front_deg)
+    back = Plane("tyl", (L, W), (0.0, W), pitch_back_deg)
+    y_r, z_r = _ridge(W, front.tan, back.tan)
+    front_poly = [(0.0, 0.0), (L, 0.0), (L, y_r), (0.0, y_r)]
+    front_kinds = ["okap", "szczyt", "kalenica", "szczyt"]
+    pieces = [("tyl", [(L, W), (0.0, W), (0.0, y_r), (L, y_r)], ["okap", "szczyt", "kalenica", "szczyt"])]
+    lines = [("kalenica", (0.0, y_r, z_r), (L, y_r, z_r), ("przod", "tyl"))]
+    planes = [front, back]
+    if wing:
+        wplanes, wpieces, wlines, y_v = _wing(wing, front.tan, L, z_r)
+        pieces += [("przod", p, k) for p, k in _front_with_wing(front_poly, front_kinds, wing, y_v)]
+        planes += wplanes
+        pieces += wpieces
+        lines += wlines
+    else:
+        pieces.append(("przod", front_poly, front_kinds))
+    return Roof("dwuspadowy", planes, pieces, lines, z_r)
+
+
+def hip(span_cm, length_cm, pitch_front_deg, pitch_back_deg=None, pitch_left_deg=None, pitch_right_deg=None,
+        wing=None):
+    """Kopertowy: cztery połacie, każda z własnym spadkiem."""
+    if span_cm <= 0 or length_cm <= 0:
+        raise GeometryError("rozpiętość i długość budynku muszą być > 0")
+    pb = pitch_front_deg if pitch_back_deg is None else pitch_back_deg
+    pl = pitch_front_deg if pitch_left_deg is None else pitch_left_deg
+    pr = pitch_front_deg if pitch_right_deg is None else pitch_right_deg
+    L, W = length_cm, span_cm
+    front = Plane("przod", (0.0, 0.0), (L, 0.0), pitch_front_deg)
+    right = Plane("prawa", (L, 0.0), (L, W), pr)
+    back = Plane("tyl", (L, W), (0.0, W), pb)
+    left = Plane("lewa", (0.0, W), (0.0, 0.0), pl)
+    y_r, z_r = _ridge(W, front.tan, back.tan)
+    x_l = z_r / left.tan
+    x_r = L - z_r / right.tan
+    if x_l > x_r + EPS:
+        raise GeometryError("budynek za krótki dla tych spadków (narożne mijają się przed kalenicą)")
+    x_r = max(x_r, x_l)
+    front_poly = [(0.0, 0.0), (L, 0.0), (x_r, y_r), (x_l, y_r)]
+    front_kinds = ["okap", "narozna", "kalenica", "narozna"]
+    pieces = [
+        ("prawa", [(L, 0.0), (L, W), (x_r, y_r)], ["okap", "narozna", "narozna"]),
+        ("tyl", [(L, W), (0.0, W), (x_l, y_r), (x_r, y_r)], ["okap", "narozna", "kalenica", "narozna"]),
+        ("lewa", [(0.0, W), (0.0, 0.0), (x_l, y_r)], ["okap", "narozna", "narozna"]),
+    ]
+    lines = [
+        ("kalenica", (x_l, y_r, z_r), (x_r, y_r, z_r), ("przod", "tyl")),
+        ("narozna", (0.0, 0.0, 0.0), (x_l, y_r, z_r), ("przod", "lewa")),
+        ("narozna", (L, 0.0, 0.0), (x_r, y_r, z_r), ("przod", "prawa")),
+        ("narozna", (L, W, 0.0), (x_r, y_r, z_r), ("tyl", "prawa")),
+        ("narozna", (0.0, W, 0.0), (x_l, y_r, z_r), ("tyl", "lewa")),
+    ]
+    planes = [front, right, back, left]
+    if wing:
+        wplanes, wpieces, wlines, y_v = _wing(wing, front.tan, L, z_r)
+        pieces += [("przod", p, k) for p, k in _front_with_wing(front_poly, front_kinds, wing, y_v)]
+        planes += wplanes
+        pieces += wpieces
+        lines += wlines
+    else:
+        pieces.append(("przod", front_poly, front_kinds))
+    return Roof("kopertowy", planes, pieces, lines, z_r)
+
+
+ROOF_TYPES = {"dwuspadowy": gable, "kopertowy": hip}
@@ -0,0 +1,114 @@
+# -------------------------
+# Tryb produkcyjny: kilka workerów uvicorna z aplikacją załadowaną raz
+#
+#   python serve.py --host 0.0.0.0 --port 10000 --workers 4
+#
+# Proces główny importuje app, buduje strony gotowe i wyniki dla domyślnych
+# parametrów (app.warm_up), otwiera gniazdo i dopiero potem robi fork
+# workerów - każdy dostaje gotowe bajty (copy-on-write), nic nie liczy przy
+# starcie. Cache wyników/renderów wspólny przez plik mmap (shmcache.py,
+# DACH_SHARED_CACHE): chybienie w jednym workerze rozgrzewa pozostałe.
+# Proces główny pilnuje workerów: padnięty uruchamia ponownie, SIGTERM /
+# SIGINT przekazuje dalej i czeka na łagodne zamknięcie.
+# Tylko POSIX (fork); lokalnie wystarczy zwykłe `uvicorn app:app`.
+# -------------------------
+import argparse
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+RESPAWN_DELAY_S = 1.0     # worker padł zaraz po starcie -> nie kręcimy się w pętli
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Kalkulator dachu: serwer z kilkoma workerami")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=int(os.environ.get("PORT", "10000")))
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    ap.add_argument("--backlog", type=int, default=2048)
+    ap.add_argument("--log-level", default="info")
+    ap.add_argument("--shared-cache", default=os.environ.get(
+        "DACH_SHARED_CACHE", os.path.join(tempfile.gettempdir(), "dach-shared-cache.bin")),
+        help='plik cache wspólnego ("" = wyłączony)')
+    return ap.parse_args()
+
+
+def bind(host, port, backlog):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(config, sock):
+    # w dziecku: domyślne sygnały, uvicorn ustawia własne (łagodne zamknięcie)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def main():
+    args = parse_args()
+    # app czyta DACH_* przy imporcie
+    os.environ["DACH_SHARED_CACHE"] = args.shared_cache
+    import app
+
+    app.warm_up()
+    sock = bind(args.host, args.port, args.backlog)
+    config = uvicorn.Config(app.app, lifespan="on", log_level=args.log_level, proxy_headers=True)
+
+    workers = {}       # pid -> czas startu
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(config, sock)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(max(1, args.workers)):
+        spawn()
+    print(f"dach: {len(workers)} workerów na {args.host}:{args.port} (pid {os.getpid()})", file=sys.stderr)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        print(f"dach: worker {pid} zakończył się ({code}), uruchamiam nowy", file=sys.stderr)
+        if time.monotonic() - started < RESPAWN_DELAY_S:
+            time.sleep(RESPAWN_DELAY_S)
+        spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:      # Windows: tylko cache w procesie
+    fcntl = None
+
+# -------------------------
+# Cache wspólny dla workerów: tablica mieszająca w pliku mapowanym (mmap)
+#
+# Plik = nagłówek + `slots` slotów po `slot_size` bajtów. Klucz -> skrót
+# blake2b (16 B, z przestrzenią nazw, np. CACHE_VERSION); slot z pierwszych
+# 8 bajtów skrótu, szukamy w WAYS kolejnych (przy zapisie: ten sam klucz,
+# pusty, wygasły, albo najbliższy wygaśnięcia).
+# Slot: seq (u64), skrót, wygasa (time.time), długość, crc32, dane.
+# - zapis: blokada zakresu slotu (lockf, między procesami) + lock wątków;
+#   seq nieparzyste w trakcie zapisu
+# - odczyt bez blokad: seq przed i po, skrót i crc32 muszą się zgadzać,
+#   inaczej to chybienie (nigdy nie zwracamy rozerwanego wpisu)
+# Wartości to bajty; co się nie mieści w slocie, zostaje tylko w cache procesu.
+# Plik najlepiej na dysku (page cache i tak jest wspólny) - /dev/shm w
+# kontenerach bywa mały, a zapis poza zaalokowane miejsce to SIGBUS.
+# -------------------------
+MAGIC = b"DACHSHM1"
+HEADER = struct.Struct("<8sIII")          # magic, wersja układu, slots, slot_size
+HEADER_SIZE = 4096
+SLOT = struct.Struct("<Q16sdII")          # seq, skrót, wygasa, długość, crc32
+LAYOUT_VERSION = 1
+WAYS = 4
+
+
+class SharedCache:
+    def __init__(self, path, slots=2048, slot_size=64 * 1024, ttl_s=3600.0, namespace="", name="shared"):
+        if fcntl is None:
+            raise OSError("cache wspólny wymaga POSIX (fcntl)")
+        if slots < WAYS or slot_size <= SLOT.size:
+            raise ValueError(f"slots >= {WAYS}, slot_size > {SLOT.size}")
+        self.path = path
+        self.name = name
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ttl_s = ttl_s
+        self.namespace = namespace.encode()
+        self.hits = self.misses = self.sets = self.too_big = 0
+        self._lock = threading.Lock()
+
+        size = HEADER_SIZE + slots * slot_size
+        header = HEADER.pack(MAGIC, LAYOUT_VERSION, slots, slot_size)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.pread(self._fd, HEADER.size, 0) != header:
+                # nowy plik albo inny układ: nowy plik podmieniany w całości
+                # (proces ze starym mmapem dalej ma swój plik, bez SIGBUS)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+                os.ftruncate(fd, size)
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(fd, 0, size)
+                os.pwrite(fd, header, 0)
+                os.replace(tmp, path)
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = fd
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mm = mmap.mmap(self._fd, size)
+
+    def _digest(self, key):
+        return hashlib.blake2b(repr(key).encode(), digest_size=16, key=self.namespace[:64]).digest()
+
+    def _candidates(self, digest):
+        base = int.from_bytes(digest[:8], "little") % self.slots
+        return [HEADER_SIZE + ((base + j) % self.slots) * self.slot_size for j in range(WAYS)]
+
+    def get(self, key):
+        digest = self._digest(key)
+        mm = self._mm
+        now = time.time()
+        for off in self._candidates(digest):
+            seq, d, expires, length, crc = SLOT.unpack_from(mm, off)
+            if d != digest or seq & 1 or expires < now or length > self.slot_size - SLOT.size:
+                continue
+            start = off + SLOT.size
+            value = mm[start:start + length]
+            if SLOT.unpack_from(mm, off)[0] != seq or zlib.crc32(value) != crc:
+                continue      # ktoś właśnie nadpisał slot
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        """Zapis bajtów; False, gdy wartość nie mieści się w slocie."""
+        if len(value) > self.slot_size - SLOT.size:
+            self.too_big += 1
+            return False
+        digest = self._digest(key)
+        mm = self._mm
+        now = time.time()
+        offs = self._candidates(digest)
+        heads = [SLOT.unpack_from(mm, off) for off in offs]
+        off = next((o for o, h in zip(offs, heads) if h[1] == digest), None)
+        if off is None:
+            off = next((o for o, h in zip(offs, heads) if h[2] < now), None)
+        if off is None:
+            off = min(zip(offs, heads), key=lambda oh: oh[1][2])[0]
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slot_size, off)
+            try:
+                seq = SLOT.unpack_from(mm, off)[0] | 1
+                struct.pack_into("<Q", mm, off, seq)
+                start = off + SLOT.size
+                mm[start:start + len(value)] = value
+                SLOT.pack_into(mm, off, seq, digest, now + self.ttl_s, len(value), zlib.crc32(value))
+                struct.pack_into("<Q", mm, off, seq + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot_size, off)
+        self.sets += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            # zakres od pierwszego slotu do końca pliku: wyklucza zapisy innych procesów
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 0, HEADER_SIZE)
+            try:
+                for i in range(self.slots):
+                    off = HEADER_SIZE + i * self.slot_size
+                    seq = SLOT.unpack_from(self._mm, off)[0]
+                    SLOT.pack_into(self._mm, off, (seq | 1) + 1, bytes(16), 0.0, 0, 0)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 0, HEADER_SIZE)
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+    def stats(self):
+        now = time.time()
+        size = sum(1 for i in range(self.slots)
+                   if SLOT.unpack_from(self._mm, HEADER_SIZE + i * self.slot_size)[2] >= now)
+        lookups = self.hits + self.misses
+        # hits/misses/sets liczone w tym procesie; size - wspólne dla wszystkich
+        return {
+            "path": self.path,
+            "size": size,
+            "slots": self.slots,
+            "slot_size": self.slot_size,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "too_big": self.too_big,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,124 @@
+# -------------------------
+# Mały builder SVG dla rysunków dachu
+# - transformacja afiniczna (skala + przesunięcie, oś y w górę) liczona raz
+# - współrzędne formatowane raz, ze stałą precyzją (mniejszy plik)
+# - elementy trzymane jako gotowe stringi, serializacja jednym join
+# -------------------------
+
+class Affine:
+    """x' = ox + sx * x, y' = oy + sy * y (bez obrotu)."""
+    __slots__ = ("sx", "ox", "sy", "oy")
+
+    def __init__(self, sx=1.0, ox=0.0, sy=1.0, oy=0.0):
+        self.sx = sx
+        self.ox = ox
+        self.sy = sy
+        self.oy = oy
+
+    @classmethod
+    def y_up(cls, scale, origin_x, origin_y):
+        """Skala `scale` px/jednostkę, punkt (0, 0) w pikselach (origin_x, origin_y), y w górę."""
+        return cls(scale, origin_x, -scale, origin_y)
+
+    def tx(self, x):
+        return self.ox + self.sx * x
+
+    def ty(self, y):
+        return self.oy + self.sy * y
+
+
+IDENTITY = Affine()
+
+
+class Drawing:
+    def __init__(self, width, height, transform=IDENTITY, precision=1, background="#ffffff"):
+        self.width = width
+        self.height = height
+        self.t = transform
+
+        c = f"%.{precision}f"
+        self._pt = f"{c},{c}"
+        self._line = (
+            f'<line x1="{c}" y1="{c}" x2="{c}" y2="{c}" stroke="%s" stroke-width="%s"%s />'
+        )
+        self._text = (
+            f'<text x="{c}" y="{c}" font-size="%s" fill="%s" font-family="Arial" text-anchor="%s">%s</text>'
+        )
+        self._poly = '<polyline points="%s" fill="%s" stroke="%s" stroke-width="%s" />'
+
+        self._parts = [f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">']
+        if background:
+            self._parts.append(f'<rect width="100%" height="100%" fill="{background}"/>')
+
+    # współrzędne użytkownika (cm) -> px
+    def tx(self, x):
+        return self.t.ox + self.t.sx * x
+
+    def ty(self, y):
+        return self.t.oy + self.t.sy * y
+
+    def line(self, p1, p2, stroke="#111", width=3, dash=None):
+        t = self.t
+        self._parts.append(self._line % (
+            t.ox + t.sx * p1[0], t.oy + t.sy * p1[1],
+            t.ox + t.sx * p2[0], t.oy + t.sy * p2[1],
+            stroke, _width(width),
+            f' stroke-dasharray="{dash}"' if dash else "",
+        ))
+
+    def polyline(self, points, stroke="#111", width=2, fill="none"):
+        sx, ox, sy, oy = self.t.sx, self.t.ox, self.t.sy, self.t.oy
+        pt = self._pt
+        pts = " ".join([pt % (ox + sx * x, oy + sy * y) for x, y in points])
+        self._parts.append(self._poly % (pts, fill, stroke, _width(width)))
+
+    def text(self, x, y, t, size=14, color="#111", anchor="start"):
+        """Tekst w pikselach (jak w starych rysunkach: pozycje liczone przez tx/ty + offset)."""
+        self._parts.append(self._text % (x, y, size, color, anchor, t))
+
+    def render(self):
+        return "\n".join(self._parts) + "\n</svg>"
+
+
+class RecordingDrawing:
+    """To samo API co Drawing, ale zapisuje operacje w pikselach (np. dla PDF).
+
+    render() zwraca (width, height, ops); ops to krotki:
+    ("line", x1, y1, x2, y2, stroke, width, dash)
+    ("polyline", [(x, y), ...], stroke, width, fill)
+    ("text", x, y, t, size, color, anchor)
+    """
+
+    def __init__(self, width, height, transform=IDENTITY, **kwargs):
+        self.width = width
+        self.height = height
+        self.t = transform
+        self._ops = []
+
+    tx = Drawing.tx
+    ty = Drawing.ty
+
+    def line(self, p1, p2, stroke="#111", width=3, dash=None):
+        t = self.t
+        self._ops.append((
+            "line",
+            t.ox + t.sx * p1[0], t.oy + t.sy * p1[1],
+            t.ox + t.sx * p2[0], t.oy + t.sy * p2[1],
+            stroke, width, dash,
+        ))
+
+    def polyline(self, points, stroke="#111", width=2, fill="none"):
+        t = self.t
+        pts = [(t.ox + t.sx * x, t.oy + t.sy * y) for x, y in points]
+        self._ops.append(("polyline", pts, stroke, width, fill))
+
+    def text(self, x, y, t, size=14, color="#111", anchor="start"):
+        self._ops.append(("text", x, y, t, size, color, anchor))
+
+    def render(self):
+        return self.width, self.height, self._ops
+
+
+def _width(w):
+    # grubości: int zostaje intem, float max 2 miejsca
+    return w if isinstance(w, int) else f"{w:.2f}"
@@ -0,0 +1,214 @@
+import math
+
+import numpy as np
+
+# -------------------------
+# Zestawienie materiałów: drewno (mb i m³ na przekrój), powierzchnia dachu,
+# łaty, kontrłaty, membrana, łączniki - z wyniku calc_roof_cm_batch
+# + długości budynku
+#
+# Liczone porcjami (tablice numpy na porcję budynków), a sumy całego
+# projektu zbiera Totals: stała liczba pól + słownik przekrojów (kilka
+# różnych), więc pamięć nie rośnie z liczbą budynków. Budynek z count > 1
+# = tyle takich samych budynków; ilości w wierszu są już razy count.
+#
+# Model jak w cutlist.building_pieces: dach dwuspadowy, krokwie na obu
+# szczytach (rafters_per_slope), dwie murłaty, dwie płatwie (gdy włączona).
+# - powierzchnia: 2 x krokiew z okapem x (długość + 2 x okap szczytowy)
+# - kontrłata: jedna na krokiew, długości krokwi z okapem
+# - łaty: rzędy co batten_spacing_cm od okapu + rząd przy kalenicy,
+#   długości budynku z okapami szczytowymi
+# - membrana: powierzchnia + zakłady; rolki zaokrąglane w górę na budynek,
+#   a w sumach z łącznej powierzchni (jedno zamówienie)
+# - gwoździe: łata na każdej kontrłacie, kontrłata co nail_spacing_cm;
+#   wkręty ciesielskie: krokiew do murłaty (+ do płatwi)
+# -------------------------
+DEFAULTS = {
+    "rafter_b_cm": 8.0,
+    "purlin_b_cm": 14.0,
+    "batten_b_cm": 5.0,
+    "batten_h_cm": 4.0,
+    "batten_spacing_cm": 32.0,
+    "counter_batten_b_cm": 5.0,
+    "counter_batten_h_cm": 2.5,
+    "membrane_roll_m2": 75.0,        # 1.5 m x 50 m
+    "membrane_overlap": 0.10,
+    "nails_per_crossing": 1.0,
+    "counter_batten_nail_spacing_cm": 30.0,
+    "screws_per_bearing": 1.0,
+}
+
+# pola wiersza budynku (ilości razy count); "drewno" osobno
+QUANTITY_FIELDS = (
+    "krokwie_szt", "krokwie_mb", "murlata_mb", "platew_mb", "laty_mb", "kontrlaty_mb",
+    "powierzchnia_dachu_m2", "membrana_m2", "membrana_rolki",
+    "gwozdzie_laty_szt", "gwozdzie_kontrlaty_szt", "wkrety_ciesielskie_szt", "drewno_m3",
+)
+COUNT_FIELDS = ("krokwie_szt", "membrana_rolki", "gwozdzie_laty_szt", "gwozdzie_kontrlaty_szt",
+                "wkrety_ciesielskie_szt")
+
+# zakresy parametrów i budynków: ilości (razy count) muszą zmieścić się
+# w int64 wiersza JSON, a sprawdzamy to przed startem strumienia
+PARAM_LIMITS = {
+    "rafter_b_cm": (0.0, 100.0),
+    "purlin_b_cm": (0.0, 100.0),
+    "batten_b_cm": (0.0, 100.0),
+    "batten_h_cm": (0.0, 100.0),
+    "batten_spacing_cm": (5.0, 200.0),
+    "counter_batten_b_cm": (0.0, 100.0),
+    "counter_batten_h_cm": (0.0, 100.0),
+    "membrane_roll_m2": (1.0, 10_000.0),
+    "membrane_overlap": (0.0, 1.0),
+    "nails_per_crossing": (0.0, 100.0),
+    "counter_batten_nail_spacing_cm": (1.0, 1_000.0),
+    "screws_per_bearing": (0.0, 100.0),
+}
+MAX_RAFTERS_PER_SLOPE = 10_000
+MAX_COUNT = 100_000
+MAX_RAFTER_CM = 5_000.0      # krokiew z okapem (kąt bliski 90° -> długości ~1e18)
+MAX_LENGTH_CM = 100_000.0
+
+
+class TakeoffError(ValueError):
+    pass
+
+
+def check_params(params):
+    """Parametry z domyślnymi; nieznane pola i wartości <= 0 -> TakeoffError."""
+    unknown = set(params) - set(DEFAULTS)
+    if unknown:
+        raise TakeoffError(f"nieznane parametry: {sorted(unknown)}")
+    p = {**DEFAULTS, **params}
+    for k, v in p.items():
+        if not math.isfinite(v) or v < 0 or (v == 0 and k != "membrane_overlap"):
+            raise TakeoffError(f"{k}: wymagane > 0")
+        lo, hi = PARAM_LIMITS[k]
+        if not lo <= v <= hi:
+            raise TakeoffError(f"{k}: poza zakresem {lo:g}..{hi:g}")
+    return p
+
+
+def check_building(length_cm, spacing_cm, count, gable_overhang_cm=0.0, purlin_overhang_cm=0.0):
+    if length_cm <= 0 or spacing_cm <= 0:
+        raise TakeoffError("długość budynku i rozstaw krokwi muszą być > 0")
+    if not (length_cm <= MAX_LENGTH_CM and math.isfinite(spacing_cm)):
+        raise TakeoffError(f"długość budynku: maksymalnie {MAX_LENGTH_CM:g} cm")
+    if length_cm / spacing_cm >= MAX_RAFTERS_PER_SLOPE:
+        raise TakeoffError(f"maksymalnie {MAX_RAFTERS_PER_SLOPE} krokwi na połać")
+    if not 1 <= count <= MAX_COUNT:
+        raise TakeoffError(f"count: wymagane 1..{MAX_COUNT}")
+    if not (0 <= gable_overhang_cm <= MAX_RAFTER_CM and 0 <= purlin_overhang_cm <= MAX_RAFTER_CM):
+        raise TakeoffError(f"okapy szczytowe / wysunięcie płatwi: wymagane 0..{MAX_RAFTER_CM:g}")
+
+
+def check_roofs(out):
+    """Wynik calc_roof_cm_batch -> TakeoffError, gdy krokiew nie ma sensownej długości."""
+    rafter = out["results"]["dlugosc_krokwi_po_osi_z_okapem_cm"]
+    bad = ~(rafter <= MAX_RAFTER_CM)
+    if bad.any():
+        i = int(np.flatnonzero(bad)[0])
+        raise TakeoffError(f"budynek {i}: krokiew {rafter[i]:g} cm (maksymalnie {MAX_RAFTER_CM:g}, sprawdź kąt)")
+
+
+def section_name(name, b_cm, h_cm):
+    return f"{name} {b_cm:g}x{h_cm:g}"
+
+
+def quantities(out, length_cm, spacing_cm, count, gable_overhang_cm, purlin_overhang_cm, p):
+    """Ilości dla porcji n budynków (tablice długości n).
+
+    out: calc_roof_cm_batch; pozostałe: tablice (albo skalary) długości budynku,
+    rozstawu, liczby budynków, okapu szczytowego, wysunięcia płatwi; p: check_params.
+    Zwraca (pola QUANTITY_FIELDS -> tablice, przekroje: nazwa -> (mb, m³) tablice).
+    """
+    inp = out["input"]
+    rafter = out["results"]["dlugosc_krokwi_po_osi_z_okapem_cm"]
+    purlin = out["purlin"]["enabled"]
+    count = np.asarray(count, dtype=np.float64)
+    length_cm = np.asarray(length_cm, dtype=np.float64)
+    roof_len = length_cm + 2.0 * np.asarray(gable_overhang_cm, dtype=np.float64)
+
+    per_slope = np.floor(length_cm / spacing_cm + 1e-9) + 1.0    # cutlist.rafters_per_slope
+    rafters = 2.0 * per_slope
+    rows = np.ceil(rafter / p["batten_spacing_cm"] - 1e-9) + 1.0
+    area = 2.0 * rafter * roof_len / 1e4
+    membrane = area * (1.0 + p["membrane_overlap"])
+    bearings = np.where(purlin, 2.0, 1.0)
+
+    q = {
+        "krokwie_szt": rafters,
+        "krokwie_mb": rafters * rafter / 100.0,
+        "murlata_mb": 2.0 * length_cm / 100.0,
+        "platew_mb": np.where(purlin, 2.0 * (length_cm + 2.0 * purlin_overhang_cm) / 100.0, 0.0),
+        "laty_mb": 2.0 * rows * roof_len / 100.0,
+        "kontrlaty_mb": rafters * rafter / 100.0,
+        "powierzchnia_dachu_m2": area,
+        "membrana_m2": membrane,
+        "membrana_rolki": np.ceil(membrane / p["membrane_roll_m2"] - 1e-9),
+        "gwozdzie_laty_szt": 2.0 * rows * per_slope * p["nails_per_crossing"],
+        "gwozdzie_kontrlaty_szt": rafters * (np.ceil(rafter / p["counter_batten_nail_spacing_cm"] - 1e-9) + 1.0),
+        "wkrety_ciesielskie_szt": rafters * bearings * p["screws_per_bearing"],
+    }
+    q = {k: v * count for k, v in q.items()}
+
+    # drewno: mb i m³ na przekrój (kolumny wejścia mogą się różnić między budynkami)
+    timber = []
+    for name, b, h, mb in (
+        ("krokiew", p["rafter_b_cm"], inp["rafter_h_cm"], q["krokwie_mb"]),
+        ("murłata", inp["wallplate_w_cm"], inp["wallplate_h_cm"], q["murlata_mb"]),
+        ("płatew", p["purlin_b_cm"], inp["purlin_section_h_cm"], q["platew_mb"]),
+        ("łata", p["batten_b_cm"], p["batten_h_cm"], q["laty_mb"]),
+        ("kontrłata", p["counter_batten_b_cm"], p["counter_batten_h_cm"], q["kontrlaty_mb"]),
+    ):
+        b = np.broadcast_to(np.asarray(b, dtype=np.float64), mb.shape)
+        h = np.broadcast_to(np.asarray(h, dtype=np.float64), mb.shape)
+        timber.append((name, b, h, mb, mb * b * h / 1e4))
+    q["drewno_m3"] = sum(m3 for *_, m3 in timber)
+    return q, timber
+
+
+def building_rows(q, timber):
+    """Porcja -> lista dictów na budynek (ilości + "drewno": przekrój -> mb, m³)."""
+    cols = {k: q[k].tolist() for k in QUANTITY_FIELDS}
+    tcols = [(name, b.tolist(), h.tolist(), mb.tolist(), m3.tolist()) for name, b, h, mb, m3 in timber]
+    rows = []
+    for i in range(len(cols["krokwie_szt"])):
+        row = {k: (int(cols[k][i]) if k in COUNT_FIELDS else cols[k][i]) for k in QUANTITY_FIELDS}
+        row["drewno"] = {section_name(name, b[i], h[i]): {"mb": mb[i], "m3": m3[i]}
+                         for name, b, h, mb, m3 in tcols if mb[i] > 0}
+        rows.append(row)
+    return rows
+
+
+class Totals:
+    """Sumy projektu, dokładane porcjami (redukcja strumieniowa)."""
+
+    def __init__(self, params):
+        self.params = params
+        self.buildings = 0
+        self.sums = dict.fromkeys(QUANTITY_FIELDS, 0.0)
+        self.timber = {}
+
+    def add(self, q, timber, count):
+        self.buildings += int(np.sum(count))
+        for k in QUANTITY_FIELDS:
+            self.sums[k] += float(q[k].sum())
+        for name, b, h, mb, m3 in timber:
+            # kilka różnych przekrojów na porcję: grupowanie po (b, h)
+            bh = np.stack([b, h], axis=1)
+            uniq, inv = np.unique(bh, axis=0, return_inverse=True)
+            inv = inv.reshape(-1)
+            for j, (bj, hj) in enumerate(uniq.tolist()):
+                sel = inv == j
+                t = self.timber.setdefault(section_name(name, bj, hj), [0.0, 0.0])
+                t[0] += float(mb[sel].sum())
+                t[1] += float(m3[sel].sum())
+
+    def result(self):
+        out = {k: (int(round(v)) if k in COUNT_FIELDS else v) for k, v in self.sums.items()}
+        # jedno zamówienie membrany na cały projekt
+        out["membrana_rolki"] = int(math.ceil(self.sums["membrana_m2"] / self.params["membrane_roll_m2"] - 1e-9))
+        out["membrana_rolki_suma_budynkow"] = int(round(self.sums["membrana_rolki"]))
+        out["budynki"] = self.buildings
+        out["drewno"] = {k: {"mb": mb, "m3": m3} for k, (mb, m3) in sorted(self.timber.items()) if mb > 0}
+        return out
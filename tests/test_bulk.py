@@ -0,0 +1,41 @@
+import csv
+
+import orjson
+
+import bulk
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "span_cm", "angle_deg"])
+        w.writerows(rows)
+
+
+def test_header_only_csv(tmp_path):
+    src = tmp_path / "in.csv"
+    write_csv(src, [])
+    out = tmp_path / "out.csv"
+    assert bulk.run(str(src), str(out), "csv", 0, 10, "id", False) == 0
+    assert out.read_text().splitlines() == [",".join(bulk.CSV_HEADER)]
+    assert not (tmp_path / "out.csv.progress").exists()
+
+
+def test_empty_jsonl(tmp_path):
+    src = tmp_path / "in.jsonl"
+    src.write_bytes(b"")
+    out = tmp_path / "out.jsonl"
+    assert bulk.run(str(src), str(out), "jsonl", 0, 10, "id", False) == 0
+    assert out.read_bytes() == b""
+
+
+def test_resume_without_output_starts_over(tmp_path):
+    src = tmp_path / "in.csv"
+    write_csv(src, [[i, 600 + i, 30] for i in range(25)])
+    out = tmp_path / "out.csv"
+    ckpt = tmp_path / "out.csv.progress"
+    ckpt.write_bytes(orjson.dumps({"input": str(src), "format": "csv", "id_column": "id",
+                                   "rows": 10, "out_bytes": 5000}))
+    assert bulk.run(str(src), str(out), "csv", 0, 10, "id", True) == 25
+    assert len(out.read_text().splitlines()) == 26
+    assert not ckpt.exists()
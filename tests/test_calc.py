@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import app
+import roofplanes
+from tests.test_roofgraph import random_args
+
+
+def same(a, b):
+    # wartości liczbowo równe (0 ze ścieżki skalarnej == 0.0 z numpy), NaN == NaN
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, float) or isinstance(b, float):
+        a, b = float(a), float(b)
+        return a == b or (a != a and b != b)
+    return a == b
+
+
+def test_batch_matches_scalar():
+    rnd = random.Random(21)
+    roofs = [random_args(rnd) for _ in range(3000)]
+    rows = app.batch_to_rows(app.calc_roof_cm_batch(app.batch_columns(roofs=roofs)))
+    for args, row in zip(roofs, rows):
+        assert same(app.calc_roof_cm(**args), row), args
+
+
+def test_batch_columns_broadcast_scalars():
+    spans = [400.0, 800.0, 1200.0]
+    cols = app.batch_columns(columns={"span_cm": spans, "angle_deg": 40.0, "purlin_enabled": 1.0})
+    rows = app.batch_to_rows(app.calc_roof_cm_batch(cols))
+    for span, row in zip(spans, rows):
+        args = dict(app.CALC_DEFAULTS, span_cm=span, angle_deg=40.0, purlin_enabled=True)
+        assert same(app.calc_roof_cm(**args), row)
+
+
+def test_gable_roofplanes_matches_calc():
+    for span, length, pitch, eave in ((800, 1000, 35, 50), (1150, 640, 22.5, 30), (600, 900, 48, 0)):
+        res = app.calc_roof_cm(**dict(app.CALC_DEFAULTS, span_cm=span, angle_deg=pitch,
+                                      eave_out_cm=eave))["results"]
+        roof = roofplanes.gable(span, length, pitch)
+        r = roof.rafters(60, eave)
+        assert roof.ridge_height_cm == pytest.approx(res["wysokosc_kalenicy_nad_gora_murlaty_cm"], rel=1e-12)
+        assert set(r["kind"].tolist()) == {"krokiew"}
+        assert len(r["s"]) == roof.rafter_count(60)
+        for length_cm in r["length"].tolist():
+            assert length_cm == pytest.approx(res["dlugosc_krokwi_po_osi_bez_okapu_cm"], rel=1e-12)
+        for length_cm in r["length_with_eave"].tolist():
+            assert length_cm == pytest.approx(res["dlugosc_krokwi_po_osi_z_okapem_cm"], rel=1e-12)
+        assert set(r["plumb"].tolist()) == {res["kat_plumb_kalenica_deg"]}
+        assert set(r["seat"].tolist()) == {res["kat_seat_murlata_deg"]}
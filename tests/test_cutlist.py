@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+import app
+import cutlist
+
+
+def assert_patterns_fit(summary, kerf_cm):
+    for entry in summary["stock"]:
+        for pattern in entry["patterns"]:
+            n = sum(c["count"] for c in pattern["cuts"])
+            used = sum(c["length_cm"] * c["count"] for c in pattern["cuts"])
+            # rzaz między kawałkami; ostatnie cięcie bez rzazu
+            assert used + (n - 1) * kerf_cm <= entry["stock_cm"] + 1e-6
+            assert pattern["waste_cm"] == pytest.approx(entry["stock_cm"] - used)
+
+
+def test_building_patterns_fit_their_bars():
+    data = app.calc_roof_cm(**dict(app.CALC_DEFAULTS, span_cm=900, purlin_enabled=True,
+                                   purlin_top_above_wallplate_cm=150))
+    pieces = cutlist.building_pieces(data, 1450, 80, purlin_overhang_cm=30, allowance_cm=5)
+    summary = cutlist.cut_list(pieces)
+    assert_patterns_fit(summary, cutlist.KERF_CM)
+    flat = cutlist.split_long(pieces, max(cutlist.STOCK_LENGTHS_CM))
+    assert summary["totals"]["pieces"] == sum(count for _, _, count in flat)
+
+
+def test_random_pieces_fit_their_bars():
+    rnd = random.Random(5)
+    for _ in range(200):
+        pieces = [(f"e{i}", round(rnd.uniform(20, 1200), 1), rnd.randint(1, 40), False)
+                  for i in range(rnd.randint(1, 6))]
+        kerf = rnd.choice([0.0, 0.5, 3.0])
+        summary = cutlist.cut_list(pieces, kerf_cm=kerf)
+        assert_patterns_fit(summary, kerf)
+        assert summary["totals"]["pieces"] == sum(p[2] for p in pieces)
@@ -0,0 +1,56 @@
+import math
+
+import numpy as np
+import pytest
+
+import app
+import inverse
+
+
+def roofs(n=200, seed=1):
+    rnd = np.random.default_rng(seed)
+    return app.batch_columns(columns={
+        "span_cm": rnd.uniform(400, 1500, n).tolist(),
+        "angle_deg": rnd.uniform(5, 70, n).tolist(),
+        "eave_out_cm": rnd.uniform(0, 80, n).tolist(),
+    })
+
+
+@pytest.mark.parametrize("method", ["auto", "numeric"])
+@pytest.mark.parametrize("key", [
+    "wysokosc_kalenicy_nad_gora_murlaty_cm",
+    "dlugosc_krokwi_po_osi_bez_okapu_cm",
+    "dlugosc_krokwi_po_osi_z_okapem_cm",
+    "kat_plumb_kalenica_deg",
+])
+def test_round_trip(key, method):
+    cols = roofs()
+    fwd = app.calc_roof_cm_batch(cols)
+    sol = inverse.solve(app.calc_roof_cm_batch, cols, key, inverse._pick(fwd, key), method=method)
+    assert (sol["status"] == 0).all()
+    np.testing.assert_allclose(sol["angle_deg"], cols["angle_deg"], atol=1e-7)
+
+
+def test_purlin_target_with_purlin_s():
+    # 300 * cos(a) = 200 -> a = acos(2/3)
+    cols = app.batch_columns(columns={})
+    sol = inverse.solve(app.calc_roof_cm_batch, cols, "purlin_x_cm", np.array([200.0]),
+                        purlin_s_cm=np.array([300.0]))
+    assert sol["status"].tolist() == [0]
+    assert sol["angle_deg"][0] == pytest.approx(math.degrees(math.acos(2 / 3)), abs=1e-8)
+    assert sol["achieved"][0] == pytest.approx(200.0)
+    assert sol["out"]["purlin"]["s_cm"][0] == pytest.approx(300.0)
+
+
+def test_off_target_clamp_is_only_a_warning():
+    # domyślne wejście: siodło szersze niż murłata, ale wysokość kalenicy to nie zmienia
+    cols = app.batch_columns(columns={})
+    sol = inverse.solve(app.calc_roof_cm_batch, cols, "wysokosc_kalenicy_nad_gora_murlaty_cm", np.array([100.0]))
+    assert sol["status"].tolist() == [0]
+    assert sol["warnings"]["zacisk_murlata"].tolist() == [True]
+
+
+def test_seat_clamp_on_target_is_infeasible():
+    cols = app.batch_columns(columns={})
+    sol = inverse.solve(app.calc_roof_cm_batch, cols, "murlata_siodlo_poziomo_cm", np.array([30.0]))
+    assert inverse.STATUSES[sol["status"][0]] == "zacisk_murlata"
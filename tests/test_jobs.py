@@ -0,0 +1,39 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import jobs
+
+
+def test_failed_insert_frees_the_queue_slot(tmp_path, monkeypatch):
+    runner = jobs.JobRunner(str(tmp_path), workers=1, max_pending=2)
+
+    @contextmanager
+    def no_table():
+        yield sqlite3.connect(":memory:")   # INSERT bez tabeli jobs -> błąd
+
+    monkeypatch.setattr(runner, "_db", no_table)
+    for _ in range(3):
+        with pytest.raises(sqlite3.OperationalError):
+            runner.submit("x", lambda progress, path: "application/json")
+    assert runner._pending == 0
+
+
+def test_job_runs_to_done(tmp_path):
+    runner = jobs.JobRunner(str(tmp_path), workers=1, max_pending=2)
+
+    def task(progress, path):
+        with open(path, "w") as f:
+            f.write("{}")
+        return "application/json"
+
+    job_id = runner.submit("x", task)
+    for _ in range(200):
+        job = runner.get(job_id)
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.01)
+    assert job["status"] == "done"
+    assert runner._pending == 0
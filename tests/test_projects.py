@@ -0,0 +1,52 @@
+import pytest
+
+import projects
+
+
+def make_store(tmp_path, n):
+    store = projects.ProjectStore(str(tmp_path / "projects.db"))
+    ids = [store.create(f"dom {i}", "kowalski" if i % 2 else "nowak", "", ["a"] if i % 3 else ["a", "b"],
+                        {"span_cm": 800 + i}, (800 + i,), "v1", b"{}")
+           for i in range(n)]
+    return store, ids
+
+
+def pages(store, limit, **filters):
+    out, cursor = [], None
+    while True:
+        items, cursor = store.list(limit=limit, cursor=cursor, **filters)
+        assert len(items) <= limit
+        out.append([p["id"] for p in items])
+        if cursor is None:
+            return out
+
+
+def test_pagination_walks_every_project_once(tmp_path):
+    store, ids = make_store(tmp_path, 23)
+    for limit in (1, 5, 23, 50):
+        got = [pid for page in pages(store, limit) for pid in page]
+        assert got == ids[::-1]     # najnowsze najpierw
+
+
+def test_pagination_with_filters(tmp_path):
+    store, ids = make_store(tmp_path, 23)
+    got = [pid for page in pages(store, 4, tag="b") for pid in page]
+    assert got == [pid for i, pid in enumerate(ids) if i % 3 == 0][::-1]
+    got = [pid for page in pages(store, 3, client="kowalski") for pid in page]
+    assert got == [pid for i, pid in enumerate(ids) if i % 2][::-1]
+
+
+def test_update_moves_project_to_first_page(tmp_path):
+    store, ids = make_store(tmp_path, 10)
+    assert store.update(ids[0], name="przebudowa")
+    items, cursor = store.list(limit=3)
+    assert items[0]["id"] == ids[0] and items[0]["name"] == "przebudowa"
+    assert cursor is not None
+
+
+def test_bad_limit_and_cursor(tmp_path):
+    store, _ = make_store(tmp_path, 1)
+    with pytest.raises(projects.ProjectError):
+        store.list(limit=0)
+    with pytest.raises(projects.ProjectError):
+        store.list(cursor="nie-kursor")
@@ -0,0 +1,47 @@
+import random
+import timeit
+
+import app
+import roofgraph
+
+
+def random_args(rnd):
+    args = {
+        "span_cm": rnd.uniform(200, 1500),
+        "angle_deg": rnd.choice([0.0, 90.0, rnd.uniform(1, 80)]),
+        "eave_out_cm": rnd.uniform(0, 80),
+        "rafter_h_cm": rnd.uniform(10, 30),
+        "wallplate_w_cm": rnd.uniform(10, 20),
+        "wallplate_h_cm": rnd.uniform(10, 20),
+        "bearing_cm": rnd.uniform(0, 8),
+        "purlin_enabled": rnd.random() < 0.7,
+        "purlin_section_h_cm": rnd.uniform(14, 24),
+        "purlin_s_from_outer_wallplate_cm": rnd.choice([0.0, rnd.uniform(0, 900)]),
+        "purlin_top_above_wallplate_cm": rnd.uniform(-50, 600),
+    }
+    return args
+
+
+def test_graph_matches_scalar_bit_for_bit():
+    rnd = random.Random(13)
+    for _ in range(2000):
+        args = random_args(rnd)
+        assert roofgraph._same(roofgraph.result_of(roofgraph.evaluate(args)), app.calc_roof_cm(**args))
+
+
+def test_update_matches_fresh_evaluation():
+    rnd = random.Random(14)
+    graph = roofgraph.RoofGraph(**random_args(rnd))
+    for _ in range(500):
+        changes = {k: v for k, v in random_args(rnd).items() if rnd.random() < 0.3}
+        graph.update(**changes)
+        assert roofgraph._same(graph.result(), app.calc_roof_cm(**{k: graph[k] for k in roofgraph.INPUTS}))
+
+
+def test_scalar_path_does_not_go_through_the_graph():
+    # calc_roof_cm to najczęstsza ścieżka: ma zostać prostą funkcją,
+    # wyraźnie szybszą niż liczenie grafu od zera
+    args = random_args(random.Random(15))
+    scalar = min(timeit.repeat(lambda: app.calc_roof_cm(**args), number=2000, repeat=5))
+    graph = min(timeit.repeat(lambda: roofgraph.result_of(roofgraph.evaluate(args)), number=2000, repeat=5))
+    assert scalar < 0.6 * graph, (scalar, graph)
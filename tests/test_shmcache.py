@@ -0,0 +1,54 @@
+import struct
+
+import shmcache
+
+
+def slot_of(cache, key):
+    digest = cache._digest(key)
+    return next(off for off in cache._candidates(digest)
+                if shmcache.SLOT.unpack_from(cache._mm, off)[1] == digest)
+
+
+def test_get_set(tmp_path):
+    cache = shmcache.SharedCache(str(tmp_path / "c.shm"), slots=16, slot_size=256, namespace="t")
+    assert cache.get(("a", 1)) is None
+    assert cache.set(("a", 1), b"jeden")
+    assert cache.get(("a", 1)) == b"jeden"
+    assert cache.set(("a", 1), b"dwa")
+    assert cache.get(("a", 1)) == b"dwa"
+    assert not cache.set(("b", 2), b"x" * 256)      # nie mieści się w slocie
+    assert cache.get(("b", 2)) is None
+    cache.clear()
+    assert cache.get(("a", 1)) is None
+    cache.close()
+
+
+def test_shared_between_instances(tmp_path):
+    path = str(tmp_path / "c.shm")
+    a = shmcache.SharedCache(path, slots=16, slot_size=256, namespace="t")
+    b = shmcache.SharedCache(path, slots=16, slot_size=256, namespace="t")
+    a.set("k", b"wartosc")
+    assert b.get("k") == b"wartosc"
+    other = shmcache.SharedCache(path, slots=16, slot_size=256, namespace="inna")
+    assert other.get("k") is None
+    for c in (a, b, other):
+        c.close()
+
+
+def test_torn_read_is_a_miss(tmp_path):
+    cache = shmcache.SharedCache(str(tmp_path / "c.shm"), slots=16, slot_size=256, namespace="t")
+    cache.set("k", b"wartosc")
+    off = slot_of(cache, "k")
+    seq = shmcache.SLOT.unpack_from(cache._mm, off)[0]
+
+    # zapis w toku (seq nieparzyste)
+    struct.pack_into("<Q", cache._mm, off, seq | 1)
+    assert cache.get("k") is None
+    struct.pack_into("<Q", cache._mm, off, seq)
+    assert cache.get("k") == b"wartosc"
+
+    # dane nie pasują do crc32 (rozerwany wpis)
+    start = off + shmcache.SLOT.size
+    cache._mm[start:start + 1] = b"W"
+    assert cache.get("k") is None
+    cache.close()
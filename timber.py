@@ -0,0 +1,246 @@
+import json
+
+import numpy as np
+
+# -------------------------
+# Dobór przekrojów krokwi i płatwi z katalogu (zginanie + ugięcie)
+#
+# Model (uproszczony, do wstępnego doboru - nie zastępuje projektu):
+# - krokiew: belka swobodnie podparta między podporami, po osi krokwi
+#   (murłata-płatew i płatew-kalenica, bierzemy dłuższe przęsło; bez płatwi:
+#   murłata-kalenica); okap pomijamy
+# - płatew: belka swobodnie podparta między słupami (purlin_post_spacing_cm),
+#   zbiera z krokwi pas o szerokości połowy krokwi (po połaci)
+# - obciążenia: ciężar pokrycia g_k [kN/m² połaci], śnieg s = mu1 * s_k
+#   [kN/m² rzutu], ciężar własny z gęstości drewna
+# - SGN: 1.35 G + 1.5 S, f_m,d = k_mod * f_m,k / gamma_M
+# - SGU: ugięcie sprężyste od G + S z E_0,mean, limit L/250 (bez pełzania)
+#
+# Indeks katalogu: przekroje grupujemy w "łańcuchy" o tej samej klasie
+# i szerokości, posortowane po wysokości - wtedy W, I, ciężar i cena rosną
+# razem, więc najmniejszy wystarczający przekrój w łańcuchu to bisekcja
+# (np.searchsorted po W i po I), a wynik to najtańszy z łańcuchów.
+# Wszystko na tablicach numpy -> ten sam kod dla jednego dachu i batcha.
+# -------------------------
+K_MOD = 0.8          # klasa użytkowania 1-2, obciążenie średniotrwałe (śnieg)
+GAMMA_M = 1.3        # drewno lite
+GAMMA_G = 1.35
+GAMMA_Q = 1.5
+DEFLECTION_LIMIT = 250.0   # L / 250
+
+SNOW_KN_M2 = 1.0     # s_k na gruncie (strefa 2)
+DEAD_KN_M2 = 0.6     # pokrycie + łaty + ocieplenie, na m² połaci
+RAFTER_SPACING_CM = 80.0
+PURLIN_POST_SPACING_CM = 400.0
+# zwichrzenia nie sprawdzamy, więc zbyt smukłe przekroje odcinamy szerokością
+RAFTER_MIN_WIDTH_CM = 6.0
+PURLIN_MIN_WIDTH_CM = 12.0
+
+# f_m,k [MPa], E_0,mean [MPa], gęstość średnia [kg/m³], cena [zł/m³]
+STRENGTH_CLASSES = {
+    "C24": {"f_m_k": 24.0, "E_mean": 11000.0, "rho": 420.0, "price_m3": 1900.0},
+    "C30": {"f_m_k": 30.0, "E_mean": 12000.0, "rho": 460.0, "price_m3": 2400.0},
+    "GL24h": {"f_m_k": 24.0, "E_mean": 11500.0, "rho": 420.0, "price_m3": 3300.0},
+}
+WIDTHS_CM = (5, 6, 8, 10, 12, 14, 16, 18, 20)
+HEIGHTS_CM = (10, 12, 14, 15, 16, 18, 20, 22, 24, 26, 28, 30)
+
+
+class TimberError(ValueError):
+    pass
+
+
+def snow_shape(angle_deg):
+    """mu1 dla dachu dwuspadowego (PN-EN 1991-1-3)."""
+    a = np.asarray(angle_deg, dtype=np.float64)
+    return np.where(a <= 30.0, 0.8, np.where(a < 60.0, 0.8 * (60.0 - a) / 30.0, 0.0))
+
+
+class _Chain:
+    """Przekroje jednej klasy i szerokości, rosnąco po wysokości."""
+
+    def __init__(self, cls, b_cm, props, entries):
+        self.cls = cls
+        self.b_cm = b_cm
+        self.f_m_d = K_MOD * props["f_m_k"] / GAMMA_M / 10.0   # kN/cm²
+        self.E = props["E_mean"] / 10.0                          # kN/cm²
+        self.index = np.array([i for i, _ in entries], dtype=np.int64)
+        self.W = np.array([e["W_cm3"] for _, e in entries])
+        self.I = np.array([e["I_cm4"] for _, e in entries])
+        self.self_weight = np.array([e["self_weight_kn_m"] for _, e in entries])
+        self.price = np.array([e["price_m"] for _, e in entries])
+
+
+class Catalog:
+    def __init__(self, items, classes=STRENGTH_CLASSES):
+        """items: [{"class", "b_cm", "h_cm", opcjonalnie "price_m" zł/m}, ...]"""
+        self.classes = classes
+        self.entries = []
+        for it in items:
+            cls = it["class"]
+            if cls not in classes:
+                raise TimberError(f"nieznana klasa drewna: {cls}")
+            b, h = float(it["b_cm"]), float(it["h_cm"])
+            if b <= 0 or h <= 0:
+                raise TimberError(f"{cls} {b:g}x{h:g}: wymiary muszą być > 0")
+            p = classes[cls]
+            area_m2 = b * h / 1e4
+            self.entries.append({
+                "name": f"{cls} {b:g}×{h:g}",
+                "class": cls,
+                "b_cm": b,
+                "h_cm": h,
+                "W_cm3": b * h * h / 6.0,
+                "I_cm4": b * h ** 3 / 12.0,
+                "self_weight_kn_m": p["rho"] * 9.81e-3 * area_m2,
+                "price_m": float(it.get("price_m", p["price_m3"] * area_m2)),
+            })
+
+        # łańcuchy (klasa, szerokość); przekrój droższy od wyższego w tym samym
+        # łańcuchu nigdy nie będzie wybrany -> usuwamy, żeby cena rosła z h
+        groups = {}
+        for i, e in enumerate(self.entries):
+            groups.setdefault((e["class"], e["b_cm"]), []).append((i, e))
+        self.chains = []
+        for (cls, b), members in sorted(groups.items()):
+            members.sort(key=lambda ie: ie[1]["h_cm"])
+            kept, cheapest = [], float("inf")
+            for i, e in reversed(members):
+                if e["price_m"] < cheapest:
+                    kept.append((i, e))
+                    cheapest = e["price_m"]
+            self.chains.append(_Chain(cls, b, classes[cls], kept[::-1]))
+
+    @classmethod
+    def default(cls):
+        return cls([{"class": c, "b_cm": b, "h_cm": h}
+                    for c in STRENGTH_CLASSES for b in WIDTHS_CM for h in HEIGHTS_CM
+                    if b <= h <= 4 * b])
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def select(self, span_cm, q_d, q_k, sw_factor, classes=None, min_width_cm=0.0):
+        """Najtańszy wystarczający przekrój dla n elementów naraz.
+
+        span_cm: rozpiętość [cm]; q_d / q_k: obciążenie prostopadłe bez ciężaru
+        własnego, obliczeniowe / charakterystyczne [kN/m]; sw_factor: jaka część
+        ciężaru własnego działa prostopadle (cos kąta dla krokwi, 1 dla płatwi).
+        classes / min_width_cm zawężają katalog.
+        Zwraca (indeksy w entries albo -1, wykorzystanie zginania, ugięcia).
+        """
+        L = np.asarray(span_cm, dtype=np.float64)
+        q_d = np.asarray(q_d, dtype=np.float64) / 100.0   # kN/cm
+        q_k = np.asarray(q_k, dtype=np.float64) / 100.0
+        sw_factor = np.asarray(sw_factor, dtype=np.float64)
+        L, q_d, q_k, sw_factor = np.broadcast_arrays(L, q_d, q_k, sw_factor)
+        n = L.shape
+        best = np.full(n, -1, dtype=np.int64)
+        best_price = np.full(n, np.inf)
+        util_m = np.full(n, np.nan)
+        util_w = np.full(n, np.nan)
+        M_per_q = L * L / 8.0
+        w_per_q = 5.0 * L ** 4 / 384.0
+        w_lim = L / DEFLECTION_LIMIT
+
+        for ch in self.chains:
+            if (classes and ch.cls not in classes) or ch.b_cm < min_width_cm:
+                continue
+            m = len(ch.W)
+            # bisekcja bez ciężaru własnego (dolne ograniczenie)...
+            j = np.maximum(np.searchsorted(ch.W, q_d * M_per_q / ch.f_m_d),
+                           np.searchsorted(ch.I, q_k * w_per_q / (ch.E * np.where(w_lim > 0, w_lim, 1.0))))
+            # ...i poprawka o ciężar własny: zwykle zero albo jeden krok w górę
+            while True:
+                jj = np.minimum(j, m - 1)
+                sw = ch.self_weight[jj] / 100.0 * sw_factor
+                sigma = (q_d + GAMMA_G * sw) * M_per_q / ch.W[jj]
+                w = (q_k + sw) * w_per_q / (ch.E * ch.I[jj])
+                fail = (j < m) & ((sigma > ch.f_m_d) | (w > w_lim))
+                if not fail.any():
+                    break
+                j = np.where(fail, j + 1, j)
+            found = j < m
+            price = np.where(found, ch.price[np.minimum(j, m - 1)], np.inf)
+            better = price < best_price
+            best = np.where(better, ch.index[np.minimum(j, m - 1)], best)
+            best_price = np.where(better, price, best_price)
+            util_m = np.where(better, sigma / ch.f_m_d, util_m)
+            util_w = np.where(better, np.divide(w, w_lim, out=np.zeros(n), where=w_lim > 0), util_w)
+        return best, util_m, util_w
+
+    def describe(self, idx, util_m, util_w):
+        """Wynik select() -> lista dictów (None gdy nic z katalogu nie wystarcza)."""
+        out = []
+        for i, um, uw in zip(np.atleast_1d(idx).tolist(), np.atleast_1d(util_m).tolist(),
+                             np.atleast_1d(util_w).tolist()):
+            if i < 0:
+                out.append(None)
+                continue
+            e = self.entries[i]
+            out.append({
+                "name": e["name"], "class": e["class"], "b_cm": e["b_cm"], "h_cm": e["h_cm"],
+                "price_m": e["price_m"], "utilization_bending": um, "utilization_deflection": uw,
+            })
+        return out
+
+
+def rafter_demand(angle_deg, rafter_len_no_eave_cm, purlin_s_cm, rafter_spacing_cm=RAFTER_SPACING_CM,
+                  snow_kn_m2=SNOW_KN_M2, dead_kn_m2=DEAD_KN_M2):
+    """Krokiew: (rozpiętość cm, q_d, q_k prostopadle [kN/m], udział ciężaru własnego).
+
+    purlin_s_cm: położenie płatwi po krokwi, NaN = bez płatwi.
+    """
+    a = np.radians(np.asarray(angle_deg, dtype=np.float64))
+    c = np.cos(a)
+    Lr = np.asarray(rafter_len_no_eave_cm, dtype=np.float64)
+    s = np.asarray(purlin_s_cm, dtype=np.float64)
+    span = np.where(np.isnan(s), Lr, np.maximum(s, Lr - np.nan_to_num(s)))
+    width_m = np.asarray(rafter_spacing_cm, dtype=np.float64) / 100.0
+    g = dead_kn_m2 * width_m * c                                 # na m krokwi, prostopadle
+    sn = snow_shape(angle_deg) * snow_kn_m2 * width_m * c * c    # śnieg z rzutu -> po połaci
+    return span, GAMMA_G * g + GAMMA_Q * sn, g + sn, c
+
+
+def purlin_demand(angle_deg, rafter_len_no_eave_cm, post_spacing_cm=PURLIN_POST_SPACING_CM,
+                  snow_kn_m2=SNOW_KN_M2, dead_kn_m2=DEAD_KN_M2):
+    """Płatew: (rozpiętość cm, q_d, q_k pionowo [kN/m], 1)."""
+    a = np.radians(np.asarray(angle_deg, dtype=np.float64))
+    c = np.cos(a)
+    trib_m = np.asarray(rafter_len_no_eave_cm, dtype=np.float64) / 2.0 / 100.0   # pas po połaci
+    g = dead_kn_m2 * trib_m
+    sn = snow_shape(angle_deg) * snow_kn_m2 * trib_m * c
+    span = np.broadcast_to(np.asarray(post_spacing_cm, dtype=np.float64), np.shape(g))
+    return span, GAMMA_G * g + GAMMA_Q * sn, g + sn, np.ones_like(g)
+
+
+def check_params(rafter_spacing_cm, purlin_post_spacing_cm, snow_kn_m2, dead_kn_m2):
+    if snow_kn_m2 < 0 or dead_kn_m2 < 0:
+        raise TimberError("obciążenia nie mogą być ujemne")
+    if np.any(np.asarray(rafter_spacing_cm) <= 0) or np.any(np.asarray(purlin_post_spacing_cm) <= 0):
+        raise TimberError("rozstaw krokwi i słupów musi być > 0")
+
+
+def pick_sections(catalog, angle_deg, rafter_len_no_eave_cm, purlin_s_cm,
+                  rafter_spacing_cm=RAFTER_SPACING_CM, purlin_post_spacing_cm=PURLIN_POST_SPACING_CM,
+                  snow_kn_m2=SNOW_KN_M2, dead_kn_m2=DEAD_KN_M2, classes=None):
+    """Krokiew i płatew dla n dachów -> {"krokiew": select(), "płatew": select() albo None}.
+
+    Płatew liczona tylko tam, gdzie purlin_s_cm nie jest NaN (dla pozostałych -1).
+    """
+    check_params(rafter_spacing_cm, purlin_post_spacing_cm, snow_kn_m2, dead_kn_m2)
+    span, q_d, q_k, f = rafter_demand(angle_deg, rafter_len_no_eave_cm, purlin_s_cm,
+                                      rafter_spacing_cm, snow_kn_m2, dead_kn_m2)
+    out = {"krokiew": catalog.select(span, q_d, q_k, f, classes, RAFTER_MIN_WIDTH_CM)}
+    has = ~np.isnan(np.asarray(purlin_s_cm, dtype=np.float64))
+    if has.any():
+        span, q_d, q_k, f = purlin_demand(angle_deg, rafter_len_no_eave_cm, purlin_post_spacing_cm,
+                                          snow_kn_m2, dead_kn_m2)
+        idx, um, uw = catalog.select(span, q_d, q_k, f, classes, PURLIN_MIN_WIDTH_CM)
+        out["płatew"] = (np.where(has, idx, -1), np.where(has, um, np.nan), np.where(has, uw, np.nan))
+    else:
+        out["płatew"] = None
+    return out
+